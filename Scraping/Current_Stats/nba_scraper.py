@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 import schedule
 from datetime import datetime
 import logging
+import urllib.request
 
 # Configure logging
 logging.basicConfig(
@@ -28,14 +29,46 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 TABLE_NAME = os.getenv("TABLE_NAME", "current_data_table")
+# API endpoint that rebuilds the materialized predictions (e.g. http://api:8000/predict/refresh)
+PREDICTION_REFRESH_URL = os.getenv("PREDICTION_REFRESH_URL")
+PREDICTION_REFRESH_TOKEN = os.getenv("PREDICTION_REFRESH_TOKEN")
 
 # Create the connection string
 DB_CONNECTION = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 
+# This container does not ship the backend package, so it mirrors the pool settings
+# of backend/db/engine.py and builds its single engine once instead of once per job
+engine = create_engine(
+    DB_CONNECTION,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    connect_args={"ssl": {"ca": os.getenv("RDS_SSL_CERT")}} if os.getenv("RDS_SSL_CERT") else {},
+)
+
 # Define the range of years to scrape from environment variables
 start_season_nba = int(os.getenv("START_SEASON", "2024"))
 end_season_nba = int(os.getenv("END_SEASON", "2024"))
 
+def notify_prediction_refresh():
+    """Ask the API to rebuild its materialized predictions from the new data"""
+    if not PREDICTION_REFRESH_URL:
+        return
+    if not PREDICTION_REFRESH_TOKEN:
+        # the API refuses refresh requests without a token
+        logger.warning("PREDICTION_REFRESH_URL is set without PREDICTION_REFRESH_TOKEN, skipping the prediction refresh")
+        return
+    request = urllib.request.Request(PREDICTION_REFRESH_URL, method="POST")
+    request.add_header("X-Refresh-Token", PREDICTION_REFRESH_TOKEN)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            logger.info(f"Prediction refresh requested: HTTP {response.status}")
+    except Exception as e:
+        # the API serves live predictions until the next successful refresh
+        logger.warning(f"Prediction refresh request failed: {e}")
+
 def run_scrape_job():
     """Main scraping function that contains all your existing logic"""
     logger.info("Starting NBA data scrape job")
@@ -129,9 +162,6 @@ def run_scrape_job():
 
         logger.info(f"Scraped data sample:\n{combined_df.head()}")
         
-        # Insert data into database
-        engine = create_engine(DB_CONNECTION)
-        
         # Clean up column names
         combined_df.columns = [col.strip() for col in combined_df.columns]
 
@@ -139,6 +169,8 @@ def run_scrape_job():
         combined_df.to_sql(TABLE_NAME, engine, if_exists='replace', index=False)
         logger.info(f"Data successfully inserted into: {TABLE_NAME}")
 
+        notify_prediction_refresh()
+
         return True
 
     except Exception as e:
@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import orjson
+from fastapi.testclient import TestClient
+from api_server import app
+from backend.services.admission import AdmissionLane, Overloaded
+
+# Tests for the admission lanes in front of prediction work
+class TestAdmissionLane(unittest.TestCase):
+    def test_full_queue_is_rejected_at_once(self):
+        lane = AdmissionLane("compute", max_concurrency=1, max_queue=1, queue_timeout=5)
+        order = []
+
+        async def request(name, hold):
+            async with lane.slot():
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        async def scenario():
+            first = asyncio.create_task(request("first", 0.05))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(request("second", 0))
+            await asyncio.sleep(0)
+            # one running, one queued: the third is turned away without waiting
+            with self.assertRaises(Overloaded) as rejected:
+                await request("third", 0)
+            await asyncio.gather(first, second)
+            return rejected.exception
+
+        rejected = asyncio.run(scenario())
+        self.assertEqual((rejected.status_code, rejected.lane), (429, "compute"))
+        self.assertGreaterEqual(rejected.retry_after, 1)
+        self.assertEqual(order, ["first", "second"])
+        stats = lane.stats()
+        self.assertEqual((stats["admitted"], stats["queued"], stats["rejected_full"]), (2, 1, 1))
+        self.assertEqual((stats["running"], stats["waiting"]), (0, 0))
+        self.assertGreater(stats["max_queue_wait_ms"], 0)
+
+    def test_queue_timeout_gives_503_and_frees_the_queue(self):
+        lane = AdmissionLane("compute", max_concurrency=1, max_queue=4, queue_timeout=0.02)
+
+        async def scenario():
+            await lane.acquire()
+            with self.assertRaises(Overloaded) as timed_out:
+                await lane.acquire()
+            lane.release()
+            # the slot is free again and nobody is left waiting
+            await lane.acquire()
+            lane.release()
+            return timed_out.exception
+
+        self.assertEqual(asyncio.run(scenario()).status_code, 503)
+        stats = lane.stats()
+        self.assertEqual((stats["rejected_timeout"], stats["running"], stats["waiting"]), (1, 0, 0))
+
+    def test_lanes_are_independent(self):
+        compute = AdmissionLane("compute", max_concurrency=1, max_queue=0, queue_timeout=1)
+        cached = AdmissionLane("cached", max_concurrency=4, max_queue=4, queue_timeout=1)
+
+        async def scenario():
+            await compute.acquire()
+            # a saturated compute lane doesn't hold back cheap store reads
+            async with cached.slot():
+                pass
+            with self.assertRaises(Overloaded):
+                await compute.acquire()
+            compute.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(cached.stats()["admitted"], 1)
+
+# over-limit requests get a fast 429 with Retry-After instead of queueing up
+class TestAdmissionRoutes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+
+    def test_batch_rejected_when_compute_lane_is_full(self):
+        full = AdmissionLane("compute", max_concurrency=0, max_queue=0, queue_timeout=1)
+        with patch("backend.services.model_services.compute_lane", full), \
+                patch("backend.routes.predict.prepare_feature_rows", lambda columns, targets, model_dir: ({}, {})):
+            response = self.client.post("/predict/batch", content=orjson.dumps({"MP": [1.0]}), params={"targets": ["3P"]})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertIn("compute", response.json()["detail"])
+
+    def test_batch_rejected_before_the_body_is_read(self):
+        full = AdmissionLane("upload", max_concurrency=0, max_queue=0, queue_timeout=1)
+        with patch("backend.routes.predict.upload_lane", full), \
+                patch("backend.routes.predict.read_body") as read_body:
+            response = self.client.post("/predict/batch", content=orjson.dumps({"MP": [1.0]}), params={"targets": ["3P"]})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("upload", response.json()["detail"])
+        read_body.assert_not_called()
+
+    def test_oversized_batch_body_is_rejected(self):
+        body = orjson.dumps({"MP": [1.0] * 100})
+        with patch("backend.routes.predict.PREDICT_BATCH_MAX_BYTES", 64), \
+                patch("backend.routes.predict.prepare_feature_rows") as prepare:
+            response = self.client.post("/predict/batch", content=body, params={"targets": ["3P"]})
+            # a chunked upload has no Content-Length and is cut off while it is read
+            chunked = self.client.post("/predict/batch", content=iter([body[:50], body[50:]]), params={"targets": ["3P"]})
+        self.assertEqual((response.status_code, chunked.status_code), (413, 413))
+        prepare.assert_not_called()
+
+    def test_metrics_report_all_lanes(self):
+        admission = self.client.get("/metrics").json()["admission"]
+        self.assertEqual(set(admission), {"cached", "compute", "upload"})
+        self.assertIn("avg_queue_wait_ms", admission["compute"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from backend.ML_training.artifact_registry import ArtifactRegistry, ARTIFACT_SUFFIXES, get_model_version
+
+# Tests for the in-process artifact cache used by /predict
+class TestArtifactRegistry(unittest.TestCase):
+    def setUp(self):
+        # copy the production 3P bundle so file changes don't touch the real models
+        self.model_dir = tempfile.mkdtemp()
+        for suffix in ARTIFACT_SUFFIXES:
+            shutil.copy2(os.path.join("backend/ML_training/models/production", f"3P_{suffix}"), self.model_dir)
+        self.registry = ArtifactRegistry()
+
+    def tearDown(self):
+        shutil.rmtree(self.model_dir)
+
+    def test_second_load_is_a_hit(self):
+        first = self.registry.get("3P", self.model_dir)
+        second = self.registry.get("3P", self.model_dir)
+        self.assertIs(first, second)
+        stats = self.registry.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertGreater(stats["load_seconds"], 0)
+
+    def test_reloads_when_files_change(self):
+        first = self.registry.get("3P", self.model_dir)
+        # simulate a promotion by bumping the scaler's modification time
+        scaler_path = os.path.join(self.model_dir, "3P_scaler.pkl")
+        stat = os.stat(scaler_path)
+        os.utime(scaler_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second = self.registry.get("3P", self.model_dir)
+        self.assertIsNot(first, second)
+        self.assertEqual(self.registry.stats()["misses"], 2)
+
+    def test_model_version_follows_content(self):
+        before = get_model_version("3P", self.model_dir)
+        self.assertEqual(before, get_model_version("3P", self.model_dir))
+        # a copy elsewhere (another replica or checkout) with new modification times has the same version
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir)
+        for suffix in ARTIFACT_SUFFIXES:
+            shutil.copy(os.path.join(self.model_dir, f"3P_{suffix}"), other_dir)
+        self.assertEqual(before, get_model_version("3P", other_dir))
+        # different artifacts are a different version
+        shutil.copy(os.path.join("backend/ML_training/models/production", "3PA_best_model.pkl"),
+                    os.path.join(self.model_dir, "3P_best_model.pkl"))
+        self.assertNotEqual(before, get_model_version("3P", self.model_dir))
+
+    def test_promoted_metadata_version_is_used(self):
+        with open(os.path.join(self.model_dir, "3P.json"), "w") as meta_file:
+            json.dump({"version": "v3_20250101_1200"}, meta_file)
+        self.assertEqual(get_model_version("3P", self.model_dir), "v3_20250101_1200")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from backend.ML_training.artifact_registry import get_target_bundle
+from backend.services.batching import MicroBatcher
+
+# stands in for CompiledPipeline, records the size of each model call
+class RecordingPipeline:
+    def __init__(self):
+        self.calls = []
+
+    def predict_matrix(self, X):
+        self.calls.append(len(X))
+        return X[:, 0] * 2
+
+# Tests for micro-batching concurrent inference calls
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def run_concurrently(self, batcher, pipeline, matrices):
+        async def burst():
+            return await asyncio.gather(*[batcher.predict(pipeline, X) for X in matrices])
+        return asyncio.run(burst())
+
+    def test_concurrent_requests_share_one_call(self):
+        batcher = MicroBatcher(self.executor, window_ms=20)
+        pipeline = RecordingPipeline()
+        matrices = [np.full((n, 3), float(i)) for i, n in enumerate([1, 15, 4])]
+        results = self.run_concurrently(batcher, pipeline, matrices)
+
+        self.assertEqual(pipeline.calls, [20])
+        for i, (X, preds) in enumerate(zip(matrices, results)):
+            np.testing.assert_array_equal(preds, np.full(len(X), 2.0 * i))
+        stats = batcher.stats()
+        self.assertEqual((stats["batches"], stats["requests"], stats["rows"], stats["queue_depth"]), (1, 3, 20, 0))
+
+    def test_full_batch_is_sent_without_waiting(self):
+        batcher = MicroBatcher(self.executor, window_ms=10_000, max_rows=10)
+        pipeline = RecordingPipeline()
+        self.run_concurrently(batcher, pipeline, [np.ones((6, 2)), np.ones((6, 2))])
+        self.assertEqual(pipeline.calls, [12])
+
+    def test_batched_predictions_match_the_model(self):
+        pipeline = get_target_bundle("3P", "backend/ML_training/models/production").pipeline
+        rng = np.random.default_rng(0)
+        matrices = [rng.normal(size=(n, len(pipeline.feature_names))) for n in [1, 12, 30]]
+        results = self.run_concurrently(MicroBatcher(self.executor, window_ms=20), pipeline, matrices)
+        for X, preds in zip(matrices, results):
+            np.testing.assert_array_equal(preds, pipeline.predict_matrix(X))
+
+if __name__ == "__main__":
+    unittest.main()
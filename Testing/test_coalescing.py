@@ -0,0 +1,87 @@
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from backend.services.coalescing import SingleFlightCache
+from backend.services import model_services
+
+# Tests for the single-flight prediction cache
+class TestSingleFlightCache(unittest.TestCase):
+    def test_async_callers_share_one_task(self):
+        cache = SingleFlightCache(ttl=30)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        async def burst():
+            return await asyncio.gather(*[cache.get_or_compute_async("key", compute) for _ in range(8)])
+
+        self.assertEqual(asyncio.run(burst()), [42] * 8)
+        self.assertEqual(len(calls), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["coalesced"], stats["in_flight"]), (1, 7, 0))
+
+        # later identical calls are served from the cache
+        self.assertEqual(asyncio.run(cache.get_or_compute_async("key", compute)), 42)
+        self.assertEqual((cache.stats()["hits"], len(calls)), (1, 1))
+
+    def test_entries_expire_and_errors_are_not_cached(self):
+        cache = SingleFlightCache(ttl=0.05)
+
+        async def value(result):
+            return result
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        asyncio.run(cache.get_or_compute_async("key", lambda: value(1)))
+        time.sleep(0.1)
+        self.assertEqual(asyncio.run(cache.get_or_compute_async("key", lambda: value(2))), 2)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(cache.get_or_compute_async("bad", fail))
+        self.assertEqual(asyncio.run(cache.get_or_compute_async("bad", lambda: value(3))), 3)
+        self.assertEqual(cache.stats()["hits"], 0)
+
+# the /predict route's entry point coalesces identical queries through the shared cache
+class TestPredictionCoalescing(unittest.TestCase):
+    def test_identical_queries_share_one_pipeline_run(self):
+        calls = []
+
+        async def compute(targets, team, season, model_dir, live, intervals):
+            calls.append(targets)
+            await asyncio.sleep(0.05)
+            return pd.DataFrame({"Player": ["a"], "Predicted_3P": [1.0], "Predicted_3PA": [2.0]})
+
+        async def burst():
+            # the snapshot is passed in, as the route does, so the database isn't asked for the watermark
+            return await asyncio.gather(*[
+                model_services.run_predictions_frame_async(["3PA", "3P"], team="GSW", snapshot=((), None))
+                for _ in range(5)
+            ])
+
+        with patch.object(model_services, "prediction_cache", SingleFlightCache(ttl=30)), \
+                patch.object(model_services, "compute_predictions_async", compute):
+            frames = asyncio.run(burst())
+        self.assertEqual(calls, [["3P", "3PA"]])
+        # computed for the sorted targets, returned in the requested order
+        for frame in frames:
+            self.assertEqual(list(frame.columns), ["Player", "Predicted_3PA", "Predicted_3P"])
+
+    def test_stream_yields_stored_predictions_in_chunks(self):
+        stored = pd.DataFrame({"Player": list("abcde"), "Predicted_3P": [1.0, 2.0, 3.0, 4.0, 5.0]})
+
+        async def collect():
+            return [chunk async for chunk in model_services.stream_predictions_async(["3P"], chunk_size=2)]
+
+        with patch("backend.services.prediction_store.load_from_store", return_value=stored):
+            chunks = asyncio.run(collect())
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        pd.testing.assert_frame_equal(pd.concat(chunks), stored)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+import pandas as pd
+from fastapi.testclient import TestClient
+from api_server import app
+from backend.routes.predict import etag_matches
+
+SNAPSHOT = ((("3P", "v1+abc"), ("3PA", "v1+def")), "2025-01-01T00:00:00")
+
+# Tests for ETag / If-None-Match handling on /predict (the snapshot and pipeline are patched, no database needed)
+class TestConditionalPredict(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        results = pd.DataFrame({"Player": ["A"], "TEAM": ["GSW"], "Predicted_3P": [1.0], "Predicted_3PA": [2.0]})
+        self.pipeline = AsyncMock(return_value=results)
+        patches = [
+            patch("backend.routes.predict.prediction_snapshot", return_value=SNAPSHOT),
+            patch("backend.routes.predict.run_predictions_frame_async", self.pipeline),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_matching_etag_skips_the_pipeline(self):
+        first = self.client.get("/predict", params={"team": "GSW"})
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertIn("max-age", first.headers["Cache-Control"])
+        self.assertEqual(self.pipeline.await_count, 1)
+
+        second = self.client.get("/predict", params={"team": "GSW"}, headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers["ETag"], etag)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(self.pipeline.await_count, 1)
+
+    def test_etag_depends_on_query_and_format(self):
+        gsw = self.client.get("/predict", params={"team": "GSW"}).headers["ETag"]
+        lal = self.client.get("/predict", params={"team": "LAL"}).headers["ETag"]
+        columnar = self.client.get("/predict", params={"team": "GSW", "format": "columnar"}).headers["ETag"]
+        self.assertEqual(len({gsw, lal, columnar}), 3)
+
+    def test_unknown_watermark_disables_validation(self):
+        with patch("backend.routes.predict.prediction_snapshot", return_value=(SNAPSHOT[0], None)):
+            response = self.client.get("/predict", headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response.headers)
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+if __name__ == "__main__":
+    unittest.main()
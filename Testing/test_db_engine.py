@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from backend.db.engine import create_pooled_engine, connect, pool_metrics, build_db_url, STREAM_DRIVER
+
+# Tests for the shared pooled engine (run against a temporary sqlite file instead of MySQL)
+class TestPooledEngine(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_pooled_engine(f"sqlite:///{self.db_path}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.db_path)
+
+    def test_connections_are_reused(self):
+        before = pool_metrics(self.engine)
+        for _ in range(3):
+            with connect(self.engine) as conn:
+                self.assertEqual(conn.execute(text("SELECT 1")).scalar(), 1)
+        after = pool_metrics(self.engine)
+        # three checkouts served by a single pooled connection
+        self.assertEqual(after["checkouts"] - before["checkouts"], 3)
+        self.assertEqual(after["connects"] - before["connects"], 1)
+        self.assertEqual(after["waits"] - before["waits"], 3)
+        self.assertEqual(after["checked_out"], 0)
+
+    def test_stream_driver_has_server_side_cursors(self):
+        # mysql-connector's results are always buffered, streamed reads go through the stream driver
+        self.assertFalse(make_url(build_db_url()).get_dialect().supports_server_side_cursors)
+        self.assertTrue(make_url(build_db_url(STREAM_DRIVER)).get_dialect().supports_server_side_cursors)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import json
+import pickle
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import RandomForestRegressor
+from backend.ML_training.feature_selection import MaskSelector
+from backend.ML_training.inference import CompiledPipeline
+from backend.ML_training.training_program import select_features, train_and_save_models
+from Testing.test_utils import TempDirTestCase, small_candidates, synthetic_frame
+
+# Tests for the feature-selection strategies that replace RFECV (config feature_selection)
+class TestFeatureSelection(TempDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # two strong and one weaker informative column, the rest noise
+        cls.df = synthetic_frame(np.random.default_rng(9), 300, 16, {"3P": {"f0": 3, "f1": 2, "f2": -1}})
+        cls.X = cls.df.drop(columns=["3P", "Player"])
+        cls.y = cls.df["3P"]
+
+    def test_strategies_keep_the_informative_features(self):
+        for strategy in ["from_model", "permutation", "mi_rfecv"]:
+            model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0)
+            selector, X_selected, cache = select_features(model, self.X, self.y, strategy=strategy)
+            support = selector.get_support()
+            self.assertIsInstance(selector, MaskSelector)
+            self.assertEqual(selector.strategy, strategy)
+            self.assertTrue(support[:2].all(), strategy)
+            self.assertGreaterEqual(support.sum(), 5, strategy)
+            np.testing.assert_array_equal(X_selected, self.X.to_numpy()[:, support])
+            self.assertEqual(cache is None, strategy != "mi_rfecv")
+
+    def test_compiled_pipeline_accepts_mask_selector(self):
+        scaler = StandardScaler().fit(self.X)
+        scaled = pd.DataFrame(scaler.transform(self.X), columns=self.X.columns)
+        model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0)
+        selector, X_selected, _ = select_features(model, scaled, self.y, strategy="from_model")
+        model.fit(X_selected, self.y)
+        # saved and loaded like the other artifacts
+        selector = pickle.loads(pickle.dumps(selector))
+        expected = model.predict(selector.transform(scaler.transform(self.X)))
+        actual = CompiledPipeline(scaler, selector, model).predict(self.X, self.X.median().to_dict())
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_strategy_recorded_in_metadata(self):
+        config = {"targets": ["3P"], "output_dir": self.root, "parallel_training": False, "feature_selection": "permutation"}
+        with patch("backend.ML_training.training_program.candidate_models", small_candidates):
+            train_and_save_models(self.df, config)
+        staging_dir = os.path.join(self.root, "staging")
+        meta_name = next(f for f in os.listdir(staging_dir) if f.endswith(".json") and not f.endswith("_stats.json"))
+        with open(os.path.join(staging_dir, meta_name)) as f:
+            metadata = json.load(f)
+        self.assertEqual(metadata["feature_selection"], "permutation")
+        self.assertGreaterEqual(metadata["n_features"], 5)
+        self.assertEqual(metadata["selection_cache"], {})
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            train_and_save_models(self.df, {"targets": ["3P"], "feature_selection": "lasso"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backend.ML_training.training_program import save_feature_stats
+from backend.ML_training.artifact_registry import load_target_stats
+from sklearn.feature_selection import SelectKBest, f_regression
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+from backend.ML_training.inference import CompiledPipeline
+
+# Tests for the saved imputation stats used at inference instead of the historical table
+class TestFeatureStats(unittest.TestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        X = pd.DataFrame({"MP": [30.0, 20.0, 10.0], "FGA": [10.0, 6.0, 2.0], "PTS": [20.0, 12.0, 4.0]})
+        save_feature_stats(X, X.median().to_dict(), os.path.join(self.model_dir, "3P_stats.json"))
+
+    def tearDown(self):
+        for f in os.listdir(self.model_dir):
+            os.remove(os.path.join(self.model_dir, f))
+        os.rmdir(self.model_dir)
+
+    def test_stats_round_trip(self):
+        stats = load_target_stats("3P", self.model_dir)
+        self.assertEqual(stats["columns"], ["MP", "FGA", "PTS"])
+        self.assertEqual(stats["medians"]["FGA"], 6.0)
+        # older models without a stats file fall back to the reference table
+        self.assertIsNone(load_target_stats("3PA", self.model_dir))
+
+    def test_pipeline_aligns_and_imputes(self):
+        stats = load_target_stats("3P", self.model_dir)
+        X = pd.DataFrame({col: [1.0, 2.0, 3.0] for col in stats["columns"]})
+        # an identity scaler and a selector keeping every column, so the matrix holds the aligned inputs
+        scaler = StandardScaler(with_mean=False, with_std=False).fit(X)
+        selector = SelectKBest(f_regression, k="all").fit(X, [1.0, 2.0, 4.0])
+        pipeline = CompiledPipeline(scaler, selector, LinearRegression().fit(X, [1.0, 2.0, 4.0]))
+        new_df = pd.DataFrame({"PTS": [np.nan, 8.0], "MP": [25.0, np.nan], "Extra": [1, 2]})
+        result = pipeline.transform(new_df, stats["medians"])
+        # columns follow the training order, missing columns become 0 and NaNs take the median
+        self.assertEqual(pipeline.feature_names, ["MP", "FGA", "PTS"])
+        self.assertEqual(result.tolist(), [[25.0, 0.0, 12.0], [20.0, 0.0, 8.0]])
+
+if __name__ == "__main__":
+    unittest.main()
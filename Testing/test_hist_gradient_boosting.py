@@ -0,0 +1,56 @@
+import os
+import json
+import unittest
+from unittest.mock import patch
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor
+from backend.ML_training.artifact_registry import ArtifactRegistry
+from backend.ML_training.training_program import candidate_models, train_and_save_models
+from backend.services.promote_models import promote_models
+from Testing.test_utils import TempDirTestCase, synthetic_frame
+
+# Tests for the HistGradientBoosting candidate from training through promotion to inference
+class TestHistGradientBoosting(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.df = synthetic_frame(np.random.default_rng(10), 400, 10, {"3P": {"f0": 2, "f1": -1}})
+        self.X = self.df.drop(columns=["3P", "Player"])
+
+    def test_candidates_from_config(self):
+        self.assertEqual(list(candidate_models()), ["RandomForest", "GradientBoosting"])
+        models = candidate_models({"candidates": ["HistGradientBoosting"], "hist_gradient_boosting": {"max_iter": 50}})
+        model = models["HistGradientBoosting"]
+        self.assertIsInstance(model, HistGradientBoostingRegressor)
+        self.assertEqual((model.max_iter, model.early_stopping, model.learning_rate), (50, True, 0.05))
+        with self.assertRaises(ValueError):
+            candidate_models({"candidates": ["Lasso"]})
+
+    def test_trained_promoted_and_served(self):
+        config = {
+            "targets": ["3P"], "output_dir": self.root, "parallel_training": False,
+            "candidates": ["HistGradientBoosting"], "hist_gradient_boosting": {"max_iter": 60}
+        }
+        train_and_save_models(self.df, config)
+        staging_dir = os.path.join(self.root, "staging")
+        meta_name = next(f for f in os.listdir(staging_dir) if f.endswith(".json") and not f.endswith("_stats.json"))
+        with open(os.path.join(staging_dir, meta_name)) as f:
+            metadata = json.load(f)
+        # RFECV needs feature_importances_, which this model doesn't have
+        self.assertEqual((metadata["model"], metadata["feature_selection"]), ("HistGradientBoosting", "permutation"))
+
+        production_dir = os.path.join(self.root, "production")
+        with patch("backend.services.promote_models.refresh_prediction_store", return_value=True):
+            promote_models(staging_dir, production_dir, targets=["3P"], multi_output=False)
+        bundle = ArtifactRegistry().get("3P", production_dir)
+        # the quantile companions were promoted with the model
+        self.assertEqual(len(bundle.pipeline.interval_models), 3)
+
+        expected = bundle.model.predict(bundle.selector.transform(bundle.scaler.transform(self.X)))
+        np.testing.assert_array_equal(bundle.pipeline.predict(self.X, self.X.median().to_dict()), expected)
+        self.assertTrue(bundle.pipeline.supports_intervals)
+        point, lower, upper = bundle.pipeline.predict_intervals_matrix(bundle.pipeline.transform(self.X, {}))
+        np.testing.assert_array_equal(point, expected)
+        self.assertTrue(np.all((lower <= point) & (point <= upper)))
+
+if __name__ == "__main__":
+    unittest.main()
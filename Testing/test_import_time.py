@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# Importing the API must not load the ML stack, the auth routes never need it
+class TestApiImport(unittest.TestCase):
+    def test_api_server_import_is_light(self):
+        code = (
+            "import sys, api_server; "
+            "print(','.join(m for m in ('pandas', 'numpy', 'sklearn', 'scipy', 'joblib', 'yaml') if m in sys.modules))"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONPATH": os.getcwd()}
+        )
+        self.assertEqual(proc.stdout.strip(), "")
+
+if __name__ == "__main__":
+    unittest.main()
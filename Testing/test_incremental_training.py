@@ -0,0 +1,108 @@
+import os
+import json
+import unittest
+from unittest.mock import patch
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from backend.ML_training.artifact_registry import ArtifactRegistry, resolve_model_dir
+from backend.ML_training.training_program import (
+    train_and_save_models, update_models, trained_through, remap_thresholds
+)
+from backend.services.promote_models import promote_models
+from Testing.test_utils import TempDirTestCase, small_candidates, synthetic_frame
+
+def season_rows(rng, season, n_rows, shift=0.0):
+    return synthetic_frame(rng, n_rows, 8, {"3P": {"f0": 2, "f1": -1}}, shift=shift).assign(YR=season)
+
+# Tests for warm-starting the production models on newly added seasons
+class TestIncrementalTraining(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rng = np.random.default_rng(11)
+        self.production_dir = os.path.join(self.root, "production")
+        self.config = {
+            "targets": ["3P"], "output_dir": self.root, "parallel_training": False,
+            "incremental": {"new_trees": 5, "new_stages": 5, "drift_threshold": 0.5}
+        }
+        history = pd.concat([season_rows(self.rng, season, 100) for season in [2021, 2022, 2023]], ignore_index=True)
+        with patch("backend.ML_training.training_program.candidate_models", small_candidates):
+            train_and_save_models(history, self.config)
+        self.promote()
+
+    def promote(self):
+        with patch("backend.services.promote_models.refresh_prediction_store", return_value=True):
+            promote_models(os.path.join(self.root, "staging"), self.production_dir, targets=["3P"], multi_output=False)
+        return ArtifactRegistry().get("3P", self.production_dir)
+
+    def test_threshold_remap_keeps_decisions(self):
+        X = pd.DataFrame(self.rng.normal(size=(400, 3)), columns=["a", "b", "c"])
+        y = X["a"] - X["c"]
+        old_scaler = StandardScaler().fit(X)
+        model = RandomForestRegressor(n_estimators=5, random_state=0).fit(old_scaler.transform(X)[:, [0, 2]], y)
+        expected = model.predict(old_scaler.transform(X)[:, [0, 2]])
+        new_scaler = StandardScaler().fit(X + 3)
+        remap_thresholds(model.estimators_, old_scaler, new_scaler, np.array([0, 2]))
+        actual = model.predict(new_scaler.transform(X)[:, [0, 2]])
+        # a row sitting within float rounding of a split can land on the other side
+        self.assertGreater(np.mean(actual == expected), 0.99)
+
+    def test_new_season_warm_starts_the_model(self):
+        before = self.promote()
+        self.assertEqual(trained_through(["3P"], self.production_dir), 2023)
+        n_trees = len(before.model.estimators_)
+        result = update_models(season_rows(self.rng, 2024, 80), self.config, self.production_dir)
+        self.assertEqual(result, {"updated": ["3P"], "rebuild": []})
+
+        after = self.promote()
+        self.assertEqual(len(after.model.estimators_), n_trees + 5)
+        self.assertEqual(after.scaler.n_samples_seen_, before.scaler.n_samples_seen_ + 64)
+        with open(os.path.join(resolve_model_dir(self.production_dir), "3P.json")) as meta_file:
+            metadata = json.load(meta_file)
+        self.assertEqual(metadata["data_through"], 2024)
+        self.assertEqual(metadata["incremental"]["new_rows"], 80)
+        self.assertEqual(trained_through(["3P"], self.production_dir), 2024)
+        # still predicts the relationship it was trained on
+        rows = season_rows(self.rng, 2024, 50)
+        predicted = after.pipeline.predict(rows, after.stats["medians"])
+        self.assertGreater(np.corrcoef(predicted, rows["3P"])[0, 1], 0.8)
+
+    def test_drifted_season_needs_a_rebuild(self):
+        result = update_models(season_rows(self.rng, 2024, 80, shift=2.0), self.config, self.production_dir)
+        self.assertEqual(result, {"updated": [], "rebuild": ["3P"]})
+
+    def test_partial_rebuild_keeps_other_targets_out_of_the_features(self):
+        history = season_rows(self.rng, 2023, 200)
+        history["3PA"] = 3 * history["3P"] + self.rng.normal(size=200)
+        config = {**self.config, "targets": ["3P", "3PA"], "output_dir": os.path.join(self.root, "rebuild")}
+        with patch("backend.ML_training.training_program.candidate_models", small_candidates):
+            train_and_save_models(history, config, train_targets=["3P"])
+        staging_dir = os.path.join(self.root, "rebuild", "staging")
+        self.assertFalse(any(fname.startswith("3PA") for fname in os.listdir(staging_dir)))
+        scaler = joblib.load(os.path.join(staging_dir, next(f for f in os.listdir(staging_dir) if f.endswith("_scaler.pkl"))))
+        self.assertNotIn("3PA", list(scaler.feature_names_in_))
+        with open(os.path.join(staging_dir, next(f for f in os.listdir(staging_dir) if f.endswith("_stats.json")))) as stats_file:
+            self.assertNotIn("3PA", json.load(stats_file)["columns"])
+
+    def test_shared_bundle_targets_need_a_rebuild(self):
+        history = season_rows(self.rng, 2023, 200)
+        history["3PA"] = 3 * history["3P"] + self.rng.normal(size=200)
+        config = {**self.config, "targets": ["3P", "3PA"], "output_dir": os.path.join(self.root, "shared"),
+                  "multi_output": True, "feature_selection": "from_model"}
+        train_and_save_models(history, config)
+        production_dir = os.path.join(self.root, "shared", "production")
+        with patch("backend.services.promote_models.refresh_prediction_store", return_value=True):
+            promote_models(os.path.join(self.root, "shared", "staging"), production_dir, targets=["3P", "3PA"], multi_output=True)
+
+        new_rows = season_rows(self.rng, 2024, 80)
+        new_rows["3PA"] = 3 * new_rows["3P"]
+        # the targets only have <target>_output.json aliases, they are handed back instead of failing to load
+        self.assertEqual(update_models(new_rows, config, production_dir), {"updated": [], "rebuild": ["3P", "3PA"]})
+
+    def test_too_few_rows(self):
+        self.assertEqual(update_models(season_rows(self.rng, 2024, 3), self.config, self.production_dir), {"updated": [], "rebuild": []})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backend.ML_training.artifact_registry import load_target_artifacts
+from backend.ML_training.inference import CompiledPipeline
+
+# Tests that the fused pipeline matches scaler -> selector -> model on the production models
+class TestCompiledPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model_dir = "backend/ML_training/models/production"
+        rng = np.random.default_rng(7)
+        model, scaler, _ = load_target_artifacts("3P", cls.model_dir)
+        columns = list(scaler.feature_names_in_)
+        # synthetic stat lines around the training distribution, with some missing values
+        cls.df = pd.DataFrame(rng.normal(scaler.mean_, scaler.scale_, size=(500, len(columns))), columns=columns)
+        cls.df.loc[::9, "FGA"] = np.nan
+        cls.df.loc[::13, "MP"] = np.nan
+        cls.stats = {"columns": columns, "medians": cls.df.median().to_dict()}
+
+    def test_matches_sklearn_chain(self):
+        for target in ["3P", "3PA"]:
+            model, scaler, selector = load_target_artifacts(target, self.model_dir)
+            # aligned to the training columns, missing values take the median
+            features = self.df.reindex(columns=scaler.feature_names_in_, fill_value=0).fillna(self.stats["medians"])
+            expected = model.predict(selector.transform(scaler.transform(features).copy()))
+            actual = CompiledPipeline(scaler, selector, model).predict(self.df, self.stats["medians"])
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_missing_columns_are_zero_filled(self):
+        model, scaler, selector = load_target_artifacts("3P", self.model_dir)
+        pipeline = CompiledPipeline(scaler, selector, model)
+        dropped = self.df.drop(columns=[pipeline.feature_names[0]])
+        X = pipeline.transform(dropped, self.stats["medians"])
+        self.assertTrue(X.flags["C_CONTIGUOUS"])
+        self.assertEqual(X.shape, (len(self.df), len(pipeline.feature_names)))
+        expected = (0 - pipeline.mean[0]) / pipeline.scale[0]
+        self.assertTrue(np.all(X[:, 0] == expected))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import orjson
+from sklearn.preprocessing import StandardScaler
+from sklearn.feature_selection import SelectKBest, f_regression
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from fastapi.testclient import TestClient
+from api_server import app
+from backend.ML_training.artifact_registry import TargetBundle, load_target_artifacts
+from backend.ML_training.inference import CompiledPipeline, INTERVAL_QUANTILES
+from backend.ML_training.training_program import fit_quantile_models
+
+# Tests for prediction intervals: per-tree spread for forests, stacked quantile companions for boosted models
+class TestPredictionIntervals(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(5)
+        columns = [f"f{i}" for i in range(8)]
+        cls.df = pd.DataFrame(rng.normal(size=(400, 8)), columns=columns)
+        cls.y = 2 * cls.df["f0"] - cls.df["f3"] + rng.normal(scale=0.5, size=400)
+        cls.scaler = StandardScaler().fit(cls.df)
+        scaled = pd.DataFrame(cls.scaler.transform(cls.df), columns=columns)
+        cls.selector = SelectKBest(f_regression, k=5).fit(scaled, cls.y)
+        cls.X_selected = cls.selector.transform(scaled)
+
+    def test_forest_bounds_are_tree_percentiles(self):
+        model = RandomForestRegressor(n_estimators=30, max_depth=6, random_state=0).fit(self.X_selected, self.y)
+        pipeline = CompiledPipeline(self.scaler, self.selector, model)
+        X = pipeline.transform(self.df, {})
+        point, lower, upper = pipeline.predict_intervals_matrix(X)
+        np.testing.assert_array_equal(point, model.predict(self.X_selected))
+        per_tree = np.stack([tree.predict(self.X_selected.astype(np.float32)) for tree in model.estimators_])
+        expected = np.percentile(per_tree, [100 * q for q in INTERVAL_QUANTILES], axis=0)
+        np.testing.assert_allclose(lower, np.minimum(expected[0], point))
+        np.testing.assert_allclose(upper, np.maximum(expected[1], point))
+
+    def test_boosted_model_uses_quantile_companions(self):
+        model = GradientBoostingRegressor(n_estimators=40, max_depth=3, random_state=0).fit(self.X_selected, self.y)
+        companions = fit_quantile_models(model, self.X_selected, self.y)
+        pipeline = CompiledPipeline(self.scaler, self.selector, model, companions)
+        point, lower, upper = pipeline.predict_intervals_matrix(pipeline.transform(self.df, {}))
+        np.testing.assert_array_equal(point, model.predict(self.X_selected))
+        lo, hi = (companions[q].predict(self.X_selected) for q in INTERVAL_QUANTILES)
+        np.testing.assert_array_equal(lower, np.minimum(lo, point))
+        np.testing.assert_array_equal(upper, np.maximum(hi, point))
+        self.assertTrue(np.all(lower <= point) and np.all(point <= upper))
+
+    def test_stacked_companions_are_walked_in_one_pass(self):
+        model = GradientBoostingRegressor(n_estimators=40, max_depth=3, random_state=0).fit(self.X_selected, self.y)
+        companions = fit_quantile_models(model, self.X_selected, self.y)
+        with patch("backend.ML_training.inference.FLAT_TREE_EVAL", "always"):
+            pipeline = CompiledPipeline(self.scaler, self.selector, model, companions)
+        self.assertEqual(pipeline.interval_flat.n_trees, 3 * 40)
+
+        calls = []
+        original = pipeline.interval_flat.leaf_values
+        pipeline.interval_flat.leaf_values = lambda X: calls.append(len(X)) or original(X)
+        point, lower, upper = pipeline.predict_intervals_matrix(pipeline.transform(self.df, {}))
+        self.assertEqual(calls, [len(self.df)])
+        np.testing.assert_array_equal(point, model.predict(self.X_selected))
+        lo, hi = (companions[q].predict(self.X_selected) for q in INTERVAL_QUANTILES)
+        np.testing.assert_allclose(lower, np.minimum(lo, point))
+        np.testing.assert_allclose(upper, np.maximum(hi, point))
+
+    def test_boosted_model_without_companions_has_no_intervals(self):
+        model = GradientBoostingRegressor(n_estimators=10, random_state=0).fit(self.X_selected, self.y)
+        pipeline = CompiledPipeline(self.scaler, self.selector, model)
+        self.assertFalse(pipeline.supports_intervals)
+        with self.assertRaises(ValueError):
+            pipeline.predict_intervals_matrix(pipeline.transform(self.df, {}))
+
+# /predict/batch?intervals=true against the production 3P model
+class TestIntervalRoutes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+        model, scaler, selector = load_target_artifacts("3P", "backend/ML_training/models/production")
+        names = [str(name) for name in scaler.feature_names_in_]
+        rng = np.random.default_rng(9)
+        df = pd.DataFrame(rng.normal(scaler.mean_, scaler.scale_, size=(60, len(names))), columns=names)
+        cls.columns = {name: df[name].tolist() for name in names}
+        X = CompiledPipeline(scaler, selector, model).transform(df, {})
+        # companions fitted to the model's own output, enough to exercise the route
+        companions = fit_quantile_models(model, X, model.predict(X))
+        cls.bundle = TargetBundle("3P", model, scaler, selector, None, "test", companions)
+
+    def post(self, **params):
+        return self.client.post("/predict/batch", content=orjson.dumps(self.columns), params=params)
+
+    def test_production_models_without_companions_are_rejected(self):
+        response = self.post(targets=["3P"], intervals="true")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("3P", response.json()["detail"])
+
+    def test_batch_rows_with_intervals(self):
+        with patch("backend.ML_training.artifact_registry.get_target_bundles", lambda targets, model_dir: {"3P": self.bundle}):
+            response = self.post(targets=["3P"], intervals="true")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(list(body), ["Predicted_3P", "Predicted_3P_lower", "Predicted_3P_upper"])
+        point = np.array(body["Predicted_3P"])
+        self.assertTrue(np.all(np.array(body["Predicted_3P_lower"]) <= point))
+        self.assertTrue(np.all(point <= np.array(body["Predicted_3P_upper"])))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from backend.ML_training.artifact_registry import (
+    ArtifactRegistry, ARTIFACT_SUFFIXES, MANIFEST_NAME, RELEASES_DIR, resolve_model_dir, list_available_targets
+)
+from backend.services.promote_models import promote_models
+
+PRODUCTION_DIR = "backend/ML_training/models/production"
+
+# Tests for publishing promoted models as releases behind an atomically swapped manifest
+class TestModelRelease(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.staging_dir = os.path.join(self.root, "staging")
+        self.production_dir = os.path.join(self.root, "production")
+        os.makedirs(self.staging_dir)
+        os.makedirs(self.production_dir)
+        # production starts in the flat layout, staging holds a newer 3P version
+        for target in ["3P", "3PA"]:
+            for suffix in ARTIFACT_SUFFIXES:
+                shutil.copy2(os.path.join(PRODUCTION_DIR, f"{target}_{suffix}"), self.production_dir)
+        for suffix in ARTIFACT_SUFFIXES:
+            shutil.copy2(os.path.join(PRODUCTION_DIR, f"3P_{suffix}"), os.path.join(self.staging_dir, f"3P_v3_20250101_1200_{suffix}"))
+        with open(os.path.join(self.staging_dir, "3P_v3_20250101_1200.json"), "w") as meta_file:
+            json.dump({"version": "v3_20250101_1200"}, meta_file)
+        self.registry = ArtifactRegistry()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def promote(self):
+        with patch("backend.services.promote_models.refresh_prediction_store", return_value=True):
+            promote_models(self.staging_dir, self.production_dir, targets=["3P", "3PA"])
+
+    def test_promotion_publishes_a_complete_release(self):
+        self.assertEqual(resolve_model_dir(self.production_dir), self.production_dir)
+        self.promote()
+
+        with open(os.path.join(self.production_dir, MANIFEST_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+        release_dir = os.path.join(self.production_dir, RELEASES_DIR, manifest["release"])
+        self.assertEqual(resolve_model_dir(self.production_dir), release_dir)
+        self.assertEqual(manifest["targets"], ["3P", "3PA"])
+        # 3P comes from staging with its metadata, 3PA is carried over from the flat layout
+        self.assertTrue(os.path.exists(os.path.join(release_dir, "3P.json")))
+        for target in ["3P", "3PA"]:
+            for suffix in ARTIFACT_SUFFIXES:
+                self.assertTrue(os.path.exists(os.path.join(release_dir, f"{target}_{suffix}")))
+        self.assertEqual(list_available_targets(self.production_dir), {"3P", "3PA"})
+        # no half-built release directories are left behind
+        self.assertEqual(os.listdir(os.path.join(self.production_dir, RELEASES_DIR)), [manifest["release"]])
+
+    def test_workers_switch_bundles_without_restart(self):
+        old = self.registry.get("3P", self.production_dir)
+        self.promote()
+        new = self.registry.get("3P", self.production_dir)
+        self.assertIsNot(old, new)
+        self.assertEqual(self.registry.get("3P", self.production_dir), new)
+        # a request still holding the old bundle can finish on it
+        row = pd.DataFrame([{name: 0.0 for name in old.pipeline.feature_names}])
+        self.assertEqual(len(old.pipeline.predict(row, {})), 1)
+
+    def test_interrupted_builds_are_cleaned_up(self):
+        releases_dir = os.path.join(self.production_dir, RELEASES_DIR)
+        stale, running = os.path.join(releases_dir, ".20240101_000000_000000.tmp"), os.path.join(releases_dir, ".running.tmp")
+        os.makedirs(stale)
+        os.makedirs(running)
+        os.utime(stale, (0, 0))
+        # a promotion that fails half way removes its own build directory
+        with patch("backend.services.promote_models.shutil.copy2", side_effect=OSError("disk full")), \
+                self.assertRaises(OSError):
+            self.promote()
+        # an old leftover build goes at the next promotion, a recent one may still be in progress
+        self.promote()
+        names = os.listdir(releases_dir)
+        self.assertNotIn(os.path.basename(stale), names)
+        self.assertIn(os.path.basename(running), names)
+        self.assertEqual(len([name for name in names if name.endswith(".tmp")]), 1)
+
+    def test_store_built_from_another_checkout_is_served(self):
+        from backend.services import prediction_store
+        from backend.services.freshness import get_model_versions
+
+        self.promote()
+        # the same release deployed under another path, with new modification times
+        other_dir = os.path.join(self.root, "other_checkout")
+        shutil.copytree(self.production_dir, other_dir, copy_function=shutil.copy)
+        versions = get_model_versions(["3P", "3PA"], self.production_dir)
+        state = {target: {"target": target, "model_version": version, "data_watermark": "w"}
+                 for target, version in versions.items()}
+        stored = pd.DataFrame({"Player": ["a"], "TEAM": ["GSW"], "Predicted_3P": [1.0], "Predicted_3PA": [2.0]})
+        with patch.object(prediction_store, "read_store_state", return_value=state), \
+                patch.object(prediction_store, "get_data_watermark", return_value="w"), \
+                patch.object(prediction_store, "load_data_from_db", return_value=stored):
+            self.assertIs(prediction_store.load_from_store(["3P", "3PA"], model_dir=other_dir), stored)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import json
+import unittest
+from unittest.mock import patch
+import joblib
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+from backend.ML_training.training_program import train_and_save_models, split_cores
+from Testing.test_utils import TempDirTestCase, small_candidates, synthetic_frame
+
+# Tests that training the (target x model) jobs on a process pool stages the same artifacts as sequentially
+class TestParallelTraining(TempDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        targets = {"3P": {"f0": 1}, "3PA": {"f1": 2, "f2": -1}}
+        cls.df = synthetic_frame(np.random.default_rng(6), 200, 12, targets)
+
+    def train(self, name, candidates=small_candidates, **options):
+        config = {"targets": ["3P", "3PA"], "output_dir": os.path.join(self.root, name), **options}
+        with patch("backend.ML_training.training_program.candidate_models", candidates):
+            summary = train_and_save_models(self.df, config)
+        return os.path.join(self.root, name, "staging"), summary
+
+    # what each staged artifact holds, by target and type (the timestamp in the file names aside). fitted
+    # models are compared by their predictions: sklearn's tree node arrays carry uninitialized padding,
+    # so the pickled bytes differ even between two sequential runs
+    def artifacts(self, staging_dir):
+        probe = np.random.default_rng(7).normal(size=(50, 12))
+        artifacts = {}
+        for fname in os.listdir(staging_dir):
+            target, rest = fname.split("_v1_", 1)
+            kind = rest[len("20250101_1200"):]
+            path = os.path.join(staging_dir, fname)
+            if kind == "_scaler.pkl":
+                scaler = joblib.load(path)
+                artifacts[target, kind] = (scaler.mean_.tolist(), scaler.scale_.tolist())
+            elif kind == "_selector.pkl":
+                selector = joblib.load(path)
+                artifacts[target, kind] = (
+                    selector.get_params()["n_jobs"], selector.support_.tolist(), selector.ranking_.tolist(),
+                    selector.estimator_.predict(selector.transform(probe)).tolist()
+                )
+            elif kind == "_best_model.pkl":
+                model = joblib.load(path)
+                artifacts[target, kind] = (repr(model), model.predict(probe[:, :model.n_features_in_]).tolist())
+            else:
+                with open(path) as f:
+                    data = json.load(f)
+                data.pop("version", None)
+                artifacts[target, kind] = data
+        return artifacts
+
+    def test_parallel_matches_sequential(self):
+        sequential_dir, _ = self.train("sequential", parallel_training=False)
+        parallel_dir, summary = self.train("parallel", parallel_training=True, training_cores=2)
+        self.assertEqual((summary["jobs"], summary["workers"], summary["n_jobs_per_worker"]), (4, 2, 1))
+        self.assertGreater(summary["speedup"], 0)
+        sequential = self.artifacts(sequential_dir)
+        self.assertIn(("3P", "_best_model.pkl"), sequential)
+        self.assertEqual(sequential, self.artifacts(parallel_dir))
+
+    def test_metadata_scores_come_from_the_winning_model(self):
+        def with_weak_last_candidate(config=None):
+            # one shallow stage barely moves off the mean, so it loses and is the last candidate evaluated
+            return {**small_candidates(config), "Weak": GradientBoostingRegressor(n_estimators=1, max_depth=1, random_state=42)}
+
+        def metadata(staging_dir):
+            fname = next(f for f in os.listdir(staging_dir) if f.startswith("3P_") and f.endswith(".json")
+                         and not f.endswith("_stats.json"))
+            with open(os.path.join(staging_dir, fname)) as f:
+                return json.load(f)
+
+        alone, _ = self.train("alone", parallel_training=False)
+        with_weak, _ = self.train("with_weak", with_weak_last_candidate, parallel_training=False)
+        self.assertNotEqual(metadata(with_weak)["model"], "Weak")
+        self.assertEqual(metadata(with_weak)["mae"], metadata(alone)["mae"])
+        self.assertEqual(metadata(with_weak)["r2"], metadata(alone)["r2"])
+
+    def test_split_cores_never_oversubscribes(self):
+        self.assertEqual(split_cores(4, 16), (4, 4))
+        self.assertEqual(split_cores(4, 6), (4, 1))
+        self.assertEqual(split_cores(6, 4), (4, 1))
+        self.assertEqual(split_cores(1, 8), (1, 8))
+        self.assertEqual(split_cores(4, 1), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
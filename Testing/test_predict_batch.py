@@ -0,0 +1,67 @@
+import io
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import orjson
+from fastapi.testclient import TestClient
+from api_server import app
+from backend.ML_training.artifact_registry import get_target_bundle
+from backend.services.serialization import arrow_available, MEDIA_TYPES, ARROW
+
+# Tests for POST /predict/batch with hypothetical feature rows (no database involved)
+class TestPredictBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+        cls.bundle = get_target_bundle("3P", "backend/ML_training/models/production")
+        scaler = cls.bundle.scaler
+        cls.names = [str(name) for name in scaler.feature_names_in_]
+        rng = np.random.default_rng(3)
+        cls.X = rng.normal(scaler.mean_, scaler.scale_, size=(250, len(cls.names)))
+        cls.columns = {name: cls.X[:, i].tolist() for i, name in enumerate(cls.names)}
+
+    def post(self, columns, **kwargs):
+        return self.client.post("/predict/batch", content=orjson.dumps(columns), **kwargs)
+
+    def test_columnar_rows_match_the_pipeline(self):
+        columns = dict(self.columns, Player=[f"p{i}" for i in range(len(self.X))])
+        response = self.post(columns, params={"targets": ["3P"]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(list(body), ["Player", "Predicted_3P"])
+        expected = self.bundle.pipeline.predict(pd.DataFrame(self.X, columns=self.names), {})
+        np.testing.assert_array_equal(np.array(body["Predicted_3P"]), expected)
+
+    def test_missing_and_invalid_columns_are_rejected(self):
+        columns = {name: values[:3] for name, values in self.columns.items() if name != "MP"}
+        columns["FGA"] = ["a", 1.0, 2.0]
+        response = self.post(columns)
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("missing feature columns ['MP']", response.json()["detail"])
+        self.assertIn("'FGA'", response.json()["detail"])
+
+    def test_ragged_columns_and_too_many_rows(self):
+        self.assertEqual(self.post({"MP": [1.0], "FGA": [1.0, 2.0]}).status_code, 422)
+        with patch("backend.routes.predict.PREDICT_BATCH_INPUT_MAX_ROWS", 10):
+            self.assertEqual(self.post(self.columns).status_code, 413)
+
+    @unittest.skipUnless(arrow_available(), "pyarrow is not installed")
+    def test_arrow_in_and_out(self):
+        import pyarrow
+        table = pyarrow.table({name: self.X[:, i] for i, name in enumerate(self.names)})
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        media_type = MEDIA_TYPES[ARROW]
+        response = self.client.post(
+            "/predict/batch", content=sink.getvalue().to_pybytes(),
+            headers={"Content-Type": media_type, "Accept": media_type}
+        )
+        self.assertEqual(response.status_code, 200)
+        result = pyarrow.ipc.open_stream(io.BytesIO(response.content)).read_all()
+        self.assertEqual(result.column_names, ["Predicted_3P", "Predicted_3PA"])
+        self.assertEqual(result.num_rows, len(self.X))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+import os
 import unittest
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from api_server import app
 
@@ -41,6 +43,15 @@ class TestPredictRoute(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("Unsupported targets", response.json()["detail"])
 
+    # the refresh endpoint is closed when no token is configured, and needs the right one otherwise
+    def test_refresh_requires_a_configured_token(self):
+        with patch.dict(os.environ):
+            os.environ.pop("PREDICTION_REFRESH_TOKEN", None)
+            self.assertEqual(self.client.post("/predict/refresh").status_code, 403)
+        with patch.dict(os.environ, {"PREDICTION_REFRESH_TOKEN": "secret"}):
+            response = self.client.post("/predict/refresh", headers={"X-Refresh-Token": "wrong"})
+            self.assertEqual(response.status_code, 401)
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import mysql
+from backend.ML_training.predictions import build_select_query, get_table_columns, forget_table_columns
+
+# Tests that filters and column projection are pushed into the SQL query as bound parameters
+class TestQueryBuilder(unittest.TestCase):
+    def compile(self, query):
+        return query.compile(dialect=mysql.dialect())
+
+    def test_filters_are_bound_parameters(self):
+        compiled = self.compile(build_select_query("current_data_table", team="GSW", season=2023))
+        sql = str(compiled)
+        self.assertIn("`TEAM` = %s", sql)
+        self.assertIn("`Season` = %s", sql)
+        self.assertNotIn("GSW", sql)
+        self.assertEqual(compiled.params["team"], "GSW")
+        self.assertEqual(compiled.params["season"], 2023)
+        self.assertEqual(compiled.params["excluded_player"], "Team Totals")
+
+    def test_projects_requested_columns(self):
+        sql = str(self.compile(build_select_query("current_data_table", columns=["Player", "TEAM", "3P%"])))
+        self.assertTrue(sql.startswith("SELECT `Player`, `TEAM`, `3P%%`"))
+        self.assertNotIn("*", sql)
+
+    def test_unfiltered_query_selects_all_columns(self):
+        sql = str(self.compile(build_select_query("historical_data_table")))
+        self.assertIn("SELECT *", sql)
+        self.assertNotIn("TEAM", sql)
+
+# the cached column names follow the table's data watermark (run against in-memory sqlite)
+class TestTableColumns(unittest.TestCase):
+    def test_columns_are_read_again_when_the_table_is_replaced(self):
+        engine = create_engine("sqlite://")
+        self.addCleanup(forget_table_columns, "scraped")
+        with engine.connect() as conn, patch("backend.ML_training.predictions.get_data_watermark") as watermark:
+            conn.execute(text("CREATE TABLE scraped (Player TEXT, MP REAL)"))
+            watermark.return_value = "2025-01-01T00:00:00"
+            self.assertEqual(get_table_columns(conn, "scraped"), ["Player", "MP"])
+            # the scraper replaces the table with new columns, which moves the watermark
+            conn.execute(text("DROP TABLE scraped"))
+            conn.execute(text("CREATE TABLE scraped (Player TEXT, MP REAL, FGA REAL)"))
+            self.assertEqual(get_table_columns(conn, "scraped"), ["Player", "MP"])
+            watermark.return_value = "2025-01-02T00:00:00"
+            self.assertEqual(get_table_columns(conn, "scraped"), ["Player", "MP", "FGA"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import json
+import unittest
+from unittest.mock import patch
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from backend.ML_training.training_program import train_and_save_models, select_features, prune_selection_cache
+from Testing.test_utils import TempDirTestCase, small_candidates, synthetic_frame
+
+# Tests that RFECV results are reused across retrains on the same data
+class TestSelectionCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.df = synthetic_frame(np.random.default_rng(8), 150, 10, {"3P": {"f0": 2}})
+        self.X = self.df.drop(columns=["3P", "Player"])
+        self.y = self.df["3P"]
+
+    def test_hit_returns_the_same_selection(self):
+        cache_dir = os.path.join(self.root, "cache")
+        first, X_first, miss = select_features(RandomForestRegressor(n_estimators=10, random_state=0), self.X, self.y, cache_dir=cache_dir)
+        model = RandomForestRegressor(n_estimators=10, random_state=0)
+        second, X_second, hit = select_features(model, self.X, self.y, cache_dir=cache_dir)
+        self.assertEqual((miss["hit"], hit["hit"]), (False, True))
+        self.assertGreaterEqual(hit["seconds_saved"], 0)
+        self.assertIs(second.estimator, model)
+        np.testing.assert_array_equal(second.support_, first.support_)
+        np.testing.assert_array_equal(X_second, X_first)
+
+    def test_changed_data_or_params_miss(self):
+        cache_dir = os.path.join(self.root, "cache")
+        select_features(RandomForestRegressor(n_estimators=10, random_state=0), self.X, self.y, cache_dir=cache_dir)
+        _, _, new_rows = select_features(RandomForestRegressor(n_estimators=10, random_state=0), self.X.iloc[:-1], self.y.iloc[:-1], cache_dir=cache_dir)
+        _, _, new_params = select_features(RandomForestRegressor(n_estimators=10, random_state=1), self.X, self.y, cache_dir=cache_dir)
+        self.assertFalse(new_rows["hit"])
+        self.assertFalse(new_params["hit"])
+        self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+    def test_retrain_records_hits_in_metadata(self):
+        df = self.df
+        config = {"targets": ["3P"], "output_dir": self.root, "parallel_training": False}
+        with patch("backend.ML_training.training_program.candidate_models", small_candidates):
+            train_and_save_models(df, config)
+            train_and_save_models(df, config)
+        staging_dir = os.path.join(self.root, "staging")
+        metadata = {}
+        for fname in os.listdir(staging_dir):
+            if fname.endswith(".json") and not fname.endswith("_stats.json"):
+                with open(os.path.join(staging_dir, fname)) as f:
+                    metadata[fname.split("_")[1]] = json.load(f)
+        self.assertEqual({name: cache["hit"] for name, cache in metadata["v1"]["selection_cache"].items()},
+                         {"RandomForest": False, "GradientBoosting": False})
+        self.assertEqual({name: cache["hit"] for name, cache in metadata["v2"]["selection_cache"].items()},
+                         {"RandomForest": True, "GradientBoosting": True})
+        self.assertEqual(metadata["v1"]["r2"], metadata["v2"]["r2"])
+
+        def selector(version):
+            fname = next(f for f in os.listdir(staging_dir) if f.startswith(f"3P_{version}_") and f.endswith("_selector.pkl"))
+            return joblib.load(os.path.join(staging_dir, fname))
+        np.testing.assert_array_equal(selector("v1").support_, selector("v2").support_)
+
+    def test_prune_keeps_the_most_recently_used_entries(self):
+        cache_dir = os.path.join(self.root, "cache")
+        os.makedirs(cache_dir)
+        for i, name in enumerate(["old", "used", "new"]):
+            path = os.path.join(cache_dir, f"{name}.pkl")
+            open(path, "wb").close()
+            os.utime(path, (1000 + i, 1000 + i))
+        # a cache hit touches the entry it read
+        os.utime(os.path.join(cache_dir, "used.pkl"), (2000, 2000))
+        removed = prune_selection_cache(cache_dir, keep=2)
+        self.assertEqual([os.path.basename(path) for path in removed], ["old.pkl"])
+        self.assertEqual(sorted(os.listdir(cache_dir)), ["new.pkl", "used.pkl"])
+
+    def test_training_prunes_the_cache(self):
+        config = {"targets": ["3P"], "output_dir": self.root, "parallel_training": False}
+        with patch("backend.ML_training.training_program.candidate_models", small_candidates), \
+                patch("backend.ML_training.training_program.SELECTION_CACHE_KEEP", 1):
+            train_and_save_models(self.df, config)
+        self.assertEqual(len(os.listdir(os.path.join(self.root, "selection_cache"))), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backend.ML_training.artifact_registry import get_target_bundle
+from types import SimpleNamespace
+from sklearn.preprocessing import StandardScaler
+from backend.ML_training.sensitivity import CurveCache, feature_grid, feature_grids, target_curves
+
+# Tests for per-player sensitivity sweeps on the production 3P model (rows are synthetic, no database)
+class TestSensitivitySweeps(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.bundle = get_target_bundle("3P", "backend/ML_training/models/production")
+        scaler = cls.bundle.scaler
+        cls.names = [str(name) for name in scaler.feature_names_in_]
+        rng = np.random.default_rng(11)
+        cls.base = pd.DataFrame(rng.normal(scaler.mean_, scaler.scale_, size=(15, len(cls.names))), columns=cls.names)
+        cls.players = [(f"p{i}", "GSW") for i in range(len(cls.base))]
+        cls.grids = {feature: feature_grid(scaler, feature, 50) for feature in ["FGA", "MP", "STL"]}
+
+    def setUp(self):
+        # count model calls made through the compiled pipeline
+        self.calls = []
+        pipeline = self.bundle.pipeline
+        original = pipeline.predict_matrix
+        def counting(X):
+            self.calls.append(len(X))
+            return original(X)
+        pipeline.predict_matrix = counting
+        self.addCleanup(delattr, pipeline, "predict_matrix")
+
+    def test_curves_match_single_row_predictions(self):
+        curves = target_curves(self.bundle, self.base, {}, self.players, self.grids, cache=CurveCache())
+        # a whole team, three features and 50 points in one model call
+        self.assertEqual(self.calls, [15 * 3 * 50])
+        self.assertEqual(curves["FGA"].shape, (15, 50))
+        row = self.base.iloc[[4]].copy()
+        row["FGA"] = self.grids["FGA"][17]
+        self.assertEqual(self.bundle.pipeline.predict(row, {})[0], curves["FGA"][4, 17])
+        # STL is dropped by the 3P selector, so its curve is flat
+        self.assertTrue(np.all(curves["STL"] == curves["STL"][:, :1]))
+
+    def test_cached_curves_skip_the_model(self):
+        cache = CurveCache()
+        first = target_curves(self.bundle, self.base, {}, self.players, self.grids, cache=cache)
+        second = target_curves(self.bundle, self.base, {}, self.players, self.grids, cache=cache)
+        self.assertEqual(len(self.calls), 1)
+        np.testing.assert_array_equal(first["MP"], second["MP"])
+
+        # a player whose stats changed is recomputed on its own
+        changed = self.base.copy()
+        changed.loc[0, "PTS"] += 5
+        target_curves(self.bundle, changed, {}, self.players, self.grids, cache=cache)
+        self.assertEqual(self.calls[-1], 3 * 50)
+
+    def test_grid_comes_from_a_target_that_has_the_feature(self):
+        other = StandardScaler().fit(pd.DataFrame({"MP": [10.0, 30.0], "Extra": [1.0, 3.0]}))
+        bundles = {"3P": self.bundle, "Other": SimpleNamespace(scaler=other)}
+        grids = feature_grids(bundles, ["FGA", "Extra"], points=5)
+        np.testing.assert_array_equal(grids["FGA"], feature_grid(self.bundle.scaler, "FGA", 5))
+        # only the second target uses Extra, its scaler gives the grid
+        np.testing.assert_array_equal(grids["Extra"], feature_grid(other, "Extra", 5))
+        with self.assertRaisesRegex(ValueError, "Unknown features"):
+            feature_grids(bundles, ["Nope"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import unittest
+import numpy as np
+import orjson
+import pandas as pd
+from backend.services.serialization import (
+    negotiate_format, encode_records, encode_columnar, encode_ndjson, ArrowStreamEncoder, arrow_available,
+    JSON, NDJSON, COLUMNAR, ARROW
+)
+
+# Tests for /predict content negotiation and the response encoders
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Player": ["Stephen Curry", "Klay Thompson"],
+            "TEAM": ["GSW", "GSW"],
+            "Predicted_3P": [4.8, np.nan]
+        })
+
+    def test_negotiate_format(self):
+        self.assertEqual(negotiate_format(), JSON)
+        self.assertEqual(negotiate_format(accept="application/x-ndjson"), NDJSON)
+        self.assertEqual(negotiate_format(accept="text/html, application/vnd.apache.arrow.stream;q=0.9"), ARROW)
+        # the query parameter wins over the Accept header
+        self.assertEqual(negotiate_format("columnar", "application/x-ndjson"), COLUMNAR)
+        with self.assertRaises(ValueError):
+            negotiate_format("xml")
+
+    def test_json_encoders(self):
+        records = orjson.loads(encode_records(self.df))
+        self.assertEqual(records[0], {"Player": "Stephen Curry", "TEAM": "GSW", "Predicted_3P": 4.8})
+        # NaN predictions are written as null
+        self.assertIsNone(records[1]["Predicted_3P"])
+        self.assertEqual(orjson.loads(encode_columnar(self.df))["TEAM"], ["GSW", "GSW"])
+        lines = encode_ndjson(self.df).splitlines()
+        self.assertEqual([orjson.loads(line) for line in lines], records)
+
+    @unittest.skipUnless(arrow_available(), "pyarrow is not installed")
+    def test_arrow_stream_chunks(self):
+        import pyarrow as pa
+        encoder = ArrowStreamEncoder()
+        body = encoder.encode(self.df.iloc[:1]) + encoder.encode(self.df.iloc[1:]) + encoder.close()
+        table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column("Player").to_pylist(), ["Stephen Curry", "Klay Thompson"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.feature_selection import SelectKBest, f_regression
+from sklearn.ensemble import RandomForestRegressor
+import backend.ML_training.predictions as predictions
+from backend.ML_training.artifact_registry import ArtifactRegistry, list_available_targets, shared_bundle_name
+from backend.services.batching import MicroBatcher
+from backend.services.promote_models import promote_models
+from backend.ML_training.training_program import train_and_save_models
+
+# Tests for one multi-output bundle serving several targets (config multi_output: true)
+class TestSharedModel(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.staging_dir = os.path.join(self.root, "staging")
+        self.production_dir = os.path.join(self.root, "production")
+        os.makedirs(self.staging_dir)
+        os.makedirs(self.production_dir)
+
+        # two correlated targets from the same features, saved the way train_and_save_shared_model does
+        rng = np.random.default_rng(4)
+        columns = [f"f{i}" for i in range(8)]
+        self.df = pd.DataFrame(rng.normal(size=(300, 8)), columns=columns)
+        y = pd.DataFrame({"3P": self.df["f0"] + self.df["f1"], "3PA": 3 * self.df["f0"] + self.df["f2"]})
+        scaler = StandardScaler().fit(self.df)
+        scaled = scaler.transform(self.df)
+        selector = SelectKBest(f_regression, k=5).fit(scaled, y["3PA"])
+        self.model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0).fit(selector.transform(scaled), y)
+        self.expected = self.model.predict(selector.transform(scaled))
+
+        prefix = os.path.join(self.staging_dir, f"{shared_bundle_name(['3P', '3PA'])}_v1_20250101_1200")
+        joblib.dump(self.model, f"{prefix}_best_model.pkl")
+        joblib.dump(scaler, f"{prefix}_scaler.pkl")
+        joblib.dump(selector, f"{prefix}_selector.pkl")
+        with open(f"{prefix}_stats.json", "w") as stats_file:
+            json.dump({"columns": columns, "medians": self.df.median().to_dict()}, stats_file)
+        with open(f"{prefix}.json", "w") as meta_file:
+            json.dump({"targets": ["3P", "3PA"], "version": "v1_20250101_1200"}, meta_file)
+
+        with patch("backend.services.promote_models.refresh_prediction_store", return_value=True):
+            promote_models(self.staging_dir, self.production_dir, targets=["3P", "3PA"], multi_output=True)
+        self.registry = ArtifactRegistry()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_targets_are_served_from_one_bundle(self):
+        self.assertEqual(list_available_targets(self.production_dir), {"3P", "3PA"})
+        bundle_3p = self.registry.get("3P", self.production_dir)
+        bundle_3pa = self.registry.get("3PA", self.production_dir)
+        self.assertIs(bundle_3p.shared, bundle_3pa.shared)
+        self.assertEqual(self.registry.stats()["cached_targets"], ["3P-3PA"])
+        np.testing.assert_array_equal(bundle_3pa.pipeline.predict(self.df, {}), self.expected[:, 1])
+        self.assertFalse(bundle_3p.pipeline.supports_intervals)
+
+    def test_all_targets_predicted_in_one_model_call(self):
+        bundles = {target: self.registry.get(target, self.production_dir) for target in ["3P", "3PA"]}
+        shared = bundles["3P"].shared.pipeline
+        calls = []
+        original = shared.predict_matrix
+        shared.predict_matrix = lambda X: calls.append(len(X)) or original(X)
+        identity = pd.DataFrame({"Player": [f"p{i}" for i in range(len(self.df))]})
+
+        with patch.object(predictions, "get_target_bundles", lambda targets, model_dir: bundles), \
+                patch.object(predictions, "get_target_bundle", lambda target, model_dir, artifact_dir=None: bundles[target]), \
+                patch.object(predictions, "load_prediction_inputs", lambda *args, **kwargs: (identity.copy(), self.df)):
+            results = predictions.predict_all_targets("current", "historical", ["3P", "3PA"], self.production_dir)
+            self.assertEqual(calls, [len(self.df)])
+            np.testing.assert_array_equal(results[["Predicted_3P", "Predicted_3PA"]].to_numpy(), self.expected)
+
+            executor = ThreadPoolExecutor(max_workers=2)
+            self.addCleanup(executor.shutdown)
+            results = asyncio.run(predictions.predict_all_targets_async(
+                "current", "historical", ["3PA", "3P"], self.production_dir,
+                cpu_executor=executor, io_executor=executor, batcher=MicroBatcher(executor)
+            ))
+            self.assertEqual(calls, [len(self.df)] * 2)
+            np.testing.assert_array_equal(results["Predicted_3PA"].to_numpy(), self.expected[:, 1])
+
+    def test_training_returns_the_run_summary(self):
+        df = self.df.assign(**{"3P": self.df["f0"] + self.df["f1"], "3PA": 3 * self.df["f0"] + self.df["f2"], "Player": "player"})
+        config = {"targets": ["3P", "3PA"], "output_dir": self.root, "multi_output": True, "feature_selection": "from_model"}
+        summary = train_and_save_models(df, config)
+        self.assertEqual(set(summary), {"jobs", "workers", "n_jobs_per_worker", "wall_seconds", "job_seconds", "speedup"})
+        self.assertEqual(summary["jobs"], 1)
+        self.assertTrue(any(f.startswith("3P-3PA_v2_") for f in os.listdir(self.staging_dir)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from backend.ML_training.artifact_registry import load_target_artifacts
+from backend.ML_training.tree_eval import FlatEnsemble
+
+# Tests that the flattened evaluator reproduces sklearn's predictions exactly
+class TestFlatEnsemble(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(3)
+        cls.X = rng.normal(size=(700, 20))
+
+    def test_gradient_boosting_production_models(self):
+        for target in ["3P", "3PA"]:
+            model, _, _ = load_target_artifacts(target, "backend/ML_training/models/production")
+            X = self.X[:, :model.n_features_in_]
+            np.testing.assert_array_equal(FlatEnsemble.from_estimator(model).predict(X), model.predict(X))
+
+    def test_random_forest(self):
+        rng = np.random.default_rng(4)
+        X_train = rng.normal(size=(500, 6))
+        y_train = X_train[:, 0] * 3 + X_train[:, 1] ** 2 + rng.normal(size=500)
+        forest = RandomForestRegressor(n_estimators=25, max_depth=8, random_state=42).fit(X_train, y_train)
+        X = self.X[:, :6]
+        np.testing.assert_array_equal(FlatEnsemble.from_estimator(forest).predict(X), forest.predict(X))
+
+    def test_multi_output_random_forest(self):
+        rng = np.random.default_rng(5)
+        X_train = rng.normal(size=(500, 6))
+        y_train = np.column_stack([X_train[:, 0] + rng.normal(size=500), 3 * X_train[:, 0] - X_train[:, 2]])
+        forest = RandomForestRegressor(n_estimators=25, max_depth=8, random_state=42).fit(X_train, y_train)
+        flat = FlatEnsemble.from_estimator(forest)
+        self.assertEqual(flat.n_outputs, 2)
+        np.testing.assert_array_equal(flat.predict(self.X[:, :6]), forest.predict(self.X[:, :6]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,38 @@
 # test_utils.py
 import sys
 import os
+import shutil
+import tempfile
+import unittest
 
 def add_project_root_to_path():
     # Add the project root directory to sys.path for test-time imports.
     root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     if root_dir not in sys.path:
         sys.path.insert(0, root_dir)
+
+# small, fast stand-ins for the candidate models of training_program.candidate_models
+def small_candidates(config=None):
+    from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+    return {
+        "RandomForest": RandomForestRegressor(n_estimators=10, max_depth=4, random_state=42),
+        "GradientBoosting": GradientBoostingRegressor(n_estimators=10, max_depth=3, random_state=42)
+    }
+
+# synthetic training table: normal features f0..f<n_features-1> (mean shift), each target a weighted sum
+# of features plus noise (targets is {name: {feature: weight}}), and the Player column training filters on
+def synthetic_frame(rng, n_rows, n_features, targets, shift=0.0, noise=0.3):
+    import pandas as pd
+    df = pd.DataFrame(rng.normal(loc=shift, size=(n_rows, n_features)), columns=[f"f{i}" for i in range(n_features)])
+    for target, weights in targets.items():
+        df[target] = sum(weight * df[feature] for feature, weight in weights.items()) + rng.normal(scale=noise, size=n_rows)
+    df["Player"] = [f"player {i}" for i in range(n_rows)]
+    return df
+
+# test case with a temporary directory (self.root) removed after every test
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import patch
+from backend.services import warmup
+from backend.ML_training.artifact_registry import registry
+
+MODEL_DIR = "backend/ML_training/models/production"
+
+# Tests for the startup warm-up (the database ping and reference stats are patched)
+class TestWarmup(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+
+    @patch("backend.services.warmup.prediction_snapshot")
+    @patch("backend.ML_training.predictions.load_reference_stats", return_value={"columns": [], "medians": {}})
+    @patch("backend.services.warmup.ping_database", return_value=True)
+    def test_warm_up_loads_every_target(self, ping, reference_stats, snapshot):
+        state = warmup.warm_up(MODEL_DIR)
+        self.assertEqual(state["status"], "done")
+        self.assertEqual(state["targets"], {"3P": "ready", "3PA": "ready"})
+        self.assertTrue(state["models_ready"])
+        self.assertTrue(warmup.is_ready())
+        # bundles are cached, so the first request doesn't load them again
+        self.assertEqual(registry.stats()["cached_targets"], ["3P", "3PA"])
+
+    @patch("backend.services.warmup.ping_database", return_value=False)
+    def test_not_ready_without_database(self, ping):
+        warmup.warm_up(MODEL_DIR)
+        self.assertFalse(warmup.is_ready())
+
+    @patch("backend.services.warmup.list_available_targets", side_effect=OSError("model dir missing"))
+    @patch("backend.services.warmup.ping_database", return_value=True)
+    def test_unexpected_error_marks_warm_up_failed(self, ping, targets):
+        state = warmup.warm_up(MODEL_DIR)
+        self.assertEqual(state["status"], "failed")
+        self.assertIn("warm-up: model dir missing", state["errors"])
+        self.assertFalse(warmup.is_ready())
+
+if __name__ == "__main__":
+    unittest.main()
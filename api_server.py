@@ -1,8 +1,20 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routes import predict, auth_routes
+from backend.services.warmup import warm_up, WARMUP_ON_STARTUP
+from backend.db.engine import get_engine
 
-app = FastAPI()
+# warm-up runs in the background so /ready can answer (with 503) while models load
+@asynccontextmanager
+async def lifespan(app):
+    if WARMUP_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+    yield
+    get_engine().dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",  # React
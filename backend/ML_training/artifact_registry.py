@@ -0,0 +1,292 @@
+import os
+import json
+import hashlib
+import threading
+import time
+import logging
+
+# artifact files that make up one target's bundle
+ARTIFACT_SUFFIXES = ["best_model.pkl", "scaler.pkl", "selector.pkl"]
+# column schema and imputation medians saved at training time (missing for older models)
+STATS_SUFFIX = "stats.json"
+# lower/upper quantile companions of a (Hist)GradientBoosting model, used for prediction intervals (optional)
+QUANTILES_SUFFIX = "quantiles.pkl"
+# targets trained together (config multi_output: true) share one bundle saved under the joined target
+# names, e.g. 3P-3PA_best_model.pkl. each target then has a <target>_output.json alias naming the
+# shared bundle and its column in the model's output
+OUTPUT_SUFFIX = "output.json"
+
+# promoted models live in <model_dir>/releases/<release>/, and <model_dir>/manifest.json names the
+# current release. promotion writes a complete release first and then swaps the manifest with
+# os.replace, so readers see either the old bundle or the new one, never a mix.
+# a model_dir without a manifest is read directly (the flat layout used before releases)
+MANIFEST_NAME = "manifest.json"
+RELEASES_DIR = "releases"
+
+_manifests = {}
+
+# directory holding the current artifacts for model_dir, the manifest is re-read only when it is replaced
+def resolve_model_dir(model_dir):
+    manifest_path = os.path.join(model_dir, MANIFEST_NAME)
+    try:
+        stat = os.stat(manifest_path)
+    except FileNotFoundError:
+        return model_dir
+    identity = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+    cached = _manifests.get(manifest_path)
+    if cached is None or cached[0] != identity:
+        with open(manifest_path, "r") as manifest_file:
+            release = json.load(manifest_file)["release"]
+        cached = (identity, os.path.join(model_dir, RELEASES_DIR, release))
+        _manifests[manifest_path] = cached
+    return cached[1]
+
+# points model_dir at a release that is already fully written to disk
+def write_manifest(model_dir, release, targets):
+    manifest = {"release": release, "targets": sorted(targets), "published_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    tmp_path = os.path.join(model_dir, f".{MANIFEST_NAME}.tmp")
+    with open(tmp_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(tmp_path, os.path.join(model_dir, MANIFEST_NAME))
+
+# name of the shared bundle for targets trained together
+def shared_bundle_name(targets):
+    return "-".join(targets)
+
+_output_aliases = {}
+
+# {"bundle": name, "output": index} when target is served by a shared bundle in artifact_dir, else None
+def shared_output(target, artifact_dir):
+    path = os.path.join(artifact_dir, f"{target}_{OUTPUT_SUFFIX}")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _output_aliases.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r") as alias_file:
+            cached = (mtime, json.load(alias_file))
+        _output_aliases[path] = cached
+    return cached[1]
+
+def write_output_alias(artifact_dir, target, bundle, output):
+    with open(os.path.join(artifact_dir, f"{target}_{OUTPUT_SUFFIX}"), "w") as alias_file:
+        json.dump({"bundle": bundle, "output": output}, alias_file, indent=4)
+
+# holds the loaded artifacts for a single target, or for several targets predicted by one multi-output model
+class TargetBundle:
+    # set on the per-target views of a shared bundle
+    shared = None
+    output = None
+
+    def __init__(self, target, model, scaler, selector, stats, fingerprint, quantile_models=None):
+        self.target = target
+        self.model = model
+        self.scaler = scaler
+        self.selector = selector
+        self.stats = stats
+        self.fingerprint = fingerprint
+        # fused scale/select/predict path built once per load
+        # the inference stack (numpy, sklearn) is only imported once a bundle is actually loaded
+        from backend.ML_training.inference import CompiledPipeline
+        self.pipeline = CompiledPipeline(scaler, selector, model, quantile_models)
+        self._views = {}
+
+    # the bundle as seen by one of its targets: same artifacts, predictions are that target's output column
+    def output_view(self, target, output):
+        view = self._views.get(target)
+        if view is None or view.output != output:
+            view = TargetOutput(target, self, output)
+            self._views[target] = view
+        return view
+
+# one target of a shared bundle, used wherever a single target's bundle is expected.
+# callers predicting several targets group them by .shared so the model runs once for all of them
+class TargetOutput:
+    def __init__(self, target, shared, output):
+        from backend.ML_training.inference import OutputPipeline
+
+        self.target = target
+        self.shared = shared
+        self.output = output
+        self.model = shared.model
+        self.scaler = shared.scaler
+        self.selector = shared.selector
+        self.stats = shared.stats
+        self.fingerprint = shared.fingerprint
+        self.pipeline = OutputPipeline(shared.pipeline, output)
+
+# process-wide cache of target bundles, reloaded only when the files on disk change
+class ArtifactRegistry:
+    def __init__(self):
+        self._bundles = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds = 0.0
+
+    # identity of the files on disk (directory, mtime + size), changes when a model is promoted
+    def fingerprint(self, target, model_dir):
+        identity = [os.path.abspath(model_dir)]
+        for suffix in ARTIFACT_SUFFIXES:
+            stat = os.stat(os.path.join(model_dir, f"{target}_{suffix}"))
+            identity.append((stat.st_mtime_ns, stat.st_size))
+        for suffix in [STATS_SUFFIX, QUANTILES_SUFFIX]:
+            path = os.path.join(model_dir, f"{target}_{suffix}")
+            if os.path.exists(path):
+                stat = os.stat(path)
+                identity.append((suffix, stat.st_mtime_ns, stat.st_size))
+        return tuple(identity)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    # returns the cached bundle for a target, loading it on first use or after the files change.
+    # artifact_dir is model_dir already resolved to its current release, callers loading several
+    # targets resolve once so they all come from the same release.
+    # a replaced bundle is only dropped from the cache, requests holding it finish on it
+    def get(self, target, model_dir="models", artifact_dir=None):
+        key = (os.path.abspath(model_dir), target)
+        artifact_dir = artifact_dir or resolve_model_dir(model_dir)
+        alias = shared_output(target, artifact_dir)
+        if alias is not None:
+            return self.get(alias["bundle"], model_dir, artifact_dir).output_view(target, alias["output"])
+        fingerprint = self.fingerprint(target, artifact_dir)
+
+        bundle = self._bundles.get(key)
+        if bundle is not None and bundle.fingerprint == fingerprint:
+            with self._lock:
+                self.hits += 1
+            return bundle
+
+        # only one thread loads a given target, the others wait and reuse its result
+        with self._key_lock(key):
+            bundle = self._bundles.get(key)
+            if bundle is not None and bundle.fingerprint == fingerprint:
+                with self._lock:
+                    self.hits += 1
+                return bundle
+
+            start = time.perf_counter()
+            model, scaler, selector = load_target_artifacts(target, artifact_dir)
+            stats = load_target_stats(target, artifact_dir)
+            quantile_models = load_quantile_models(target, artifact_dir)
+            elapsed = time.perf_counter() - start
+            bundle = TargetBundle(target, model, scaler, selector, stats, fingerprint, quantile_models)
+            self._bundles[key] = bundle
+
+            with self._lock:
+                self.misses += 1
+                self.load_seconds += elapsed
+            logging.info(f"Loaded artifacts for target '{target}' from {artifact_dir} in {elapsed:.3f}s")
+            return bundle
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "load_seconds": round(self.load_seconds, 4),
+                "cached_targets": sorted(target for _, target in self._bundles),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._bundles.clear()
+            self.hits = 0
+            self.misses = 0
+            self.load_seconds = 0.0
+
+# load model, scaler, and selector artifacts from disk
+def load_target_artifacts(target, model_dir="models"):
+    import joblib
+    model = joblib.load(os.path.join(model_dir, f"{target}_best_model.pkl"))
+    scaler = joblib.load(os.path.join(model_dir, f"{target}_scaler.pkl"))
+    selector = joblib.load(os.path.join(model_dir, f"{target}_selector.pkl"))
+    return model, scaler, selector
+
+# load the saved column schema and medians, returns None when the model predates them
+def load_target_stats(target, model_dir="models"):
+    stats_path = os.path.join(model_dir, f"{target}_{STATS_SUFFIX}")
+    if not os.path.exists(stats_path):
+        return None
+    with open(stats_path, "r") as stats_file:
+        return json.load(stats_file)
+
+# {quantile: model} companions saved next to a boosted model, None when there are none
+def load_quantile_models(target, model_dir="models"):
+    path = os.path.join(model_dir, f"{target}_{QUANTILES_SUFFIX}")
+    if not os.path.exists(path):
+        return None
+    import joblib
+    return joblib.load(path)
+
+registry = ArtifactRegistry()
+
+_available = {}
+
+# targets with a model in the current release, re-listed only when the directory itself changes.
+# targets of a shared bundle are listed through their aliases, not under the bundle's name
+def list_available_targets(model_dir="models"):
+    model_dir = resolve_model_dir(model_dir)
+    key = os.path.abspath(model_dir)
+    mtime = os.stat(model_dir).st_mtime_ns
+    cached = _available.get(key)
+    if cached is None or cached[0] != mtime:
+        files = os.listdir(model_dir)
+        aliased = {f[:-len(OUTPUT_SUFFIX) - 1] for f in files if f.endswith(f"_{OUTPUT_SUFFIX}")}
+        shared = {shared_output(target, model_dir)["bundle"] for target in aliased}
+        targets = ({f.split("_")[0] for f in files if f.endswith("_best_model.pkl")} - shared) | aliased
+        cached = (mtime, targets)
+        _available[key] = cached
+    return cached[1]
+
+_content_hashes = {}
+
+# sha1 of a bundle's artifact files, read again only when the files' identity (registry.fingerprint) changes
+def artifact_content_hash(target, model_dir):
+    key = (os.path.abspath(model_dir), target)
+    identity = registry.fingerprint(target, model_dir)
+    cached = _content_hashes.get(key)
+    if cached is None or cached[0] != identity:
+        digest = hashlib.sha1()
+        for suffix in ARTIFACT_SUFFIXES + [STATS_SUFFIX, QUANTILES_SUFFIX]:
+            path = os.path.join(model_dir, f"{target}_{suffix}")
+            if not os.path.exists(path):
+                continue
+            digest.update(suffix.encode())
+            with open(path, "rb") as artifact_file:
+                for block in iter(lambda: artifact_file.read(1 << 20), b""):
+                    digest.update(block)
+        cached = (identity, digest.hexdigest()[:12])
+        _content_hashes[key] = cached
+    return cached[1]
+
+# version of the production model for a target without loading it: the promoted metadata version, or a
+# hash of the artifact files' content for models without one. it goes into ETags and the prediction store
+# state, so it doesn't depend on the path or modification times (same models, same version on every host)
+def get_model_version(target, model_dir="models"):
+    model_dir = resolve_model_dir(model_dir)
+    alias = shared_output(target, model_dir)
+    if alias is not None:
+        target = alias["bundle"]
+    meta_path = os.path.join(model_dir, f"{target}.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as meta_file:
+            version = json.load(meta_file).get("version")
+        if version:
+            return version
+    return artifact_content_hash(target, model_dir)
+
+# shortcut used by the prediction pipeline
+def get_target_bundle(target, model_dir="models", artifact_dir=None):
+    return registry.get(target, model_dir, artifact_dir)
+
+# bundles for several targets, all taken from the same release
+def get_target_bundles(targets, model_dir="models"):
+    artifact_dir = resolve_model_dir(model_dir)
+    return {target: registry.get(target, model_dir, artifact_dir) for target in targets}
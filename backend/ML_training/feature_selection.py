@@ -0,0 +1,78 @@
+# Feature-selection strategies that are cheaper than a full RFECV (config feature_selection).
+# RFECV refits the candidate model for every elimination step and fold; these score the features once
+# and keep a fixed mask:
+#   "from_model"   one fit of the model, keeps features with at least the mean feature_importances_
+#   "permutation"  one fit on part of the training rows, keeps features whose permutation importance
+#                  on the held-out rest is positive
+#   "mi_rfecv"     mutual information prefilter keeping MI_KEEP of the features, then RFECV on those
+# The result is saved as a MaskSelector, which inference uses like the RFECV selector (get_support / transform).
+
+import numpy as np
+from sklearn.base import BaseEstimator, clone
+from sklearn.feature_selection import SelectorMixin, mutual_info_regression
+from sklearn.inspection import permutation_importance
+from sklearn.model_selection import train_test_split
+from sklearn.utils.validation import validate_data
+
+STRATEGIES = ["rfecv", "from_model", "permutation", "mi_rfecv"]
+# share of the features the mutual information prefilter hands to RFECV
+MI_KEEP = 0.5
+# held-out share of the training rows for permutation importance
+PERMUTATION_HOLDOUT = 0.25
+PERMUTATION_REPEATS = 5
+
+# selector with a fixed support mask chosen by one of the strategies, scores_ are what it ranked by
+class MaskSelector(SelectorMixin, BaseEstimator):
+    def __init__(self, support=None, scores=None, strategy=None):
+        self.support = support
+        self.scores = scores
+        self.strategy = strategy
+
+    def fit(self, X, y=None):
+        validate_data(self, X, reset=True)
+        self.support_ = np.asarray(self.support, dtype=bool)
+        self.scores_ = None if self.scores is None else np.asarray(self.scores, dtype=np.float64)
+        if len(self.support_) != self.n_features_in_:
+            raise ValueError(f"Support has {len(self.support_)} entries for {self.n_features_in_} features")
+        return self
+
+    def _get_support_mask(self):
+        return self.support_
+
+# the features scoring above threshold, or the min_features best ones if fewer pass
+def keep_top(scores, threshold, min_features):
+    support = scores > threshold
+    if support.sum() < min_features:
+        support = np.zeros(len(scores), dtype=bool)
+        support[np.argsort(-scores, kind="stable")[:min_features]] = True
+    return support
+
+def from_model_selection(model, X, y, min_features):
+    scores = clone(model).fit(X, y).feature_importances_
+    # SelectFromModel's default rule for tree ensembles, at least the mean importance (with float slack)
+    support = keep_top(scores, scores.mean() - 1e-12, min_features)
+    return MaskSelector(support, scores, "from_model").fit(X, y)
+
+def permutation_selection(model, X, y, min_features, n_jobs=None):
+    X_fit, X_holdout, y_fit, y_holdout = train_test_split(X, y, test_size=PERMUTATION_HOLDOUT, random_state=42)
+    fitted = clone(model).fit(X_fit, y_fit)
+    result = permutation_importance(
+        fitted, X_holdout, y_holdout, scoring="r2", n_repeats=PERMUTATION_REPEATS, random_state=42, n_jobs=n_jobs
+    )
+    # shuffling a feature the model relies on lowers the held-out r2, the rest are noise
+    support = keep_top(result.importances_mean, 0.0, min_features)
+    return MaskSelector(support, result.importances_mean, "permutation").fit(X, y)
+
+# mask of the MI_KEEP share of features with the most mutual information with the target
+def mutual_info_prefilter(X, y, min_features):
+    scores = mutual_info_regression(X, y, random_state=42)
+    keep = max(min_features, int(np.ceil(len(scores) * MI_KEEP)))
+    support = np.zeros(len(scores), dtype=bool)
+    support[np.argsort(-scores, kind="stable")[:keep]] = True
+    return support, scores
+
+# the prefilter mask narrowed down by the support of the RFECV fitted on the prefiltered columns
+def combine_masks(prefilter, selector, X, y, scores):
+    support = prefilter.copy()
+    support[prefilter] = selector.get_support()
+    return MaskSelector(support, scores, "mi_rfecv").fit(X, y)
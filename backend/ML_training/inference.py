@@ -0,0 +1,143 @@
+import os
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from backend.ML_training.tree_eval import FlatEnsemble, ROW_CHUNK
+
+# when to use the flattened tree evaluator: "auto" (RandomForest batches up to FLAT_TREE_MAX_ROWS,
+# where it beats sklearn's per-tree loop), "always" (any supported ensemble) or "never"
+FLAT_TREE_EVAL = os.getenv("FLAT_TREE_EVAL", "auto")
+FLAT_TREE_MAX_ROWS = int(os.getenv("FLAT_TREE_MAX_ROWS", "2048"))
+
+# quantiles of the interval returned with ?intervals=true (an 80% range). boosted models get
+# quantile companions trained at these levels, RandomForest models take them across their trees
+INTERVAL_QUANTILES = (0.1, 0.9)
+
+# per-target inference pipeline compiled from the saved scaler, selector and model.
+# instead of scaling every column and letting the selector throw most of them away, it gathers
+# only the selected columns (aligning and imputing on the way), applies the matching mean/scale
+# slices in place and hands one C-contiguous float64 array to the estimator.
+# the arithmetic is the same as scaler.transform -> selector.transform, so outputs match exactly.
+class CompiledPipeline:
+    def __init__(self, scaler, selector, model, quantile_models=None):
+        support = selector.get_support()
+        self.feature_names = [str(name) for name in np.asarray(scaler.feature_names_in_)[support]]
+        self.mean = scaler.mean_[support] if scaler.with_mean else None
+        self.scale = scaler.scale_[support] if scaler.with_std else None
+        self.model = model
+        self.flat = None
+        if FLAT_TREE_EVAL == "always" or (FLAT_TREE_EVAL == "auto" and isinstance(model, RandomForestRegressor)):
+            try:
+                self.flat = FlatEnsemble.from_estimator(model)
+            except ValueError:
+                self.flat = None
+        self.interval_models = None
+        self.interval_flat, self.interval_members, self.interval_groups = None, None, None
+        self._compile_intervals(quantile_models)
+
+    # where intervals come from: a forest's own trees give the spread (read in the same flat walk as its
+    # prediction), a boosted model needs its lower/upper quantile companions. sklearn's compiled predict
+    # beats one NumPy walk over the stacked model + companions for boosted trees (benchmarks/bench_intervals.py),
+    # so the stacked evaluator is only built with FLAT_TREE_EVAL=always
+    def _compile_intervals(self, quantile_models):
+        try:
+            if isinstance(self.model, RandomForestRegressor):
+                flat = self.flat or FlatEnsemble.from_estimator(self.model)
+                # a multi-output forest (shared bundle) has no per-target intervals
+                self.interval_flat = flat if flat.n_outputs == 1 else None
+            elif quantile_models:
+                self.interval_models = [self.model, quantile_models[min(quantile_models)], quantile_models[max(quantile_models)]]
+                if FLAT_TREE_EVAL == "always":
+                    self.interval_members = [FlatEnsemble.from_estimator(model) for model in self.interval_models]
+                    self.interval_flat, self.interval_groups = FlatEnsemble.stack(self.interval_members)
+        except ValueError:
+            self.interval_flat, self.interval_members, self.interval_groups = None, None, None
+
+    @property
+    def supports_intervals(self):
+        return self.interval_flat is not None or self.interval_models is not None
+
+    # builds the scaled, selected feature matrix from raw rows.
+    # columns follow the training order, missing columns become 0 and missing values take the training median
+    def transform(self, new_df, medians):
+        columns = {
+            col: new_df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            for col in self.feature_names if col in new_df.columns
+        }
+        return self.transform_columns(columns, len(new_df), medians)
+
+    # same as transform for a dict of float64 arrays (what /predict/batch receives), no DataFrame needed
+    def transform_columns(self, columns, n_rows, medians):
+        X = np.empty((n_rows, len(self.feature_names)), dtype=np.float64, order="C")
+        for i, col in enumerate(self.feature_names):
+            if col not in columns:
+                X[:, i] = 0
+                continue
+            X[:, i] = columns[col]
+            if col in medians:
+                column = X[:, i]
+                column[np.isnan(column)] = medians[col]
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        return X
+
+    # runs the estimator on an already transformed matrix
+    def predict_matrix(self, X):
+        if self.flat is not None and (FLAT_TREE_EVAL == "always" or len(X) <= FLAT_TREE_MAX_ROWS):
+            return self.flat.predict(X)
+        return self.model.predict(X)
+
+    def predict(self, new_df, medians):
+        return self.predict_matrix(self.transform(new_df, medians))
+
+    # (point, lower, upper) for a transformed matrix, the flattened trees are walked once for all three.
+    # the point estimate equals predict_matrix; bounds are widened to contain it when quantiles cross
+    def predict_intervals_matrix(self, X):
+        if not self.supports_intervals:
+            raise ValueError(f"{type(self.model).__name__} model has no prediction intervals")
+        if self.interval_flat is None:
+            point, lower, upper = (model.predict(X) for model in self.interval_models)
+            return point, np.minimum(lower, point), np.maximum(upper, point)
+        point, lower, upper = (np.empty(len(X)) for _ in range(3))
+        # row chunks keep the (trees x rows) leaf array bounded for large batches
+        for start in range(0, len(X), ROW_CHUNK):
+            rows = slice(start, start + ROW_CHUNK)
+            leaves = self.interval_flat.leaf_values(X[rows])
+            if self.interval_groups is None:
+                point[rows] = self.interval_flat.combine_leaves(leaves)
+                lower[rows], upper[rows] = np.percentile(leaves, [100 * q for q in INTERVAL_QUANTILES], axis=0)
+            else:
+                point[rows], lower[rows], upper[rows] = [
+                    member.combine_leaves(leaves[trees]) for member, trees in zip(self.interval_members, self.interval_groups)
+                ]
+        return point, np.minimum(lower, point), np.maximum(upper, point)
+
+# one output column of a multi-output pipeline (a target of a shared bundle), for code that predicts a single target.
+# predicting several targets of the same bundle should use the shared pipeline once and split its columns
+class OutputPipeline:
+    def __init__(self, pipeline, output):
+        self.shared = pipeline
+        self.output = output
+        self.feature_names = pipeline.feature_names
+        self.mean = pipeline.mean
+        self.scale = pipeline.scale
+
+    @property
+    def supports_intervals(self):
+        return False
+
+    def transform(self, new_df, medians):
+        return self.shared.transform(new_df, medians)
+
+    def transform_columns(self, columns, n_rows, medians):
+        return self.shared.transform_columns(columns, n_rows, medians)
+
+    def predict_matrix(self, X):
+        return self.shared.predict_matrix(X)[:, self.output]
+
+    def predict(self, new_df, medians):
+        return self.predict_matrix(self.transform(new_df, medians))
+
+    def predict_intervals_matrix(self, X):
+        raise ValueError("Multi-output models have no prediction intervals")
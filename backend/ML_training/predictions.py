@@ -1,109 +1,305 @@
 import os
-import joblib
+import asyncio
+from functools import partial
 import pandas as pd
 import numpy as np
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler
-from sqlalchemy import create_engine
-import urllib
+from sqlalchemy import inspect, select, table, column, literal_column, bindparam
 import logging
 from dotenv import load_dotenv
 import yaml
+from backend.db.engine import connect, get_stream_engine
+from backend.services.freshness import get_data_watermark
+from backend.ML_training.artifact_registry import (
+    get_target_bundle, get_target_bundles, resolve_model_dir
+)
 
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
 load_dotenv()
 
-# load model, scaler, and selector artifacts
-def load_target_artifacts(target, model_dir="models"):
-    model = joblib.load(os.path.join(model_dir, f"{target}_best_model.pkl"))
-    scaler = joblib.load(os.path.join(model_dir, f"{target}_scaler.pkl"))
-    selector = joblib.load(os.path.join(model_dir, f"{target}_selector.pkl"))
-    return model, scaler, selector
-
-# preprocesses new input data using structure of reference data
-def preprocess_new_data(new_df, reference_df):
-    imputer = SimpleImputer(strategy='median')
-
-    # verifies all columns in reference data exist in new data.
-    # adds 0 value to missing columns
-    for col in reference_df.columns:
-        if col not in new_df.columns:
-            new_df[col] = 0
-
-    # reorders columns to match both df
-    new_df = new_df[reference_df.columns]
-    # apply imputation on numeric columns (filling in missing data)
-    new_df[new_df.select_dtypes(include=np.number).columns] = imputer.fit(reference_df).transform(new_df.select_dtypes(include=np.number))
-    return new_df
-
-# loads from database table with optional features for team and season
-def load_data_from_db(table_name, team=None, season=None): # can add more filters (player_name=None, min_minutes=None.. etc)
-    DB_USER = os.getenv("DB_USER")
-    DB_PASS = urllib.parse.quote_plus(os.getenv("DB_PASS"))
-    DB_HOST = os.getenv("DB_HOST")
-    DB_NAME = os.getenv("DB_NAME")
-    # SSL_CERT = os.getenv("RDS_SSL_CERT")
-
-    DB_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
-    engine = create_engine(DB_URL)
-    # build query with the optional filters
-    with engine.connect() as conn:
-        query = f"SELECT * FROM {table_name} WHERE Player != 'Team Totals'"
-        if team:
-            query += f" AND TEAM = '{team}'"
-        if season:
-            query += f" AND Season = {season}"
-        # if player_name:
-            # query += f" AND player = '{player_name}'"
-        df = pd.read_sql(f"SELECT * FROM {table_name}", conn)
+# builds imputation stats from the reference table, only used for models trained before stats were saved
+_reference_stats = {}
+def load_reference_stats(reference_table, targets):
+    key = (reference_table, tuple(targets))
+    if key not in _reference_stats:
+        logging.warning(f"No saved imputation stats found, computing them from {reference_table}")
+        ref_df = load_data_from_db(reference_table)
+        # clean reference data
+        ref_df = ref_df[ref_df["Player"] != "Team Totals"].copy()
+        ref_df.drop(columns=["Awards", "Pos", "Age", "Rk", "Player", "TEAM"], inplace=True, errors='ignore')
+        ref_df.drop(columns=targets, inplace=True, errors='ignore')
+        _reference_stats[key] = {
+            "columns": list(ref_df.columns),
+            "medians": ref_df.median(numeric_only=True).to_dict()
+        }
+    return _reference_stats[key]
+
+# identity columns returned alongside the predictions
+IDENTITY_COLUMNS = ["Player", "TEAM"]
+# season is stored as "Season" or, in tables written by the scraper, "YR"
+SEASON_COLUMNS = ["Season", "YR"]
+
+# column names of each table, read again when the table's data watermark moves
+# (the scraper replaces current_data_table, possibly with other columns)
+_table_columns = {}
+def get_table_columns(conn, table_name):
+    try:
+        watermark = get_data_watermark(table_name, conn)
+    except Exception as e:
+        logging.debug(f"Could not read the data watermark for {table_name}: {e}")
+        watermark = None
+    cached = _table_columns.get(table_name)
+    if cached is None or cached[0] != watermark:
+        cached = (watermark, [col["name"] for col in inspect(conn).get_columns(table_name)])
+        _table_columns[table_name] = cached
+    return cached[1]
+
+# builds a parameterized SELECT with the optional filters and column projection
+def build_select_query(table_name, columns=None, player=None, team=None, season=None, season_column="Season"):
+    if columns:
+        query = select(*[column(col) for col in columns]).select_from(table(table_name))
+    else:
+        query = select(literal_column("*")).select_from(table(table_name))
+    query = query.where(column("Player") != bindparam("excluded_player", "Team Totals"))
+    if player:
+        query = query.where(column("Player") == bindparam("player", player))
+    if team:
+        query = query.where(column("TEAM") == bindparam("team", team))
+    if season:
+        query = query.where(column(season_column) == bindparam("season", season))
+    return query
+
+# drops the cached column names of a table after it has been rebuilt
+def forget_table_columns(table_name):
+    _table_columns.pop(table_name, None)
+
+# resolves the season column and projected columns against the table, then builds the query
+def _prepare_query(conn, table_name, team=None, season=None, player=None, columns=None):
+    available = get_table_columns(conn, table_name)
+    season_column = next((col for col in SEASON_COLUMNS if col in available), "Season")
+    if columns:
+        columns = [col for col in dict.fromkeys(columns) if col in available]
+    # filters are applied in the database instead of after pulling the whole table
+    return build_select_query(table_name, columns, player=player, team=team, season=season, season_column=season_column)
+
+# loads from database table with optional filters for player, team and season.
+# when columns are given only those that exist in the table are selected
+def load_data_from_db(table_name, team=None, season=None, player=None, columns=None):
+    # connections come from the shared pool instead of a new engine per call
+    with connect() as conn:
+        query = _prepare_query(conn, table_name, team=team, season=season, player=player, columns=columns)
+        df = pd.read_sql(query, conn)
     return df
 
-# run predictions for all specified target columns
-def predict_all_targets(new_table, reference_table, targets, model_dir="models", team=None, season=None):
-    logging.info("Loading data from database")
-    # load new and reference datasets
-    new_df = load_data_from_db(new_table, team=team, season=season)
-    ref_df = load_data_from_db(reference_table)
-    # clean reference data
-    ref_df = ref_df[ref_df["Player"] != "Team Totals"].copy()
-    ref_df.drop(columns=["Awards", "Pos", "Age", "Rk", "Player", "TEAM"], inplace=True, errors='ignore')
-    ref_df.drop(columns=targets, inplace=True, errors='ignore')
+# same as load_data_from_db but yields DataFrames of at most chunk_size rows
+def iter_data_from_db(table_name, chunk_size, team=None, season=None, player=None, columns=None):
+    with connect(get_stream_engine()) as conn:
+        query = _prepare_query(conn, table_name, team=team, season=season, player=player, columns=columns)
+        # server-side cursor (the stream engine's PyMySQL SSCursor), rows are fetched chunk by chunk
+        # instead of the whole result being buffered first
+        streaming = conn.execution_options(stream_results=True)
+        for chunk in pd.read_sql(query, streaming, chunksize=chunk_size):
+            yield chunk
+
+# columns to pull for prediction: identity columns plus the features the scalers were fitted on
+def prediction_input_columns(bundles, include_season=False):
+    feature_columns = [col for bundle in bundles.values() for col in bundle.scaler.feature_names_in_]
+    return IDENTITY_COLUMNS + (SEASON_COLUMNS if include_season else []) + feature_columns
+
+# splits loaded rows into the identity columns of the results and the feature columns
+def split_prediction_inputs(new_df, targets, include_season=False):
     # save player/team info separately before dropping
     # drops non-numerical data since these are not used as features for prediction
-    player_names = new_df.get("Player")
-    team_names = new_df.get("TEAM")
-    new_df.drop(columns=["Awards", "Pos", "Age", "Rk", "Player", "TEAM"] + targets, inplace=True, errors='ignore')
-    # align and preprocess new data to match reference data
-    new_df = preprocess_new_data(new_df, ref_df)
-
-    # creates a results dataframe
-    results = pd.DataFrame()
-    if player_names is not None:
-        results["Player"] = player_names
-    if team_names is not None:
-        results["TEAM"] = team_names
-    # run prediction for each target value
-    for target in targets:
-        logging.info(f"Predicting target: {target}")
-        model, scaler, selector = load_target_artifacts(target, model_dir)
-
-        expected_columns = scaler.feature_names_in_
-        new_df_aligned = new_df[expected_columns]
-        # scale and transform features before prediction
-        scaled = scaler.transform(new_df_aligned)
-        selected = selector.transform(scaled)
-        preds = model.predict(selected)
-        """
-        Scaling - adjusts all feature values to a standard scale (e.g., mean = 0, std = 1)
-            helps models treat all features equally
-        Transforming - using RFECV means applying feature selection - keeping only the best predictors based on training performance
-        """
-
-        results[f"Predicted_{target}"] = preds
+    results = pd.DataFrame(index=new_df.index)
+    if "Player" in new_df.columns:
+        results["Player"] = new_df["Player"]
+    if "TEAM" in new_df.columns:
+        results["TEAM"] = new_df["TEAM"]
+    season_values = next((new_df[col] for col in SEASON_COLUMNS if col in new_df.columns), None)
+    if include_season and season_values is not None:
+        results["Season"] = season_values
+    new_df = new_df.drop(columns=["Awards", "Pos", "Age", "Rk", "Player", "TEAM"] + targets, errors='ignore')
+    return results, new_df
+
+# loads the rows to predict and splits them into identity columns and feature columns
+def load_prediction_inputs(new_table, bundles, targets, team=None, season=None, include_season=False, player=None):
+    logging.info("Loading data from database")
+    new_df = load_data_from_db(
+        new_table, team=team, season=season, player=player, columns=prediction_input_columns(bundles, include_season)
+    )
+    return split_prediction_inputs(new_df, targets, include_season)
+
+# runs the scale -> select -> predict steps for a single target
+def predict_target(bundle, new_df, stats):
+    """
+    Scaling - adjusts all feature values to a standard scale (e.g., mean = 0, std = 1)
+        helps models treat all features equally
+    Transforming - using RFECV means applying feature selection - keeping only the best predictors based on training performance
+    The compiled pipeline does both in one pass over only the columns the selector keeps
+    """
+    return bundle.pipeline.predict(new_df, stats["medians"])
+
+# result columns for one target: Predicted_<target>, plus Predicted_<target>_lower / _upper with intervals.
+# the bounds come from the same tree walk as the point estimate (see CompiledPipeline.predict_intervals_matrix)
+def predict_target_columns(bundle, new_df, stats, intervals=False):
+    if not intervals:
+        return {f"Predicted_{bundle.target}": predict_target(bundle, new_df, stats)}
+    X = bundle.pipeline.transform(new_df, stats["medians"])
+    return interval_columns(bundle.target, bundle.pipeline.predict_intervals_matrix(X))
+
+def interval_columns(target, bounds):
+    point, lower, upper = bounds
+    return {f"Predicted_{target}": point, f"Predicted_{target}_lower": lower, f"Predicted_{target}_upper": upper}
+
+# target bundles grouped by the model that predicts them: the targets of a shared multi-output bundle
+# form one group, every other target is a group of its own
+def group_bundles(bundles):
+    groups = {}
+    for bundle in bundles.values():
+        groups.setdefault(id(bundle.shared or bundle), []).append(bundle)
+    return list(groups.values())
+
+# pipeline that runs once for a group of targets
+def group_pipeline(members):
+    return (members[0].shared or members[0]).pipeline
+
+# a group's prediction columns from its model's output, a shared bundle has one output column per target
+def group_columns(members, predictions):
+    if members[0].shared is None:
+        return {f"Predicted_{members[0].target}": predictions}
+    return {f"Predicted_{bundle.target}": predictions[:, bundle.output] for bundle in members}
+
+# result columns for a group of targets, one feature pass and one model call for all targets of a shared bundle.
+# intervals are per target (shared bundles have none, their pipelines raise ValueError)
+def predict_group_columns(members, new_df, stats, intervals=False):
+    if intervals:
+        return {name: values for bundle in members
+                for name, values in predict_target_columns(bundle, new_df, stats, intervals).items()}
+    return group_columns(members, group_pipeline(members).predict(new_df, stats["medians"]))
+
+# targets whose models can't produce intervals (GradientBoosting trained before quantile companions were saved)
+def targets_without_intervals(bundles):
+    return [target for target, bundle in bundles.items() if not bundle.pipeline.supports_intervals]
+
+# run predictions for all specified target columns
+# include_season adds a "Season" column to the results (used when materializing predictions)
+def predict_all_targets(new_table, reference_table, targets, model_dir="models", team=None, season=None, include_season=False,
+                        intervals=False):
+    # artifacts are cached per process and only reloaded when a new release is promoted
+    bundles = get_target_bundles(targets, model_dir)
+    # load new dataset, the reference table is only read for models without saved stats
+    results, new_df = load_prediction_inputs(new_table, bundles, targets, team=team, season=season, include_season=include_season)
+
+    # run prediction for each target value, targets sharing a model are predicted together
+    for members in group_bundles(bundles):
+        logging.info(f"Predicting targets: {[bundle.target for bundle in members]}")
+        stats = members[0].stats or load_reference_stats(reference_table, targets)
+        for name, values in predict_group_columns(members, new_df, stats, intervals).items():
+            results[name] = values
 
     logging.info("Prediction complete for all targets")
     return results
 
+# yields prediction results in chunks of rows as they are read from the database,
+# so memory stays flat and the first rows can be sent before the whole table is read
+def iter_predictions(new_table, reference_table, targets, model_dir="models", team=None, season=None, chunk_size=1000,
+                     intervals=False):
+    bundles = get_target_bundles(targets, model_dir)
+    groups = group_bundles(bundles)
+    stats = [members[0].stats or load_reference_stats(reference_table, targets) for members in groups]
+    chunks = iter_data_from_db(new_table, chunk_size, team=team, season=season, columns=prediction_input_columns(bundles))
+    for chunk in chunks:
+        results, new_df = split_prediction_inputs(chunk, targets)
+        for members, group_stats in zip(groups, stats):
+            for name, values in predict_group_columns(members, new_df, group_stats, intervals).items():
+                results[name] = values
+        yield results
+
+# async version of predict_all_targets: artifact and data loads run concurrently on io_executor
+# and the per-target (per shared model) predictions run in parallel on cpu_executor.
+# with a batcher, the model call is shared with concurrent requests for the same target
+# (interval requests skip it, their tree walk returns three columns)
+async def predict_all_targets_async(new_table, reference_table, targets, model_dir="models", team=None, season=None,
+                                    include_season=False, io_executor=None, cpu_executor=None, batcher=None,
+                                    intervals=False):
+    loop = asyncio.get_running_loop()
+    # resolve the current release once so every target comes from the same promotion
+    artifact_dir = resolve_model_dir(model_dir)
+    loaded = await asyncio.gather(*[
+        loop.run_in_executor(io_executor, get_target_bundle, target, model_dir, artifact_dir) for target in targets
+    ])
+    bundles = dict(zip(targets, loaded))
+
+    # the reference stats are only needed for models promoted before stats were saved
+    inputs_task = loop.run_in_executor(
+        io_executor, partial(load_prediction_inputs, new_table, bundles, targets, team, season, include_season)
+    )
+    if any(bundle.stats is None for bundle in bundles.values()):
+        reference_stats, (results, new_df) = await asyncio.gather(
+            loop.run_in_executor(io_executor, load_reference_stats, reference_table, targets), inputs_task
+        )
+    else:
+        reference_stats = None
+        results, new_df = await inputs_task
+
+    async def run_group(members):
+        stats = members[0].stats or reference_stats
+        if batcher is None or intervals:
+            return await loop.run_in_executor(cpu_executor, predict_group_columns, members, new_df, stats, intervals)
+        pipeline = group_pipeline(members)
+        X = await loop.run_in_executor(cpu_executor, pipeline.transform, new_df, stats["medians"])
+        return group_columns(members, await batcher.predict(pipeline, X))
+
+    predictions = await asyncio.gather(*[run_group(members) for members in group_bundles(bundles)])
+    for columns in predictions:
+        for name, values in columns.items():
+            results[name] = values
+
+    logging.info("Prediction complete for all targets")
+    return results
+
+# float64 arrays for caller-supplied feature rows (POST /predict/batch), checked against the features
+# every requested target was trained on (scaler.feature_names_in_). values must be numbers or null,
+# nulls take the training median. raises ValueError describing every problem found
+def feature_row_arrays(columns, bundles):
+    errors = []
+    required = {}
+    for target, bundle in bundles.items():
+        names = [str(name) for name in bundle.scaler.feature_names_in_]
+        missing = [name for name in names if name not in columns]
+        if missing:
+            errors.append(f"{target}: missing feature columns {missing}")
+        required.update(dict.fromkeys(names))
+
+    arrays = {}
+    for name in required:
+        if name not in columns:
+            continue
+        try:
+            arrays[name] = to_float_array(columns[name])
+        except (TypeError, ValueError):
+            errors.append(f"column '{name}' must contain only numbers or null")
+    if errors:
+        raise ValueError("; ".join(errors))
+    return arrays
+
+def to_float_array(values):
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiub":
+        return values.astype(np.float64, copy=False)
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except TypeError:
+        # JSON null arrives as None
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+# imputation medians per target for validated feature arrays, only looked up when some value is missing
+def feature_row_medians(arrays, bundles, reference_table="historical_data_table"):
+    if not any(np.isnan(values).any() for values in arrays.values()):
+        return {target: {} for target in bundles}
+    return {
+        target: (bundle.stats or load_reference_stats(reference_table, sorted(bundles)))["medians"]
+        for target, bundle in bundles.items()
+    }
+
 # helper function to find most recent saved model for a target
 def get_latest_model_prefix(target, staging_dir):
     matching_files = [f for f in os.listdir(staging_dir) if f.startswith(target) and f.endswith("_best_model.pkl")]
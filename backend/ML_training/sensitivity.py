@@ -0,0 +1,155 @@
+# Sensitivity sweeps ("predicted 3P as FGA varies") for every player of a query.
+# Each player's row is transformed once, repeated for every grid point with the swept feature replaced,
+# and the whole player x grid matrix of all features goes through one model call per target.
+# Curves are cached per (model bundle, player row, feature, grid), so dashboards re-drawing the same
+# team only pay for players whose stats or model changed.
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from backend.ML_training.artifact_registry import get_target_bundles
+from backend.ML_training.predictions import load_prediction_inputs, load_reference_stats
+
+SWEEP_CACHE_ENTRIES = int(os.getenv("SWEEP_CACHE_ENTRIES", "20000"))
+DEFAULT_POINTS = 50
+MAX_POINTS = 500
+
+# LRU of computed curves
+class CurveCache:
+    def __init__(self, max_entries=SWEEP_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._curves = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            curve = self._curves.get(key)
+            if curve is None:
+                self.misses += 1
+                return None
+            self._curves.move_to_end(key)
+            self.hits += 1
+            return curve
+
+    def put(self, key, curve):
+        with self._lock:
+            self._curves[key] = curve
+            self._curves.move_to_end(key)
+            while len(self._curves) > self.max_entries:
+                self._curves.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._curves)}
+
+    def clear(self):
+        with self._lock:
+            self._curves.clear()
+
+curve_cache = CurveCache()
+
+# evenly spaced values for a feature, by default the training mean +- 2 standard deviations (not below 0)
+def feature_grid(scaler, feature, points=DEFAULT_POINTS, lo=None, hi=None):
+    names = [str(name) for name in scaler.feature_names_in_]
+    if feature not in names:
+        raise ValueError(f"Unknown features: {[feature]}")
+    i = names.index(feature)
+    mean, std = scaler.mean_[i], scaler.scale_[i]
+    lo = max(0.0, mean - 2 * std) if lo is None else lo
+    hi = mean + 2 * std if hi is None else hi
+    return np.linspace(lo, hi, points)
+
+# grids for the features, shared by every target. each comes from the training distribution of the first
+# target whose scaler has the feature (a feature can be used by only some of the requested targets)
+def feature_grids(bundles, features, points=DEFAULT_POINTS, lo=None, hi=None):
+    grids = {}
+    for feature in dict.fromkeys(features):
+        scaler = next(
+            (bundle.scaler for bundle in bundles.values() if feature in [str(name) for name in bundle.scaler.feature_names_in_]),
+            None
+        )
+        if scaler is None:
+            raise ValueError(f"Unknown features: {[feature]}")
+        grids[feature] = feature_grid(scaler, feature, points, lo, hi)
+    return grids
+
+# player x grid rows for one feature from the players' transformed rows X0.
+# a feature the model's selector dropped leaves the rows unchanged, so its curve is flat
+def sweep_matrix(pipeline, X0, feature, grid):
+    X = np.repeat(X0, len(grid), axis=0)
+    if feature in pipeline.feature_names:
+        j = pipeline.feature_names.index(feature)
+        values = np.asarray(grid, dtype=np.float64)
+        if pipeline.mean is not None:
+            values = values - pipeline.mean[j]
+        if pipeline.scale is not None:
+            values = values / pipeline.scale[j]
+        X[:, j] = np.tile(values, len(X0))
+    return X
+
+# curves[feature] with shape (players, points) for one target, one model call covers every cache miss
+def target_curves(bundle, base_df, medians, player_ids, grids, cache=curve_cache):
+    pipeline = bundle.pipeline
+    X0 = pipeline.transform(base_df, medians)
+    row_ids = [hashlib.sha1(row.tobytes()).hexdigest() for row in X0]
+    curves = {feature: np.empty((len(X0), len(grid))) for feature, grid in grids.items()}
+
+    missing = {}
+    for feature, grid in grids.items():
+        grid_key = tuple(np.round(grid, 10))
+        for i in range(len(X0)):
+            key = (bundle.target, bundle.fingerprint, player_ids[i], row_ids[i], feature, grid_key)
+            curve = cache.get(key)
+            if curve is None:
+                missing.setdefault(feature, []).append((i, key))
+            else:
+                curves[feature][i] = curve
+
+    if missing:
+        blocks = [sweep_matrix(pipeline, X0[[i for i, _ in rows]], feature, grids[feature]) for feature, rows in missing.items()]
+        predictions = pipeline.predict_matrix(np.concatenate(blocks))
+        start = 0
+        for feature, rows in missing.items():
+            points = len(grids[feature])
+            block = predictions[start:start + len(rows) * points].reshape(len(rows), points)
+            start += len(rows) * points
+            for (i, key), curve in zip(rows, block):
+                curves[feature][i] = curve
+                cache.put(key, curve.copy())
+    return curves
+
+# sweeps each feature over its grid for every player matching the query.
+# returns the grids and one record per (player, feature) with a curve per target
+def player_sweeps(targets, features, team=None, season=None, player=None, points=DEFAULT_POINTS, lo=None, hi=None,
+                  model_dir="backend/ML_training/models/production", new_table="current_data_table",
+                  reference_table="historical_data_table"):
+    bundles = get_target_bundles(targets, model_dir)
+    known = set().union(*[[str(name) for name in bundle.scaler.feature_names_in_] for bundle in bundles.values()])
+    unknown = [feature for feature in features if feature not in known]
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}")
+    if not 2 <= points <= MAX_POINTS:
+        raise ValueError(f"points must be between 2 and {MAX_POINTS}")
+
+    grids = feature_grids(bundles, features, points, lo, hi)
+
+    identity, base_df = load_prediction_inputs(new_table, bundles, targets, team=team, season=season, player=player)
+    player_ids = [tuple(row) for row in identity.itertuples(index=False)]
+    curves = {}
+    for target, bundle in bundles.items():
+        stats = bundle.stats or load_reference_stats(reference_table, targets)
+        curves[target] = target_curves(bundle, base_df, stats["medians"], player_ids, grids)
+
+    records = []
+    identity_records = identity.to_dict(orient="records")
+    for feature in grids:
+        for i, who in enumerate(identity_records):
+            record = dict(who, feature=feature)
+            for target in bundles:
+                record[f"Predicted_{target}"] = curves[target][feature][i]
+            records.append(record)
+    return {"grid": grids, "curves": records}
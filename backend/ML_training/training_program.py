@@ -2,11 +2,14 @@ import os
 import pandas as pd
 import numpy as np
 import joblib
+import sklearn
 import requests
 import sys
+import copy
+import time
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, RobustScaler
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.feature_selection import SelectKBest, f_regression
 from sklearn.compose import ColumnTransformer
@@ -14,9 +17,20 @@ from sqlalchemy import create_engine
 import logging
 from sklearn.impute import SimpleImputer
 from sklearn.feature_selection import RFECV
+from sklearn.base import clone
+from threadpoolctl import threadpool_limits
 import urllib
 from datetime import datetime
 import json
+from concurrent.futures import ProcessPoolExecutor
+from backend.ML_training.inference import INTERVAL_QUANTILES
+from backend.ML_training.artifact_registry import (
+    shared_bundle_name, shared_output, resolve_model_dir, load_target_artifacts, load_target_stats, load_quantile_models,
+    ARTIFACT_SUFFIXES
+)
+from backend.ML_training.feature_selection import (
+    STRATEGIES, from_model_selection, permutation_selection, mutual_info_prefilter, combine_masks
+)
 
 # determines the next version number for saving model
 def get_next_version(target, staging_dir):
@@ -24,13 +38,26 @@ def get_next_version(target, staging_dir):
     versions = [int(f.split("_v")[1].split("_")[0]) for f in existing if "_v" in f]
     return max(versions, default=0) + 1
 
-def train_and_save_models(df, config):
-    # extract target columns and output directory
-    target_columns = config.get("targets", [])
-    base_output_dir = config.get("output_dir", "models")
-    staging_dir = os.path.join(base_output_dir, "staging")
-    os.makedirs(staging_dir, exist_ok=True)
+# saves the feature column order and medians so inference can impute without the historical table
+def save_feature_stats(X, medians, path):
+    stats = {
+        "columns": list(X.columns),
+        "medians": {col: float(medians[col]) for col in X.columns if col in medians},
+        # how many rows the medians come from, incremental retraining weighs new seasons against it
+        "n_rows": len(X)
+    }
+    with open(path, "w") as stats_file:
+        json.dump(stats, stats_file, indent=4)
 
+# lower/upper quantile companions of a (Hist)GradientBoosting model, trained with the same settings on the same
+# selected features. inference walks them together with the model to return a prediction interval
+def fit_quantile_models(model, X, y, quantiles=INTERVAL_QUANTILES):
+    # HistGradientBoosting calls the level quantile, GradientBoosting alpha
+    level = "quantile" if isinstance(model, HistGradientBoostingRegressor) else "alpha"
+    return {alpha: clone(model).set_params(loss="quantile", **{level: alpha}).fit(X, y) for alpha in quantiles}
+
+# drops the total rows and non-feature columns and median-imputes the rest, returns the frame and the medians
+def prepare_training_frame(df):
     # filter and drop rows
     df = df[df["Player"] != "Team Totals"].copy()
     df.drop(columns=["Awards", "Pos", "Age", "Rk", "Player", "TEAM"], errors="ignore", inplace=True)
@@ -38,15 +65,216 @@ def train_and_save_models(df, config):
     numeric_cols = df.select_dtypes(include=np.number).columns
     imputer = SimpleImputer(strategy="median")
     df[numeric_cols] = imputer.fit_transform(df[numeric_cols])
-    # iterate through each target variable
-    for target in target_columns:
+    return df, dict(zip(numeric_cols, imputer.statistics_))
+
+# HistGradientBoosting candidate settings, hist_gradient_boosting in config.yaml overrides them.
+# features are binned (max_bins per column) so split finding doesn't grow with the row count, and it
+# stops adding trees once the score on a held-out validation_fraction stops improving
+HIST_GRADIENT_BOOSTING = {
+    "max_iter": 500,
+    "learning_rate": 0.05,
+    "max_leaf_nodes": 31,
+    "max_bins": 255,
+    "early_stopping": True,
+    "validation_fraction": 0.1,
+    "n_iter_no_change": 20,
+    "random_state": 42
+}
+
+# last season in the training rows, an incremental retrain picks up the seasons after it
+def data_through(df):
+    return int(df["YR"].max()) if "YR" in df.columns else None
+
+# candidate models compared for every target: can add models for comparisons.
+# config candidates picks which of them run (default RandomForest and GradientBoosting)
+def candidate_models(config=None):
+    config = config or {}
+    models = {
+        "RandomForest": lambda: RandomForestRegressor(n_estimators=200, max_depth=10, random_state=42),
+        "GradientBoosting": lambda: GradientBoostingRegressor(n_estimators=200, learning_rate=0.05, max_depth=5, random_state=42),
+        "HistGradientBoosting": lambda: HistGradientBoostingRegressor(
+            **{**HIST_GRADIENT_BOOSTING, **(config.get("hist_gradient_boosting") or {})}
+        )
+    }
+    names = config.get("candidates") or ["RandomForest", "GradientBoosting"]
+    unknown = [name for name in names if name not in models]
+    if unknown:
+        raise ValueError(f"Unknown candidate models {unknown}, expected some of {list(models)}")
+    return {name: models[name]() for name in names}
+
+# splits the cores between jobs running side by side (outer) and the RFECV folds inside each job (inner),
+# so outer * inner never exceeds the cores available
+def split_cores(n_jobs, cores):
+    outer = max(1, min(n_jobs, cores))
+    inner = max(1, cores // outer)
+    return outer, inner
+
+# Recursive Feature Elimination with Cross-Validation (RFECV) settings, part of the selection cache key
+RFECV_SETTINGS = {
+    "step": 5, # removes set features at a time (e.g. 5)
+    "cv": 5, # 5-fold cross validation
+    "scoring": "r2", # optimize for R2 scoring (curious if more than one scoring method can be optimized)
+    "min_features_to_select": 5 # minimum number of features to keep
+}
+# entries kept in the selection cache, the least recently used ones are removed after each training run
+SELECTION_CACHE_KEEP = int(os.getenv("SELECTION_CACHE_KEEP", "32"))
+
+# content hash of everything RFECV's result depends on: the training matrix and target, the estimator
+# and its params, the RFECV settings and the sklearn version
+def selection_key(model, X, y):
+    return joblib.hash((sklearn.__version__, type(model).__name__, model.get_params(), RFECV_SETTINGS, X, y))
+
+# fits the feature selector of a strategy (feature_selection.STRATEGIES) for the model. returns the selector,
+# the selected training matrix and what the selection cache did (None for strategies that don't use it)
+def select_features(model, X, y, n_jobs=-1, cache_dir=None, strategy="rfecv"):
+    min_features = RFECV_SETTINGS["min_features_to_select"]
+    # RFECV and SelectFromModel rank by feature_importances_, models without them (HistGradientBoosting)
+    # are selected by permutation importance instead
+    if strategy != "permutation" and not hasattr(type(model), "feature_importances_"):
+        logging.info(f"{type(model).__name__} has no feature_importances_, using permutation selection instead of {strategy}")
+        strategy = "permutation"
+    if strategy == "rfecv":
+        return rfecv_selection(model, X, y, n_jobs, cache_dir)
+    if strategy == "mi_rfecv":
+        prefilter, scores = mutual_info_prefilter(X, y, min_features)
+        narrowed, _, cache = rfecv_selection(model, X.loc[:, prefilter], y, n_jobs, cache_dir)
+        selector = combine_masks(prefilter, narrowed, X, y, scores)
+        return selector, selector.transform(X), cache
+    if strategy == "from_model":
+        selector = from_model_selection(model, X, y, min_features)
+    elif strategy == "permutation":
+        selector = permutation_selection(model, X, y, min_features, n_jobs)
+    else:
+        raise ValueError(f"Unknown feature_selection strategy {strategy!r}, expected one of {STRATEGIES}")
+    return selector, selector.transform(X), None
+
+# fits RFECV for the model, or reuses the fitted selector cached under cache_dir by an earlier run on
+# the same data and settings. returns the selector, the selected training matrix and what the cache did
+def rfecv_selection(model, X, y, n_jobs=-1, cache_dir=None):
+    path = os.path.join(cache_dir, f"{selection_key(model, X, y)}.pkl") if cache_dir else None
+    if path and os.path.exists(path):
+        start = time.perf_counter()
+        try:
+            entry = joblib.load(path)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable selection cache entry {path}: {e}")
+        else:
+            # same result as fitting again, including the model being the selector's estimator
+            selector = entry["selector"].set_params(estimator=model)
+            # a hit counts as a use, pruning goes by modification time
+            os.utime(path)
+            X_selected = selector.transform(X)
+            seconds_saved = max(0.0, entry["fit_seconds"] - (time.perf_counter() - start))
+            return selector, X_selected, {"hit": True, "seconds_saved": round(seconds_saved, 2)}
+
+    start = time.perf_counter()
+    selector = RFECV(
+        estimator=model, # the ML model being tested (e.g. RandomForest)
+        n_jobs=n_jobs, # cores for the cross validation folds, all of them when training sequentially
+        **RFECV_SETTINGS
+    )
+    X_selected = selector.fit_transform(X, y)
+    fit_seconds = time.perf_counter() - start
+    # the saved selector is the same whatever share of the cores this job was given
+    selector.set_params(n_jobs=-1)
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # written under a temporary name so parallel jobs never read a partial entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({"selector": selector, "fit_seconds": fit_seconds}, tmp_path)
+        os.replace(tmp_path, path)
+    return selector, X_selected, {"hit": False, "seconds_saved": 0.0}
+
+# removes all but the keep most recently used selection cache entries, returns the removed paths
+def prune_selection_cache(cache_dir, keep=None):
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return []
+    keep = SELECTION_CACHE_KEEP if keep is None else keep
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith(".pkl")]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    removed = entries[max(keep, 0):]
+    for path in removed:
+        os.remove(path)
+    if removed:
+        logging.info(f"Removed {len(removed)} old selection cache entries")
+    return removed
+
+# feature selection settings from config.yaml: feature_selection picks the strategy (default rfecv),
+# RFECV results are cached by content so a retrain on unchanged data skips them (selection_cache)
+def selection_options(config, base_output_dir):
+    strategy = config.get("feature_selection", "rfecv")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown feature_selection strategy {strategy!r}, expected one of {STRATEGIES}")
+    cache_dir = os.path.join(base_output_dir, "selection_cache") if config.get("selection_cache", True) else None
+    return {"strategy": strategy, "cache_dir": cache_dir}
+
+# one (target x candidate model) training job: RFECV feature selection, then the model on the selected
+# features scored on the held-out split. runs in a worker process when training in parallel.
+# selection holds the select_features options (strategy, cache_dir)
+def fit_candidate(target, name, model, data, selection=None, n_jobs=-1):
+    start = time.perf_counter()
+    X_train_scaled, X_test_scaled, y_train, y_test = data
+    # models that thread internally (HistGradientBoosting's OpenMP loops) stay within this job's share of cores
+    with threadpool_limits(limits=n_jobs if n_jobs > 0 else None):
+        # Recursive Feature Elimination with Cross-Validation (RFECV) by default, or a cheaper strategy
+        selector, X_train_selected, cache = select_features(model, X_train_scaled, y_train, n_jobs, **(selection or {}))
+        X_test_selected = selector.transform(X_test_scaled)
+
+        model.fit(X_train_selected, y_train)
+        y_pred = model.predict(X_test_selected)
+    mae = mean_absolute_error(y_test, y_pred) # lower mae score = better
+    r2 = r2_score(y_test, y_pred) # high r2 score = better
+    logging.info(f"{target} | {name} - R2: {r2:.4f}, MAE: {mae:.4f}" + (" (cached selection)" if cache and cache["hit"] else ""))
+    return {
+        "target": target, "name": name, "model": model, "selector": selector, "X_train": X_train_selected,
+        "r2": r2, "mae": mae, "n_features": int(X_train_selected.shape[1]), "selection_cache": cache,
+        "strategy": getattr(selector, "strategy", "rfecv"),
+        "seconds": time.perf_counter() - start
+    }
+
+# runs the jobs on a process pool (or one after another) and returns their results in job order.
+# jobs are (target, name, model, data, selection) tuples
+def run_training_jobs(jobs, parallel=True, cores=None):
+    cores = cores or os.cpu_count() or 1
+    if not parallel:
+        return [fit_candidate(*job) for job in jobs], (1, -1)
+    outer, inner = split_cores(len(jobs), cores)
+    if outer == 1:
+        return [fit_candidate(*job, n_jobs=inner) for job in jobs], (outer, inner)
+    with ProcessPoolExecutor(max_workers=outer) as pool:
+        futures = [pool.submit(fit_candidate, *job, n_jobs=inner) for job in jobs]
+        return [future.result() for future in futures], (outer, inner)
+
+# with parallel_training (config.yaml, default true) the (target x candidate model) jobs run on a process
+# pool across training_cores cores (0 or unset: all of them). the best model per target is picked and
+# saved here in target order, so the staged artifacts are the same as training sequentially.
+# returns the wall-clock summary of the run
+# train_targets limits the run to some of the configured targets (a partial rebuild), the others are
+# still left out of the features
+def train_and_save_models(df, config, train_targets=None):
+    # with multi_output: true every target is predicted by one shared model
+    if config.get("multi_output", False):
+        return train_and_save_shared_model(df, config)
+
+    start = time.perf_counter()
+    # extract target columns and output directory
+    target_columns = config.get("targets", [])
+    base_output_dir = config.get("output_dir", "models")
+    staging_dir = os.path.join(base_output_dir, "staging")
+    os.makedirs(staging_dir, exist_ok=True)
+
+    df, medians = prepare_training_frame(df)
+    # every configured target is dropped, a target is never a feature of another one
+    X = df.drop(columns=target_columns, errors="ignore")
+    # split and scale the data of each target, the candidate models are trained on it as separate jobs
+    selection = selection_options(config, base_output_dir)
+    prepared, jobs = {}, []
+    for target in (target_columns if train_targets is None else train_targets):
         if target not in df.columns:
             logging.warning(f"Skipping target {target}: not found in data")
             continue
 
         logging.info(f"Training models for target: {target}")
-        # split data
-        X = df.drop(columns=target_columns)
         y = df[target]
         # train and test split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -55,43 +283,21 @@ def train_and_save_models(df, config):
         scaler = StandardScaler()
         X_train_scaled = pd.DataFrame(scaler.fit_transform(X_train), columns=X_train.columns)
         X_test_scaled = pd.DataFrame(scaler.transform(X_test), columns=X_test.columns)
-        # define models to evaluate: can add models for comparisons
-        models_to_test = {
-            "RandomForest": RandomForestRegressor(n_estimators=200, max_depth=10, random_state=42),
-            "GradientBoosting": GradientBoostingRegressor(n_estimators=200, learning_rate=0.05, max_depth=5, random_state=42)
-        }
+        prepared[target] = (scaler, y_train)
+        data = (X_train_scaled, X_test_scaled, y_train, y_test)
+        jobs.extend((target, name, model, data, selection) for name, model in candidate_models(config).items())
 
-        best_model = None
-        best_r2 = -np.inf
-        best_name = ""
-        best_selector = None
-
-        # train and evaluate each model
-        for name, model in models_to_test.items():
-            # use Recursive Feature Elimination with Cross-Validation (RFECV) for feature selection
-            selector = RFECV(
-                estimator=model, # the ML model being tested (e.g. RandomForest)
-                step=5, # removes set features at a time (e.g. 5)
-                cv=5, # 5-fold cross validation
-                scoring="r2", # optimize for R2 scoring (curious if more than one scoring method can be optimized)
-                n_jobs=-1, # use all available cores for parallel processing
-                min_features_to_select=5 # minimum number of features to keep
-            )
-            X_train_selected = selector.fit_transform(X_train_scaled, y_train)
-            X_test_selected = selector.transform(X_test_scaled)
-
-            model.fit(X_train_selected, y_train)
-            y_pred = model.predict(X_test_selected)
-            mae = mean_absolute_error(y_test, y_pred) # lower mae score = better
-            r2 = r2_score(y_test, y_pred) # high r2 score = better
-            logging.info(f"{target} | {name} - R2: {r2:.4f}, MAE: {mae:.4f}")
-
-            # save the best model based on r2 scoring
-            if r2 > best_r2:
-                best_model = model
-                best_selector = selector
-                best_r2 = r2
-                best_name = name
+    parallel = config.get("parallel_training", True)
+    results, (outer, inner) = run_training_jobs(jobs, parallel, config.get("training_cores") or None)
+    prune_selection_cache(selection["cache_dir"])
+
+    for target, (scaler, y_train) in prepared.items():
+        best = None
+        # save the best model based on r2 scoring, candidates in the order they are listed
+        for result in results:
+            if result["target"] == target and (best is None or result["r2"] > best["r2"]):
+                best = result
+        best_model, best_name, best_r2, mae = best["model"], best["name"], best["r2"], best["mae"]
 
         # create versioned file name with timestamps
         version = get_next_version(target, staging_dir)
@@ -101,7 +307,12 @@ def train_and_save_models(df, config):
         # save the model, scaler, and selector artifacts
         joblib.dump(best_model, os.path.join(staging_dir, f"{prefix}_best_model.pkl"))
         joblib.dump(scaler, os.path.join(staging_dir, f"{prefix}_scaler.pkl"))
-        joblib.dump(best_selector, os.path.join(staging_dir, f"{prefix}_selector.pkl"))
+        joblib.dump(best["selector"], os.path.join(staging_dir, f"{prefix}_selector.pkl"))
+        save_feature_stats(X, medians, os.path.join(staging_dir, f"{prefix}_stats.json"))
+        # a forest's intervals come from its own trees, boosted models need quantile companions
+        if isinstance(best_model, (GradientBoostingRegressor, HistGradientBoostingRegressor)):
+            quantile_models = fit_quantile_models(best_model, best["X_train"], y_train)
+            joblib.dump(quantile_models, os.path.join(staging_dir, f"{prefix}_quantiles.pkl"))
 
         # saves metadata
         metadata = {
@@ -109,7 +320,15 @@ def train_and_save_models(df, config):
             "version": f"v{version}_{timestamp}",
             "model": best_name,
             "r2": round(best_r2, 4),
-            "mae": round(mae, 4)
+            "mae": round(mae, 4),
+            "feature_selection": best["strategy"],
+            "n_features": best["n_features"],
+            "data_through": data_through(df),
+            # whether each candidate's RFECV came from the cache and the time that saved
+            "selection_cache": {
+                result["name"]: result["selection_cache"] for result in results
+                if result["target"] == target and result["selection_cache"]
+            }
         }
 
         with open(os.path.join(staging_dir, f"{prefix}.json"), "w") as meta_file:
@@ -118,6 +337,275 @@ def train_and_save_models(df, config):
         logging.info(f"Saved best model ({best_name}) for target '{target}' as {prefix} with R²: {best_r2:.4f}")
         print(f"Saved best model ({best_name}) for target '{target}' as {prefix} with R²: {best_r2:.4f}")
 
+    return training_summary(len(jobs), outer, inner, time.perf_counter() - start, sum(result["seconds"] for result in results))
+
+# wall-clock summary of a training run returned by train_and_save_models.
+# speedup compares the wall clock with the jobs' own time added up, i.e. running them back to back
+def training_summary(n_jobs, outer, inner, wall_seconds, job_seconds):
+    summary = {
+        "jobs": n_jobs,
+        "workers": outer,
+        "n_jobs_per_worker": inner,
+        "wall_seconds": round(wall_seconds, 2),
+        "job_seconds": round(job_seconds, 2),
+        "speedup": round(job_seconds / wall_seconds, 2) if wall_seconds else None
+    }
+    logging.info(f"Trained {n_jobs} jobs on {outer} worker(s) x {inner} core(s) in {wall_seconds:.1f}s "
+                 f"({job_seconds:.1f}s of job time, {summary['speedup']}x)")
+    print(f"Training wall clock {wall_seconds:.1f}s for {job_seconds:.1f}s of job time ({summary['speedup']}x)")
+    return summary
+
+# trains one scaler, selector and model for all targets together (config multi_output: true).
+# 3P and 3PA are strongly correlated and use nearly the same features, so a multi-output RandomForest
+# (sklearn's trees fit every output natively) replaces the per-target models and inference does one
+# feature pass and one traversal for all targets. GradientBoosting only fits one output, so it isn't a candidate.
+# artifacts are saved under the joined target names, e.g. 3P-3PA_v1_20250101_1200_best_model.pkl.
+# returns the same summary as train_and_save_models, the shared model being one job
+def train_and_save_shared_model(df, config):
+    start = time.perf_counter()
+    base_output_dir = config.get("output_dir", "models")
+    staging_dir = os.path.join(base_output_dir, "staging")
+    os.makedirs(staging_dir, exist_ok=True)
+
+    df, medians = prepare_training_frame(df)
+    target_columns = [target for target in config.get("targets", []) if target in df.columns]
+    skipped = [target for target in config.get("targets", []) if target not in df.columns]
+    if skipped:
+        logging.warning(f"Skipping targets {skipped}: not found in data")
+    if not target_columns:
+        return training_summary(0, 1, -1, time.perf_counter() - start, 0.0)
+
+    logging.info(f"Training shared model for targets: {target_columns}")
+    X = df.drop(columns=config.get("targets", []), errors="ignore")
+    y = df[target_columns]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    scaler = StandardScaler()
+    X_train_scaled = pd.DataFrame(scaler.fit_transform(X_train), columns=X_train.columns)
+    X_test_scaled = pd.DataFrame(scaler.transform(X_test), columns=X_test.columns)
+
+    model = RandomForestRegressor(n_estimators=200, max_depth=10, random_state=42)
+    # the selector is fitted on y_select: every target for rfecv, from_model and permutation (the multi-output
+    # forest's importances, r2 averaged over the targets), only the first one for mi_rfecv, whose mutual
+    # information prefilter and the RFECV after it are both fitted on that target
+    selection = selection_options(config, base_output_dir)
+    y_select = y_train[target_columns[0]] if selection["strategy"] == "mi_rfecv" else y_train
+    selector, X_train_selected, cache = select_features(model, X_train_scaled, y_select, **selection)
+    prune_selection_cache(selection["cache_dir"])
+    X_test_selected = selector.transform(X_test_scaled)
+    model.fit(X_train_selected, y_train)
+    y_pred = model.predict(X_test_selected)
+
+    r2 = {target: round(r2_score(y_test[target], y_pred[:, i]), 4) for i, target in enumerate(target_columns)}
+    mae = {target: round(mean_absolute_error(y_test[target], y_pred[:, i]), 4) for i, target in enumerate(target_columns)}
+    for target in target_columns:
+        logging.info(f"{target} | shared RandomForest - R2: {r2[target]:.4f}, MAE: {mae[target]:.4f}")
+
+    name = shared_bundle_name(target_columns)
+    version = get_next_version(name, staging_dir)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    prefix = f"{name}_v{version}_{timestamp}"
+
+    joblib.dump(model, os.path.join(staging_dir, f"{prefix}_best_model.pkl"))
+    joblib.dump(scaler, os.path.join(staging_dir, f"{prefix}_scaler.pkl"))
+    joblib.dump(selector, os.path.join(staging_dir, f"{prefix}_selector.pkl"))
+    save_feature_stats(X, medians, os.path.join(staging_dir, f"{prefix}_stats.json"))
+
+    # "targets" is the model's output order, promotion maps each target to its column from it
+    metadata = {
+        "targets": target_columns,
+        "version": f"v{version}_{timestamp}",
+        "model": "RandomForest",
+        "r2": r2,
+        "mae": mae,
+        "feature_selection": getattr(selector, "strategy", "rfecv"),
+        "n_features": int(X_train_selected.shape[1]),
+        "data_through": data_through(df),
+        "selection_cache": cache
+    }
+    with open(os.path.join(staging_dir, f"{prefix}.json"), "w") as meta_file:
+        json.dump(metadata, meta_file, indent=4)
+
+    logging.info(f"Saved shared model for targets {target_columns} as {prefix}")
+    print(f"Saved shared model for targets {target_columns} as {prefix}")
+    wall_seconds = time.perf_counter() - start
+    return training_summary(1, 1, -1, wall_seconds, wall_seconds)
+
+# incremental retraining (config incremental): instead of refitting on the whole history, the production
+# models are updated with the seasons added since they were trained. RandomForest grows new_trees trees on
+# the new rows (warm_start), GradientBoosting continues with new_stages boosting stages from where the
+# production model stopped, and the scaler statistics are updated from running sums (partial_fit).
+# a target is rebuilt from scratch instead when its new rows drift more than drift_threshold from the data
+# the model was trained on, or when its bundle can't be updated (shared bundle, other model types, old artifacts)
+INCREMENTAL_DEFAULTS = {"new_trees": 50, "new_stages": 50, "drift_threshold": 0.5}
+MIN_NEW_ROWS = 10
+# the row id and the season grow with every season, so they always look shifted and are left out of the drift check
+TREND_COLUMNS = ["id", "YR", "Season"]
+
+# largest shift of a selected feature's mean in the new rows, in standard deviations of the training data
+def feature_drift(scaler, X_new, columns):
+    names = np.asarray(scaler.feature_names_in_)
+    columns = [c for c in columns if names[c] not in TREND_COLUMNS]
+    if not columns:
+        return 0.0
+    shift = np.abs(X_new.to_numpy()[:, columns].mean(axis=0) - scaler.mean_[columns]) / scaler.scale_[columns]
+    return float(shift.max())
+
+# moves the split thresholds of trees fitted on features scaled by old_scaler, so they make the same
+# decisions on features scaled by new_scaler: a threshold t on column c stands for the raw value
+# t * old scale + old mean. columns maps the trees' (selected) inputs to the scaler's columns
+def remap_thresholds(trees, old_scaler, new_scaler, columns):
+    for estimator in trees:
+        tree = estimator.tree_
+        split = tree.children_left != -1
+        feature = columns[tree.feature[split]]
+        raw = tree.threshold[split] * old_scaler.scale_[feature] + old_scaler.mean_[feature]
+        tree.threshold[split] = (raw - new_scaler.mean_[feature]) / new_scaler.scale_[feature]
+
+# fits `added` more trees (RandomForest) or boosting stages (GradientBoosting) on the new rows, keeping the existing ones
+def warm_start_model(model, X, y, added):
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + added)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+# medians can't be updated from running sums, so the saved ones are blended with the new rows' medians
+# by row count. close to the true medians as long as the new seasons look like the old ones (the drift check)
+def blend_medians(stats, new_medians, n_new):
+    n_old = stats["n_rows"]
+    medians = {}
+    for col, old in stats["medians"].items():
+        new = new_medians.get(col)
+        medians[col] = old if new is None or np.isnan(new) else (old * n_old + new * n_new) / (n_old + n_new)
+    return medians
+
+# why a target has no per-target bundle in the release to update, None when it has one.
+# checked before loading, a target served through a shared bundle's alias has no artifacts of its own
+def bundle_blocker(target, model_dir):
+    if shared_output(target, model_dir) is not None:
+        return "served by a shared multi-output bundle"
+    missing = [suffix for suffix in ARTIFACT_SUFFIXES if not os.path.exists(os.path.join(model_dir, f"{target}_{suffix}"))]
+    if missing:
+        return f"no production {target} artifacts {missing}"
+    return None
+
+# why a loaded production bundle can't be warm-started, None when it can
+def incremental_blocker(model, stats, metadata, new_df):
+    if not isinstance(model, (RandomForestRegressor, GradientBoostingRegressor)):
+        return f"{type(model).__name__} models can't be warm-started"
+    if stats is None or "n_rows" not in stats or metadata.get("data_through") is None:
+        return "bundle was saved before incremental retraining"
+    missing = [col for col in stats["columns"] if col not in new_df.columns]
+    if missing:
+        return f"new rows lack columns {missing}"
+    return None
+
+def load_metadata(target, model_dir):
+    path = os.path.join(model_dir, f"{target}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as meta_file:
+        return json.load(meta_file)
+
+# last season every target's production model was trained through, None when any is unknown
+# (a full rebuild is needed first)
+def trained_through(targets, production_dir="backend/ML_training/models/production"):
+    model_dir = resolve_model_dir(production_dir)
+    seasons = [load_metadata(target, model_dir).get("data_through") for target in targets]
+    return None if not seasons or None in seasons else min(seasons)
+
+# warm-starts the production models of config's targets on new_df (the rows added since trained_through)
+# and stages the results as new versions for promote_models. returns the targets updated and the
+# ones that need a full rebuild, as {"updated": [...], "rebuild": [...]}
+def update_models(new_df, config, production_dir="backend/ML_training/models/production"):
+    settings = {**INCREMENTAL_DEFAULTS, **(config.get("incremental") or {})}
+    target_columns = config.get("targets", [])
+    staging_dir = os.path.join(config.get("output_dir", "models"), "staging")
+    os.makedirs(staging_dir, exist_ok=True)
+    model_dir = resolve_model_dir(production_dir)
+
+    result = {"updated": [], "rebuild": []}
+    # too few rows to update on and still hold some out for scoring
+    if len(new_df) < MIN_NEW_ROWS:
+        logging.info(f"{len(new_df)} new rows, nothing to update (at least {MIN_NEW_ROWS} needed)")
+        return result
+    new_df, new_medians = prepare_training_frame(new_df)
+    for target in target_columns:
+        if target not in new_df.columns:
+            logging.warning(f"Skipping target {target}: not found in data")
+            continue
+        reason = bundle_blocker(target, model_dir)
+        if reason is None:
+            model, scaler, selector = load_target_artifacts(target, model_dir)
+            stats = load_target_stats(target, model_dir)
+            metadata = load_metadata(target, model_dir)
+            reason = incremental_blocker(model, stats, metadata, new_df)
+        if reason is None:
+            X_new = new_df[stats["columns"]]
+            columns = np.flatnonzero(selector.get_support())
+            drift = feature_drift(scaler, X_new, columns)
+            if drift > settings["drift_threshold"]:
+                reason = f"feature drift {drift:.2f} is over {settings['drift_threshold']}"
+        if reason is not None:
+            logging.info(f"Target {target} needs a full rebuild: {reason}")
+            result["rebuild"].append(target)
+            continue
+
+        logging.info(f"Updating {target} with {len(new_df)} new rows (drift {drift:.2f})")
+        X_train, X_test, y_train, y_test = train_test_split(X_new, new_df[target], test_size=0.2, random_state=42)
+        new_scaler = copy.deepcopy(scaler).partial_fit(X_train)
+        quantile_models = load_quantile_models(target, model_dir)
+        # the existing trees keep their splits under the updated scaling
+        for fitted in [model, *(quantile_models or {}).values()]:
+            trees = fitted.estimators_ if isinstance(fitted, RandomForestRegressor) else fitted.estimators_.ravel()
+            remap_thresholds(trees, scaler, new_scaler, columns)
+
+        X_train_selected = selector.transform(pd.DataFrame(new_scaler.transform(X_train), columns=X_train.columns))
+        X_test_selected = selector.transform(pd.DataFrame(new_scaler.transform(X_test), columns=X_test.columns))
+        added = settings["new_trees"] if isinstance(model, RandomForestRegressor) else settings["new_stages"]
+        warm_start_model(model, X_train_selected, y_train, added)
+        for companion in (quantile_models or {}).values():
+            warm_start_model(companion, X_train_selected, y_train, added)
+        y_pred = model.predict(X_test_selected)
+        r2, mae = r2_score(y_test, y_pred), mean_absolute_error(y_test, y_pred)
+        logging.info(f"{target} | incremental {metadata.get('model')} - R2: {r2:.4f}, MAE: {mae:.4f} on the new rows")
+
+        version = get_next_version(target, staging_dir)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        prefix = f"{target}_v{version}_{timestamp}"
+        joblib.dump(model, os.path.join(staging_dir, f"{prefix}_best_model.pkl"))
+        joblib.dump(new_scaler, os.path.join(staging_dir, f"{prefix}_scaler.pkl"))
+        joblib.dump(selector, os.path.join(staging_dir, f"{prefix}_selector.pkl"))
+        if quantile_models:
+            joblib.dump(quantile_models, os.path.join(staging_dir, f"{prefix}_quantiles.pkl"))
+        stats = {
+            "columns": stats["columns"],
+            "medians": blend_medians(stats, new_medians, len(new_df)),
+            "n_rows": stats["n_rows"] + len(new_df)
+        }
+        with open(os.path.join(staging_dir, f"{prefix}_stats.json"), "w") as stats_file:
+            json.dump(stats, stats_file, indent=4)
+
+        metadata = {
+            **{key: value for key, value in metadata.items() if key not in ("selection_cache", "incremental")},
+            "target": target,
+            "version": f"v{version}_{timestamp}",
+            # scores on the held-out new rows
+            "r2": round(r2, 4),
+            "mae": round(mae, 4),
+            "data_through": max(metadata["data_through"], data_through(new_df) or metadata["data_through"]),
+            "incremental": {
+                "base_version": metadata.get("version"),
+                "new_rows": len(new_df),
+                "added": added,
+                "drift": round(drift, 4)
+            }
+        }
+        with open(os.path.join(staging_dir, f"{prefix}.json"), "w") as meta_file:
+            json.dump(metadata, meta_file, indent=4)
+        result["updated"].append(target)
+        print(f"Updated {target} ({metadata['model']}, +{added}) as {prefix} with R² on the new rows: {r2:.4f}")
+    return result
+
 """
     R2 measures how well the model explains the variance in the target variable (How well can I predict the ups and downs of the real values)
     range from 0 to 1 but can be negative if a model is awful
@@ -0,0 +1,148 @@
+# Flattened evaluator for the RandomForest / GradientBoosting production models.
+# Every tree of the ensemble is packed into shared node arrays (feature, threshold, children, value)
+# and a batch of rows walks all trees at once with NumPy, one tree level per step.
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
+# rows evaluated per step, bounds the (rows x trees) working arrays
+ROW_CHUNK = 4096
+
+class FlatEnsemble:
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth, combine, scale, baseline):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.children = np.stack([left, right], axis=1).ravel()
+        self.roots = roots
+        self.max_depth = max_depth
+        # "mean" averages the trees (RandomForest), "sum" adds scale * tree to the baseline (GradientBoosting)
+        self.combine = combine
+        self.scale = scale
+        self.baseline = baseline
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # a multi-output forest (one shared model for several targets) stores a row of values per node
+    @property
+    def n_outputs(self):
+        return 1 if self.value.ndim == 1 else self.value.shape[1]
+
+    @classmethod
+    def from_estimator(cls, model):
+        if isinstance(model, RandomForestRegressor):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            combine, scale, baseline = "mean", 1.0, 0.0
+        elif isinstance(model, GradientBoostingRegressor):
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            combine, scale = "sum", float(model.learning_rate)
+            if isinstance(model.init_, str) and model.init_ == "zero":
+                baseline = 0.0
+            elif hasattr(model.init_, "constant_"):
+                baseline = float(np.ravel(model.init_.constant_)[0])
+            else:
+                raise ValueError(f"Unsupported init estimator for flattening: {type(model.init_).__name__}")
+        else:
+            raise ValueError(f"Unsupported model type for flattening: {type(model).__name__}")
+
+        n_outputs = trees[0].n_outputs
+        if combine == "sum" and n_outputs != 1:
+            raise ValueError("Only single-output boosted trees can be flattened")
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes)
+            is_leaf = tree.children_left == -1
+            # leaves point at themselves so extra steps past a tree's depth are no-ops
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            missing.append(tree.missing_go_to_left.astype(bool))
+            values.append(tree.value[:, 0, 0] if n_outputs == 1 else tree.value[:, :, 0])
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+            combine=combine,
+            scale=scale,
+            baseline=baseline
+        )
+
+    # one ensemble holding the trees of several (a model and its quantile companions), so a single
+    # traversal reaches the leaves of all of them. returns it with each member's range of trees:
+    # member.combine_leaves(leaves[trees]) gives that member's prediction
+    @classmethod
+    def stack(cls, ensembles):
+        node_offsets = np.cumsum([0] + [len(ensemble.value) for ensemble in ensembles[:-1]])
+        tree_bounds = np.cumsum([0] + [ensemble.n_trees for ensemble in ensembles])
+        stacked = cls(
+            feature=np.concatenate([ensemble.feature for ensemble in ensembles]),
+            threshold=np.concatenate([ensemble.threshold for ensemble in ensembles]),
+            left=np.concatenate([e.left + offset for e, offset in zip(ensembles, node_offsets)]).astype(np.int32),
+            right=np.concatenate([e.right + offset for e, offset in zip(ensembles, node_offsets)]).astype(np.int32),
+            missing_left=np.concatenate([ensemble.missing_left for ensemble in ensembles]),
+            value=np.concatenate([ensemble.value for ensemble in ensembles]),
+            roots=np.concatenate([e.roots + offset for e, offset in zip(ensembles, node_offsets)]).astype(np.int32),
+            max_depth=max(ensemble.max_depth for ensemble in ensembles),
+            combine="sum",
+            scale=1.0,
+            baseline=0.0
+        )
+        return stacked, [slice(start, stop) for start, stop in zip(tree_bounds[:-1], tree_bounds[1:])]
+
+    # leaf value reached in every tree for every row, shape (n_trees, n_rows), or (n_trees, n_rows, n_outputs)
+    # for a multi-output forest
+    def leaf_values(self, X):
+        # sklearn compares float32 inputs against float64 thresholds, so cast the same way
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        has_missing = bool(np.isnan(X).any())
+        out = np.empty((self.n_trees, n_rows) + self.value.shape[1:], dtype=np.float64)
+        for start in range(0, n_rows, ROW_CHUNK):
+            chunk = X[start:start + ROW_CHUNK].ravel()
+            size = len(chunk) // n_features
+            # flat offset of each row's first feature, so one np.take reads x[row, feature[node]]
+            row_offsets = np.arange(size, dtype=np.int32) * n_features
+            nodes = np.repeat(self.roots[:, None], size, axis=1)
+            for _ in range(self.max_depth):
+                x = np.take(chunk, row_offsets + np.take(self.feature, nodes))
+                if has_missing:
+                    go_right = np.where(np.isnan(x), ~np.take(self.missing_left, nodes), x > np.take(self.threshold, nodes))
+                else:
+                    go_right = x > np.take(self.threshold, nodes)
+                # children are stored as [left, right] pairs, so the branch is just an index offset
+                nodes = np.take(self.children, 2 * nodes + go_right)
+            out[:, start:start + size] = np.take(self.value, nodes, axis=0)
+        return out
+
+    # combines per-tree values in the same order as sklearn, so results are bit-for-bit equal
+    def combine_leaves(self, leaves):
+        if self.combine == "mean":
+            out = np.zeros(leaves.shape[1:], dtype=np.float64)
+            for t in range(self.n_trees):
+                out += leaves[t]
+            out /= self.n_trees
+        else:
+            out = np.full(leaves.shape[1], self.baseline, dtype=np.float64)
+            for t in range(self.n_trees):
+                out += self.scale * leaves[t]
+        return out
+
+    def predict(self, X):
+        return self.combine_leaves(self.leaf_values(X))
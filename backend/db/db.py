@@ -1,16 +1,8 @@
-import os
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import urllib.parse
+from backend.db.engine import get_engine
 
-DB_USER = os.getenv("DB_USER")
-DB_PASS = urllib.parse.quote_plus(os.getenv("DB_PASS", ""))
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-
-DB_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
-
-engine = create_engine(DB_URL)
+# shares the pooled engine with the prediction pipeline
+engine = get_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -0,0 +1,107 @@
+import os
+import time
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from dotenv import load_dotenv
+
+# the database settings come from .env; loaded here so every entry point that opens a connection sees them
+load_dotenv()
+
+# pool settings, tuned through environment variables
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# recycle before MySQL/RDS wait_timeout closes idle connections on its side
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# driver for streamed reads: mysql-connector has no server-side cursors (SQLAlchemy buffers its results),
+# PyMySQL's SSCursor hands rows over as the server sends them
+STREAM_DRIVER = os.getenv("DB_STREAM_DRIVER", "pymysql")
+
+_engine = None
+_stream_engine = None
+_engine_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics = {"connects": 0, "checkouts": 0, "checkins": 0, "waits": 0, "wait_seconds_total": 0.0, "max_wait_seconds": 0.0}
+
+# builds the MySQL connection url from the environment, adding the RDS CA bundle when configured
+def build_db_url(driver="mysqlconnector"):
+    DB_USER = os.getenv("DB_USER")
+    DB_PASS = urllib.parse.quote_plus(os.getenv("DB_PASS", ""))
+    DB_HOST = os.getenv("DB_HOST")
+    DB_NAME = os.getenv("DB_NAME", "nba_analysis")
+    SSL_CERT = os.getenv("RDS_SSL_CERT")
+
+    DB_URL = f"mysql+{driver}://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
+    if SSL_CERT:
+        DB_URL += f"?ssl_ca={SSL_CERT}"
+    return DB_URL
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+# creates an engine with the shared pool settings and checkout counters attached
+def create_pooled_engine(url):
+    engine = create_engine(
+        url,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+    )
+    event.listen(engine, "connect", lambda dbapi_conn, record: _count("connects"))
+    event.listen(engine, "checkout", lambda dbapi_conn, record, proxy: _count("checkouts"))
+    event.listen(engine, "checkin", lambda dbapi_conn, record: _count("checkins"))
+    return engine
+
+# the process-wide engine used by the API, data loader and prediction pipeline
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_pooled_engine(build_db_url())
+    return _engine
+
+# engine for reads streamed with stream_results=True, on its own pool so a long stream
+# doesn't hold one of the connections the API and the loaders share
+def get_stream_engine():
+    global _stream_engine
+    if _stream_engine is None:
+        with _engine_lock:
+            if _stream_engine is None:
+                _stream_engine = create_pooled_engine(build_db_url(STREAM_DRIVER))
+    return _stream_engine
+
+# checks out a pooled connection, recording how long the caller waited for it
+@contextmanager
+def connect(engine=None):
+    engine = engine or get_engine()
+    start = time.perf_counter()
+    conn = engine.connect()
+    waited = time.perf_counter() - start
+    with _metrics_lock:
+        _metrics["waits"] += 1
+        _metrics["wait_seconds_total"] += waited
+        _metrics["max_wait_seconds"] = max(_metrics["max_wait_seconds"], waited)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+# pool occupancy plus checkout and wait counters
+def pool_metrics(engine=None):
+    engine = engine or _engine
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics["wait_seconds_total"] = round(metrics["wait_seconds_total"], 4)
+    metrics["max_wait_seconds"] = round(metrics["max_wait_seconds"], 4)
+    if engine is not None:
+        metrics["pool_size"] = engine.pool.size()
+        metrics["checked_out"] = engine.pool.checkedout()
+        metrics["overflow"] = engine.pool.overflow()
+    return metrics
@@ -1,31 +1,297 @@
-from fastapi import APIRouter, Query, HTTPException
-from backend.services.model_services import run_predictions
+from fastapi import APIRouter, Query, HTTPException, BackgroundTasks, Header, Request
+from fastapi.responses import Response, StreamingResponse
+from backend.services.model_services import (
+    run_predictions_frame_async, stream_predictions_async, prediction_cache, batcher, io_executor, cpu_executor,
+    prepare_feature_rows, predict_feature_rows_async, sweep_predictions_async, targets_without_intervals,
+    cached_lane, compute_lane, upload_lane, PREDICT_BATCH_INPUT_MAX_ROWS, PREDICT_BATCH_MAX_BYTES
+)
+from backend.services.admission import Overloaded
+from backend.services.freshness import prediction_snapshot, prediction_etag
+from backend.services.serialization import (
+    negotiate_format, arrow_available, encode_records, encode_columnar, encode_ndjson, ArrowStreamEncoder,
+    decode_columnar, decode_arrow, encode_column_arrays, encode_arrow_columns, MEDIA_TYPES, NDJSON, COLUMNAR, ARROW
+)
+from backend.ML_training.artifact_registry import registry, list_available_targets
+from backend.db.engine import pool_metrics
+from backend.services.warmup import is_ready, warmup_state
+from functools import partial
+import asyncio
 import os
 import traceback
 
 router = APIRouter()
+
+# columns copied from a /predict/batch body into its response so rows can be matched up
+BATCH_PASSTHROUGH_COLUMNS = ["Player", "TEAM"]
+
+# seconds a client or reverse proxy may reuse a /predict response without revalidating
+PREDICT_MAX_AGE = int(os.getenv("PREDICT_MAX_AGE", "30"))
+
+# caching headers for a response; without an ETag (data watermark unknown) caches must revalidate every time
+def cache_headers(etag):
+    if etag is None:
+        return {"Cache-Control": "no-cache", "Vary": "Accept"}
+    return {"ETag": etag, "Cache-Control": f"public, max-age={PREDICT_MAX_AGE}", "Vary": "Accept"}
+
+# If-None-Match check, the header can hold a list of tags or "*"
+def etag_matches(if_none_match, etag):
+    if not if_none_match or etag is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # weak comparison, as If-None-Match requires
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+# 400 when a requested target's model can't give intervals (GradientBoosting trained without quantile companions)
+async def check_intervals(targets, model_dir):
+    loop = asyncio.get_running_loop()
+    missing = await loop.run_in_executor(io_executor, targets_without_intervals, targets, model_dir)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Prediction intervals are not available for targets: {missing}")
+
+# fast rejection for a request the prediction lanes couldn't admit
+def overloaded(e):
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+# request body read piece by piece, 413 as soon as it grows past max_bytes
+# (Content-Length is checked up front but can be missing with a chunked upload)
+async def read_body(request, max_bytes):
+    parts, size = [], 0
+    async for part in request.stream():
+        size += len(part)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"At most {max_bytes} bytes per request")
+        parts.append(part)
+    return b"".join(parts)
+
+# next chunk of an async generator, None once it is exhausted
+async def next_chunk(chunks):
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+# encodes streamed chunks as NDJSON lines or one Arrow IPC stream
+async def encode_stream(first_chunk, chunks, output):
+    encoder = ArrowStreamEncoder() if output == ARROW else None
+    chunk = first_chunk
+    try:
+        while chunk is not None:
+            yield encoder.encode(chunk) if encoder else encode_ndjson(chunk)
+            chunk = await next_chunk(chunks)
+        if encoder:
+            yield encoder.close()
+    except Exception as e:
+        # headers are already sent, so the error can only be logged
+        print("Exception while streaming /predict:", str(e))
+        traceback.print_exc()
+        raise
+    finally:
+        await chunks.aclose()
+
 @router.get("/predict")
-def predict(
+async def predict(
     team: str = Query(None),
     season: int = Query(None),
-    targets: list[str] = Query(default=["3P", "3PA"])
+    targets: list[str] = Query(default=["3P", "3PA"]),
+    live: bool = Query(False),  # skip the materialized store and run the full pipeline
+    intervals: bool = Query(False),  # add Predicted_<target>_lower / _upper bounds (always computed live)
+    format: str = Query(None),  # json (default), ndjson, columnar or arrow; also negotiated from Accept
+    accept: str = Header(None),
+    if_none_match: str = Header(None)
 ):
     model_dir = "backend/ML_training/models/production"
-    available_models = {f.split("_")[0] for f in os.listdir(model_dir) if f.endswith("_best_model.pkl")}
+    available_models = list_available_targets(model_dir)
     unsupported = [t for t in targets if t not in available_models]
 
     if unsupported:
         raise HTTPException(status_code=400, detail=f"Unsupported targets: {unsupported}")
 
     try:
-        results = run_predictions(
+        output = negotiate_format(format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if output == ARROW and not arrow_available():
+        raise HTTPException(status_code=406, detail="Arrow output requires the pyarrow package")
+    if intervals:
+        await check_intervals(targets, model_dir)
+
+    try:
+        # the response only changes with a model promotion or a data refresh, so a matching
+        # If-None-Match is answered before any pipeline stage runs
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(io_executor, partial(prediction_snapshot, targets, model_dir))
+        etag = None
+        if snapshot[1] is not None:
+            etag = prediction_etag((tuple(targets), team, season, live, output, intervals), snapshot)
+        headers = cache_headers(etag)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        if output in (NDJSON, ARROW):
+            chunks = stream_predictions_async(
+                targets=targets, team=team, season=season, model_dir=model_dir, live=live, intervals=intervals
+            )
+            # read the first chunk before answering so pipeline errors still become a 500
+            first_chunk = await next_chunk(chunks)
+            return StreamingResponse(
+                encode_stream(first_chunk, chunks, output), media_type=MEDIA_TYPES[output], headers=headers
+            )
+
+        results = await run_predictions_frame_async(
             targets=targets,
             team=team,
             season=season,
-            model_dir=model_dir
+            model_dir=model_dir,
+            live=live,
+            snapshot=snapshot,
+            intervals=intervals
         )
-        return results
+        body = encode_columnar(results) if output == COLUMNAR else encode_records(results)
+        return Response(content=body, media_type=MEDIA_TYPES[output], headers=headers)
+    except Overloaded as e:
+        raise overloaded(e)
     except Exception as e:
         print("Exception in /predict:", str(e))
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# predictions for caller-supplied feature rows ("what-if" stat lines) that don't need to exist in the database.
+# the body is columnar JSON {"column": [values, ...]} or an Arrow IPC stream with every feature the targets
+# were trained on; Player / TEAM columns are passed through. the response is columnar JSON or Arrow
+@router.post("/predict/batch")
+async def predict_batch(
+    request: Request,
+    targets: list[str] = Query(default=["3P", "3PA"]),
+    intervals: bool = Query(False),
+    format: str = Query(None),  # columnar (default) or arrow; also negotiated from Accept
+    accept: str = Header(None),
+    content_type: str = Header(None),
+    content_length: int = Header(None)
+):
+    model_dir = "backend/ML_training/models/production"
+    unsupported = [t for t in targets if t not in list_available_targets(model_dir)]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported targets: {unsupported}")
+
+    try:
+        output = negotiate_format(format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if output == NDJSON:
+        raise HTTPException(status_code=400, detail="/predict/batch returns columnar JSON or arrow")
+    arrow_input = (content_type or "").split(";")[0].strip().lower() == MEDIA_TYPES[ARROW]
+    if (output == ARROW or arrow_input) and not arrow_available():
+        raise HTTPException(status_code=406 if output == ARROW else 415, detail="Arrow requires the pyarrow package")
+    if intervals:
+        await check_intervals(targets, model_dir)
+    if content_length is not None and content_length > PREDICT_BATCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"At most {PREDICT_BATCH_MAX_BYTES} bytes per request")
+
+    loop = asyncio.get_running_loop()
+    try:
+        # the upload slot is taken before the body is read and held until the response is encoded,
+        # requests waiting for it haven't loaded anything yet
+        async with upload_lane.slot():
+            body = await read_body(request, PREDICT_BATCH_MAX_BYTES)
+            try:
+                columns, n_rows = await loop.run_in_executor(cpu_executor, decode_arrow if arrow_input else decode_columnar, body)
+                if n_rows > PREDICT_BATCH_INPUT_MAX_ROWS:
+                    raise HTTPException(status_code=413, detail=f"At most {PREDICT_BATCH_INPUT_MAX_ROWS} rows per request")
+                bundles, arrays = await loop.run_in_executor(
+                    cpu_executor, partial(prepare_feature_rows, columns, targets, model_dir)
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+
+            predictions = await predict_feature_rows_async(arrays, n_rows, bundles, intervals)
+            results = {col: columns[col] for col in BATCH_PASSTHROUGH_COLUMNS if col in columns}
+            results.update(predictions)
+            if output == ARROW:
+                body = await loop.run_in_executor(cpu_executor, encode_arrow_columns, results)
+            else:
+                # passed-through columns from an Arrow body are object arrays, orjson only writes numeric ones
+                results = {col: values.tolist() if getattr(values, "dtype", None) == object else values
+                           for col, values in results.items()}
+                body = await loop.run_in_executor(cpu_executor, encode_column_arrays, results)
+            return Response(content=body, media_type=MEDIA_TYPES[output])
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise overloaded(e)
+    except Exception as e:
+        print("Exception in /predict/batch:", str(e))
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# "predicted 3P as FGA varies" curves for every player matching team / season / player.
+# each feature is swept over `points` values between lo and hi (default: training mean +- 2 std)
+@router.get("/predict/sweep")
+async def predict_sweep(
+    features: list[str] = Query(...),
+    team: str = Query(None),
+    season: int = Query(None),
+    player: str = Query(None),
+    targets: list[str] = Query(default=["3P", "3PA"]),
+    points: int = Query(50),
+    lo: float = Query(None),
+    hi: float = Query(None)
+):
+    model_dir = "backend/ML_training/models/production"
+    unsupported = [t for t in targets if t not in list_available_targets(model_dir)]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported targets: {unsupported}")
+
+    try:
+        sweeps = await sweep_predictions_async(
+            targets, features, team=team, season=season, player=player, points=points, lo=lo, hi=hi, model_dir=model_dir
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded as e:
+        raise overloaded(e)
+    except Exception as e:
+        print("Exception in /predict/sweep:", str(e))
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=encode_column_arrays(sweeps), media_type=MEDIA_TYPES[COLUMNAR])
+
+# rebuilds the materialized prediction table, called by the scraper after each data refresh.
+# closed unless PREDICTION_REFRESH_TOKEN is configured
+@router.post("/predict/refresh")
+def refresh_predictions(background_tasks: BackgroundTasks, x_refresh_token: str = Header(None)):
+    token = os.getenv("PREDICTION_REFRESH_TOKEN")
+    if not token:
+        raise HTTPException(status_code=403, detail="Prediction refresh is disabled, PREDICTION_REFRESH_TOKEN is not set")
+    if x_refresh_token != token:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    from backend.services.prediction_store import refresh_prediction_store
+
+    model_dir = "backend/ML_training/models/production"
+    targets = sorted(list_available_targets(model_dir))
+    background_tasks.add_task(refresh_prediction_store, targets, model_dir)
+    return {"status": "scheduled", "targets": targets}
+
+# cache, coalescing and pool counters
+@router.get("/metrics")
+def metrics():
+    from backend.services.prediction_store import store_stats
+    from backend.ML_training.sensitivity import curve_cache
+
+    return {
+        "artifacts": registry.stats(),
+        "prediction_store": store_stats,
+        "prediction_cache": prediction_cache.stats(),
+        "batching": batcher.stats(),
+        "admission": {"cached": cached_lane.stats(), "compute": compute_lane.stats(), "upload": upload_lane.stats()},
+        "sweep_cache": curve_cache.stats(),
+        "db_pool": pool_metrics(),
+        "warmup": warmup_state
+    }
+
+# readiness probe, 503 until startup warm-up has loaded every model and the database answers
+@router.get("/ready")
+def ready():
+    if not is_ready():
+        raise HTTPException(status_code=503, detail=warmup_state)
+    return {"status": "ready", "warmup": warmup_state}
@@ -0,0 +1,126 @@
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+
+# Admission control for prediction work.
+# A lane runs at most max_concurrency requests at once and lets at most max_queue more wait for a slot.
+# A request arriving to a full queue is turned away at once (429) and one that waited queue_timeout
+# seconds gives up (503), both with a Retry-After estimated from how long recent requests held a slot.
+# Requests already queued don't hold any data, so memory is bounded by what the running ones load.
+# Waiters are futures on their own event loop, so one lane can be shared by requests running on
+# different loops (the test client runs each call on its own).
+
+class Overloaded(Exception):
+    def __init__(self, lane, status_code, retry_after, reason):
+        super().__init__(f"{lane} prediction lane is {reason}, retry in {retry_after}s")
+        self.lane = lane
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class AdmissionLane:
+    def __init__(self, name, max_concurrency, max_queue, queue_timeout):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._running = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        # moving average of how long a request holds a slot, for Retry-After
+        self._hold_seconds = None
+        self._stats = {
+            "admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0,
+            "wait_seconds_total": 0.0, "max_wait_seconds": 0.0,
+        }
+
+    def retry_after(self, waiting=None):
+        waiting = len(self._waiters) if waiting is None else waiting
+        hold = self._hold_seconds or 1.0
+        return max(1, math.ceil(hold * (waiting + 1) / max(self.max_concurrency, 1)))
+
+    async def acquire(self):
+        with self._lock:
+            if self._running < self.max_concurrency and not self._waiters:
+                self._running += 1
+                self._stats["admitted"] += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._stats["rejected_full"] += 1
+                raise Overloaded(self.name, 429, self.retry_after(), "full")
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            self._stats["queued"] += 1
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[1]), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    # the slot was handed over just as we gave up, pass it on
+                    self._release_locked()
+                self._record_wait(time.perf_counter() - start)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self._stats["rejected_timeout"] += 1
+                raise Overloaded(self.name, 503, self.retry_after(), "busy") from None
+        with self._lock:
+            self._stats["admitted"] += 1
+            self._record_wait(time.perf_counter() - start)
+
+    def release(self, held_seconds=None):
+        with self._lock:
+            if held_seconds is not None:
+                self._hold_seconds = held_seconds if self._hold_seconds is None else 0.8 * self._hold_seconds + 0.2 * held_seconds
+            self._release_locked()
+
+    # hands the slot to the oldest waiter (the running count stays the same), or frees it
+    def _release_locked(self):
+        if self._waiters:
+            loop, future = self._waiters.popleft()
+            loop.call_soon_threadsafe(_grant, future)
+            return
+        self._running -= 1
+
+    def _record_wait(self, seconds):
+        self._stats["wait_seconds_total"] += seconds
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], seconds)
+
+    # async with lane.slot(): ... holds a slot for the block
+    def slot(self):
+        return _Slot(self)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, running=self._running, waiting=len(self._waiters))
+        queued = stats["queued"] or 1
+        stats.update(
+            avg_queue_wait_ms=round(stats.pop("wait_seconds_total") / queued * 1000, 3),
+            max_queue_wait_ms=round(stats.pop("max_wait_seconds") * 1000, 3),
+            avg_hold_ms=round((self._hold_seconds or 0.0) * 1000, 3),
+            max_concurrency=self.max_concurrency,
+            max_queue=self.max_queue,
+            queue_timeout=self.queue_timeout,
+        )
+        return stats
+
+def _grant(future):
+    if not future.done():
+        future.set_result(True)
+
+class _Slot:
+    def __init__(self, lane):
+        self.lane = lane
+        self.start = None
+
+    async def __aenter__(self):
+        await self.lane.acquire()
+        self.start = time.perf_counter()
+
+    async def __aexit__(self, *exc):
+        self.lane.release(time.perf_counter() - self.start)
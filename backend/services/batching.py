@@ -0,0 +1,109 @@
+import time
+import asyncio
+import threading
+
+# Micro-batching for model inference.
+# Concurrent requests for the same target each bring a small feature matrix (one team, one player...),
+# and at that size sklearn's per-call overhead dominates. Requests arriving within a short window are
+# stacked into one matrix, predicted in a single call on the CPU pool and each gets its own rows back.
+# Tree ensembles predict every row independently, so the batched result equals the per-request one.
+# When the model is idle a batch goes out on the next loop iteration (picking up whatever arrived in the
+# same tick), so a lone request doesn't pay the window; the window only applies while a batch is running.
+class MicroBatcher:
+    def __init__(self, executor, window_ms=2.0, max_rows=8192):
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        # (event loop, pipeline) -> pending batch waiting for its window to close
+        self._pending = {}
+        # (event loop, pipeline) -> batches currently being predicted
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "batches": 0, "requests": 0, "rows": 0, "max_batch_requests": 0, "max_batch_rows": 0,
+            "wait_seconds_total": 0.0, "predict_seconds_total": 0.0,
+        }
+
+    # predictions for X from pipeline.predict_matrix, batched with other callers of the same pipeline
+    async def predict(self, pipeline, X):
+        loop = asyncio.get_running_loop()
+        if self.window <= 0:
+            return await loop.run_in_executor(self.executor, pipeline.predict_matrix, X)
+
+        key = (loop, pipeline)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = {"pipeline": pipeline, "items": [], "rows": 0, "opened": time.perf_counter()}
+            self._pending[key] = batch
+            if self._running.get(key):
+                batch["timer"] = loop.call_later(self.window, self._flush, key)
+            else:
+                batch["timer"] = loop.call_soon(self._flush, key)
+        future = loop.create_future()
+        batch["items"].append((X, future))
+        batch["rows"] += len(X)
+        # a full batch goes right away instead of waiting out the window
+        if batch["rows"] >= self.max_rows:
+            batch["timer"].cancel()
+            self._flush(key)
+        return await future
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        loop = key[0]
+        waited = time.perf_counter() - batch["opened"]
+        self._running[key] = self._running.get(key, 0) + 1
+        task = loop.run_in_executor(self.executor, self._run_batch, batch["pipeline"], [X for X, _ in batch["items"]])
+        task.add_done_callback(lambda done: self._deliver(key, batch, done))
+        with self._lock:
+            stats = self._stats
+            stats["batches"] += 1
+            stats["requests"] += len(batch["items"])
+            stats["rows"] += batch["rows"]
+            stats["max_batch_requests"] = max(stats["max_batch_requests"], len(batch["items"]))
+            stats["max_batch_rows"] = max(stats["max_batch_rows"], batch["rows"])
+            stats["wait_seconds_total"] += waited
+
+    # one predict call over the stacked rows, split back into the callers' slices
+    def _run_batch(self, pipeline, matrices):
+        import numpy as np
+
+        start = time.perf_counter()
+        stacked = matrices[0] if len(matrices) == 1 else np.concatenate(matrices)
+        predictions = pipeline.predict_matrix(stacked)
+        with self._lock:
+            self._stats["predict_seconds_total"] += time.perf_counter() - start
+        bounds = np.cumsum([len(X) for X in matrices])[:-1]
+        return np.split(predictions, bounds)
+
+    def _deliver(self, key, batch, done):
+        self._running[key] -= 1
+        if not self._running[key]:
+            del self._running[key]
+        futures = [future for _, future in batch["items"]]
+        if done.cancelled() or done.exception() is not None:
+            error = done.exception() if not done.cancelled() else asyncio.CancelledError()
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, predictions in zip(futures, done.result()):
+            if not future.done():
+                future.set_result(predictions)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        stats.update(
+            queue_depth=sum(len(batch["items"]) for batch in list(self._pending.values())),
+            avg_batch_requests=round(stats["requests"] / batches, 3),
+            avg_batch_rows=round(stats["rows"] / batches, 1),
+            avg_wait_ms=round(stats["wait_seconds_total"] / batches * 1000, 3),
+            avg_predict_ms=round(stats["predict_seconds_total"] / batches * 1000, 3),
+            window_ms=self.window * 1000,
+            max_rows=self.max_rows,
+        )
+        return stats
@@ -0,0 +1,79 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+# short-lived result cache with single-flight: identical concurrent requests share one computation.
+# keys should include everything the result depends on (query, model versions, data watermark),
+# so a promotion or data refresh naturally misses instead of serving stale results.
+class SingleFlightCache:
+    def __init__(self, ttl, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._inflight_async = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, key):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._results[key]
+            return None
+        return entry
+
+    def _store(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._results[key] = (time.monotonic() + self.ttl, value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    # compute is a coroutine function. the shared work runs as its own task,
+    # so a leader whose client disconnects doesn't cancel it for everyone else.
+    # in-flight tasks are tracked per event loop since a task can only be awaited from its own loop
+    async def get_or_compute_async(self, key, compute):
+        flight_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            task = self._inflight_async.get(flight_key)
+            if task is None:
+                task = asyncio.ensure_future(compute())
+                self._inflight_async[flight_key] = task
+                task.add_done_callback(lambda done: self._finish_async(flight_key, done))
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish_async(self, flight_key, task):
+        with self._lock:
+            self._inflight_async.pop(flight_key, None)
+        key = flight_key[1]
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, task.result())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._results),
+                "in_flight": len(self._inflight_async),
+                "ttl_seconds": self.ttl,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,61 @@
+import os
+import time
+import hashlib
+import logging
+from contextlib import nullcontext
+from sqlalchemy import text
+from backend.db.engine import connect
+from backend.ML_training.artifact_registry import get_model_version
+
+# how long a table's watermark is trusted before asking the database again
+WATERMARK_TTL = float(os.getenv("DATA_WATERMARK_TTL", "30"))
+
+_watermarks = {}
+
+# last time the table was written, taken from MySQL's table metadata.
+# the scraper replaces current_data_table, so CREATE_TIME moves even when UPDATE_TIME is empty.
+# conn is a connection the caller already holds, otherwise one is checked out
+def get_data_watermark(table_name="current_data_table", conn=None):
+    cached = _watermarks.get(table_name)
+    if cached is not None and time.monotonic() - cached[0] < WATERMARK_TTL:
+        return cached[1]
+
+    query = text(
+        "SELECT COALESCE(UPDATE_TIME, CREATE_TIME) FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name"
+    )
+    with (nullcontext(conn) if conn is not None else connect()) as conn:
+        try:
+            # MySQL 8 caches table statistics for a day unless told otherwise
+            conn.execute(text("SET SESSION information_schema_stats_expiry = 0"))
+        except Exception as e:
+            logging.debug(f"Could not disable information_schema stats caching: {e}")
+        value = conn.execute(query, {"table_name": table_name}).scalar()
+
+    watermark = value.isoformat() if value is not None else None
+    _watermarks[table_name] = (time.monotonic(), watermark)
+    return watermark
+
+# drops cached watermarks, used after this process rewrites a table
+def forget_data_watermarks():
+    _watermarks.clear()
+
+# current production model version for each target
+def get_model_versions(targets, model_dir):
+    return {target: get_model_version(target, model_dir) for target in targets}
+
+# everything a prediction result depends on besides the query: model versions and the data watermark.
+# the watermark is None when the database can't be asked
+def prediction_snapshot(targets, model_dir, table_name="current_data_table"):
+    try:
+        watermark = get_data_watermark(table_name)
+    except Exception as e:
+        logging.warning(f"Could not read the data watermark for {table_name}: {e}")
+        watermark = None
+    versions = tuple(sorted(get_model_versions(sorted(set(targets)), model_dir).items()))
+    return versions, watermark
+
+# strong validator for a /predict response, same query and representation over the same snapshot give the same tag
+def prediction_etag(query, snapshot):
+    digest = hashlib.sha1(repr((query, snapshot)).encode()).hexdigest()
+    return f'"{digest}"'
@@ -1,14 +1,215 @@
-from backend.ML_training.predictions import predict_all_targets
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from backend.services.freshness import prediction_snapshot
+from backend.services.coalescing import SingleFlightCache
+from backend.services.batching import MicroBatcher
+from backend.services.admission import AdmissionLane
 
-def run_predictions(targets, team=None, season=None, model_dir="backend/ML_training/models/production"):
-    from backend.ML_training.predictions import predict_all_targets
+# prediction work runs on its own bounded pools so a burst of /predict calls
+# can't use up the default threadpool that serves the auth endpoints.
+# admission happens in two lanes: "cached" for reads of the materialized store, "compute" for anything
+# running the model pipeline (live predictions, batches, sweeps), which loads rows and can be expensive.
+# each lane runs a bounded number of requests and queues a bounded number more, see admission.py.
+# POST /predict/batch is also admitted to an "upload" lane before its body is read, so only a bounded
+# number of uploaded bodies (and their decoded columns) are held in memory at once
+PREDICT_MAX_CONCURRENCY = int(os.getenv("PREDICT_MAX_CONCURRENCY", "4"))
+PREDICT_QUEUE_SIZE = int(os.getenv("PREDICT_QUEUE_SIZE", "16"))
+PREDICT_QUEUE_TIMEOUT = float(os.getenv("PREDICT_QUEUE_TIMEOUT", "10"))
+PREDICT_CACHED_CONCURRENCY = int(os.getenv("PREDICT_CACHED_CONCURRENCY", "16"))
+PREDICT_CACHED_QUEUE_SIZE = int(os.getenv("PREDICT_CACHED_QUEUE_SIZE", "64"))
+PREDICT_CACHED_QUEUE_TIMEOUT = float(os.getenv("PREDICT_CACHED_QUEUE_TIMEOUT", "2"))
+PREDICT_IO_WORKERS = int(os.getenv("PREDICT_IO_WORKERS", "8"))
+PREDICT_CPU_WORKERS = int(os.getenv("PREDICT_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+# rows per chunk for streamed responses
+PREDICT_CHUNK_ROWS = int(os.getenv("PREDICT_CHUNK_ROWS", "1000"))
 
-    return predict_all_targets(
-        new_table="current_data_table",
-        reference_table="historical_data_table",
-        targets=targets,
-        team=team,
-        season=season,
-        model_dir=model_dir
-    ).to_dict(orient="records")
+# how long concurrent requests for the same target are collected into one model call (0 disables batching)
+PREDICT_BATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2"))
+# a batch is sent as soon as it holds this many rows
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "8192"))
 
+PREDICT_UPLOAD_CONCURRENCY = int(os.getenv("PREDICT_UPLOAD_CONCURRENCY", "4"))
+PREDICT_UPLOAD_QUEUE_SIZE = int(os.getenv("PREDICT_UPLOAD_QUEUE_SIZE", "8"))
+PREDICT_UPLOAD_QUEUE_TIMEOUT = float(os.getenv("PREDICT_UPLOAD_QUEUE_TIMEOUT", "10"))
+# largest POST /predict/batch body in bytes, bigger ones are rejected (413) before they are read
+PREDICT_BATCH_MAX_BYTES = int(os.getenv("PREDICT_BATCH_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# largest number of rows accepted by POST /predict/batch, and the row chunk each CPU worker predicts
+PREDICT_BATCH_INPUT_MAX_ROWS = int(os.getenv("PREDICT_BATCH_INPUT_MAX_ROWS", "200000"))
+PREDICT_BATCH_CHUNK_ROWS = int(os.getenv("PREDICT_BATCH_CHUNK_ROWS", "16384"))
+
+# seconds a computed result is reused for an identical query (0 disables the cache, not coalescing)
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "30"))
+
+io_executor = ThreadPoolExecutor(max_workers=PREDICT_IO_WORKERS, thread_name_prefix="predict-io")
+cpu_executor = ThreadPoolExecutor(max_workers=PREDICT_CPU_WORKERS, thread_name_prefix="predict-cpu")
+cached_lane = AdmissionLane("cached", PREDICT_CACHED_CONCURRENCY, PREDICT_CACHED_QUEUE_SIZE, PREDICT_CACHED_QUEUE_TIMEOUT)
+compute_lane = AdmissionLane("compute", PREDICT_MAX_CONCURRENCY, PREDICT_QUEUE_SIZE, PREDICT_QUEUE_TIMEOUT)
+upload_lane = AdmissionLane("upload", PREDICT_UPLOAD_CONCURRENCY, PREDICT_UPLOAD_QUEUE_SIZE, PREDICT_UPLOAD_QUEUE_TIMEOUT)
+prediction_cache = SingleFlightCache(PREDICT_CACHE_TTL)
+batcher = MicroBatcher(cpu_executor, PREDICT_BATCH_WINDOW_MS, PREDICT_BATCH_MAX_ROWS)
+
+# cache key: the normalized query plus the production model versions and the data-refresh watermark
+def prediction_cache_key(targets, team=None, season=None, model_dir="backend/ML_training/models/production", live=False,
+                         snapshot=None, intervals=False):
+    if snapshot is None:
+        snapshot = prediction_snapshot(targets, model_dir)
+    return (tuple(sorted(set(targets))), team, season, live, os.path.abspath(model_dir), snapshot, intervals)
+
+# results are computed for the sorted target list, put the columns back in the requested order
+# (each target's interval bounds, when present, follow its prediction)
+def order_columns(results, targets):
+    predicted = [
+        col for target in dict.fromkeys(targets)
+        for col in [f"Predicted_{target}", f"Predicted_{target}_lower", f"Predicted_{target}_upper"]
+        if col == f"Predicted_{target}" or col in results.columns
+    ]
+    identity = [col for col in results.columns if not col.startswith("Predicted_")]
+    return results[identity + predicted]
+
+# the prediction pipeline (pandas, sklearn) is imported on first use inside these functions,
+# so importing this module from api_server doesn't load the ML stack for the auth routes
+
+# serves from the materialized prediction store when it is fresh, otherwise runs the live pipeline.
+# the store only holds point predictions, so interval requests always run live
+async def compute_predictions_async(targets, team=None, season=None, model_dir="backend/ML_training/models/production", live=False,
+                                    intervals=False):
+    from backend.ML_training.predictions import predict_all_targets_async
+    from backend.services.prediction_store import load_from_store
+
+    loop = asyncio.get_running_loop()
+    if not live and not intervals:
+        async with cached_lane.slot():
+            stored = await loop.run_in_executor(
+                io_executor, partial(load_from_store, targets, team=team, season=season, model_dir=model_dir)
+            )
+        if stored is not None:
+            return stored
+
+    # a store miss falls through to the pipeline and has to be admitted to the compute lane too
+    async with compute_lane.slot():
+        return await predict_all_targets_async(
+            new_table="current_data_table",
+            reference_table="historical_data_table",
+            targets=targets,
+            team=team,
+            season=season,
+            model_dir=model_dir,
+            io_executor=io_executor,
+            cpu_executor=cpu_executor,
+            batcher=batcher,
+            intervals=intervals
+        )
+
+# predictions for the /predict route as a DataFrame. identical concurrent calls share one computation and
+# recent results are reused. snapshot can be passed when the caller already read it (the route does for its ETag)
+async def run_predictions_frame_async(targets, team=None, season=None, model_dir="backend/ML_training/models/production",
+                                      live=False, snapshot=None, intervals=False):
+    loop = asyncio.get_running_loop()
+    key = await loop.run_in_executor(
+        io_executor, partial(prediction_cache_key, targets, team, season, model_dir, live, snapshot, intervals)
+    )
+    results = await prediction_cache.get_or_compute_async(
+        key, partial(compute_predictions_async, list(key[0]), team, season, model_dir, live, intervals)
+    )
+    return order_columns(results, targets)
+
+# yields prediction DataFrames chunk by chunk for streamed responses
+async def stream_predictions_async(targets, team=None, season=None, model_dir="backend/ML_training/models/production",
+                                   live=False, chunk_size=PREDICT_CHUNK_ROWS, intervals=False):
+    from backend.ML_training.predictions import iter_predictions
+    from backend.services.prediction_store import load_from_store
+
+    loop = asyncio.get_running_loop()
+    if not live and not intervals:
+        async with cached_lane.slot():
+            stored = await loop.run_in_executor(
+                io_executor, partial(load_from_store, targets, team=team, season=season, model_dir=model_dir)
+            )
+        if stored is not None:
+            for start in range(0, max(len(stored), 1), chunk_size):
+                yield stored.iloc[start:start + chunk_size]
+            return
+
+    # the compute slot is held until the stream has been read to the end (or abandoned)
+    async with compute_lane.slot():
+        chunks = iter_predictions(
+            "current_data_table", "historical_data_table", targets, model_dir,
+            team=team, season=season, chunk_size=chunk_size, intervals=intervals
+        )
+        try:
+            while True:
+                # each chunk is read and predicted off the event loop
+                chunk = await loop.run_in_executor(io_executor, next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            await loop.run_in_executor(io_executor, chunks.close)
+
+# validates caller-supplied feature columns for POST /predict/batch, raises ValueError for bad input.
+# returns the bundles (one release for all targets) and the float64 feature arrays
+def prepare_feature_rows(columns, targets, model_dir="backend/ML_training/models/production"):
+    from backend.ML_training.artifact_registry import get_target_bundles
+    from backend.ML_training.predictions import feature_row_arrays
+
+    bundles = get_target_bundles(list(dict.fromkeys(targets)), model_dir)
+    return bundles, feature_row_arrays(columns, bundles)
+
+# targets among `targets` whose models can't return prediction intervals
+def targets_without_intervals(targets, model_dir="backend/ML_training/models/production"):
+    from backend.ML_training.artifact_registry import get_target_bundles
+    from backend.ML_training.predictions import targets_without_intervals as missing_intervals
+
+    return missing_intervals(get_target_bundles(list(dict.fromkeys(targets)), model_dir))
+
+# one vectorized pass per target; large inputs are split into row chunks predicted in parallel
+# on cpu_executor (sklearn's tree code releases the GIL), returns {"Predicted_<target>": array}
+# plus the _lower / _upper bounds with intervals
+async def predict_feature_rows_async(arrays, n_rows, bundles, intervals=False):
+    import numpy as np
+    from backend.ML_training.predictions import (
+        feature_row_medians, interval_columns, group_bundles, group_pipeline, group_columns
+    )
+
+    async with compute_lane.slot():
+        loop = asyncio.get_running_loop()
+        medians = await loop.run_in_executor(io_executor, feature_row_medians, arrays, bundles)
+        predictions = {}
+        # targets of a shared multi-output bundle are predicted by one model call
+        for members in group_bundles(bundles):
+            if n_rows == 0:
+                empty = np.empty(0)
+                for bundle in members:
+                    if intervals:
+                        predictions.update(interval_columns(bundle.target, (empty,) * 3))
+                    else:
+                        predictions[f"Predicted_{bundle.target}"] = empty
+                continue
+            pipeline = group_pipeline(members)
+            predict = pipeline.predict_intervals_matrix if intervals else pipeline.predict_matrix
+            X = await loop.run_in_executor(cpu_executor, pipeline.transform_columns, arrays, n_rows, medians[members[0].target])
+            parts = await asyncio.gather(*[
+                loop.run_in_executor(cpu_executor, predict, X[start:start + PREDICT_BATCH_CHUNK_ROWS])
+                for start in range(0, n_rows, PREDICT_BATCH_CHUNK_ROWS)
+            ])
+            if intervals:
+                bounds = [np.concatenate([part[i] for part in parts]) for i in range(3)]
+                predictions.update(interval_columns(members[0].target, bounds))
+            else:
+                predictions.update(group_columns(members, np.concatenate(parts)))
+        return predictions
+
+# per-player sensitivity curves (see backend.ML_training.sensitivity), raises ValueError for bad parameters
+async def sweep_predictions_async(targets, features, team=None, season=None, player=None, points=50, lo=None, hi=None,
+                                  model_dir="backend/ML_training/models/production"):
+    from backend.ML_training.sensitivity import player_sweeps
+
+    async with compute_lane.slot():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(io_executor, partial(
+            player_sweeps, targets, features, team=team, season=season, player=player,
+            points=points, lo=lo, hi=hi, model_dir=model_dir
+        ))
@@ -0,0 +1,136 @@
+# Materialized predictions for every player and production target.
+# Rebuilt after each scrape (the scraper calls POST /predict/refresh) and each model promotion,
+# so /predict can serve a keyed read instead of running the full pipeline.
+# run using python -m backend.services.prediction_store
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+import pandas as pd
+import yaml
+from sqlalchemy import String, text
+from backend.ML_training.predictions import (
+    predict_all_targets, load_data_from_db, forget_table_columns, IDENTITY_COLUMNS
+)
+from backend.db.engine import get_engine, connect
+from backend.services.freshness import get_data_watermark, forget_data_watermarks, get_model_versions
+
+PREDICTION_TABLE = os.getenv("PREDICTION_TABLE", "prediction_table")
+# one row per target recording the model version and data watermark the table was built from. the versions
+# don't depend on the model directory's path (see get_model_version), so a store built by promote_models in
+# another checkout or by a worker on another host is valid for every worker serving the same models
+STATE_TABLE = f"{PREDICTION_TABLE}_state"
+# how long the store state is trusted before it is read again
+STATE_TTL = float(os.getenv("PREDICTION_STORE_STATE_TTL", "30"))
+
+_state = {"loaded_at": None, "targets": None}
+_refresh_lock = threading.Lock()
+store_stats = {"hits": 0, "misses": 0, "refreshes": 0, "last_refresh_seconds": None}
+
+# computes predictions for all players and writes them to the prediction table
+def materialize_predictions(targets, model_dir="backend/ML_training/models/production",
+                            new_table="current_data_table", reference_table="historical_data_table"):
+    # read the versions before predicting so a refresh that lands mid-build leaves the store stale, not wrong
+    forget_data_watermarks()
+    watermark = get_data_watermark(new_table)
+    versions = get_model_versions(targets, model_dir)
+    results = predict_all_targets(new_table, reference_table, targets, model_dir, include_season=True)
+
+    staging_table = f"{PREDICTION_TABLE}_new"
+    index_columns = [col for col in ["TEAM", "Season", "Player"] if col in results.columns]
+    with get_engine().begin() as conn:
+        results.to_sql(staging_table, conn, if_exists="replace", index=False,
+                       dtype={"Player": String(128), "TEAM": String(8)})
+        conn.execute(text(f"CREATE INDEX ix_{PREDICTION_TABLE}_lookup ON {staging_table} ({', '.join(index_columns)})"))
+        # swap the new table in with a single atomic rename so readers never see a missing table
+        existing = conn.execute(text(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = :table_name"
+        ), {"table_name": PREDICTION_TABLE}).scalar()
+        if existing:
+            conn.execute(text(f"DROP TABLE IF EXISTS {PREDICTION_TABLE}_old"))
+            conn.execute(text(f"RENAME TABLE {PREDICTION_TABLE} TO {PREDICTION_TABLE}_old, {staging_table} TO {PREDICTION_TABLE}"))
+            conn.execute(text(f"DROP TABLE {PREDICTION_TABLE}_old"))
+        else:
+            conn.execute(text(f"RENAME TABLE {staging_table} TO {PREDICTION_TABLE}"))
+
+        state = pd.DataFrame([{
+            "target": target,
+            "model_version": versions[target],
+            "data_watermark": watermark,
+            "built_at": datetime.utcnow(),
+            "row_count": len(results)
+        } for target in targets])
+        state.to_sql(STATE_TABLE, conn, if_exists="replace", index=False)
+
+    forget_table_columns(PREDICTION_TABLE)
+    _state["loaded_at"] = None
+    logging.info(f"Materialized {len(results)} prediction rows for targets {targets} into {PREDICTION_TABLE}")
+    return len(results)
+
+# rebuilds the store, logging instead of raising so callers (promotion, refresh endpoint) keep going
+def refresh_prediction_store(targets, model_dir="backend/ML_training/models/production"):
+    with _refresh_lock:
+        start = time.perf_counter()
+        try:
+            materialize_predictions(targets, model_dir)
+        except Exception as e:
+            logging.error(f"Prediction store refresh failed: {e}")
+            return False
+        store_stats["refreshes"] += 1
+        store_stats["last_refresh_seconds"] = round(time.perf_counter() - start, 3)
+        return True
+
+# reads the per-target state of the store, None when the store has not been built
+def read_store_state():
+    if _state["loaded_at"] is not None and time.monotonic() - _state["loaded_at"] < STATE_TTL:
+        return _state["targets"]
+    try:
+        with connect() as conn:
+            rows = conn.execute(text(f"SELECT target, model_version, data_watermark FROM {STATE_TABLE}")).mappings().all()
+        targets = {row["target"]: dict(row) for row in rows}
+    except Exception as e:
+        logging.debug(f"Prediction store state unavailable: {e}")
+        targets = None
+    _state["loaded_at"] = time.monotonic()
+    _state["targets"] = targets
+    return targets
+
+# serves predictions from the store, returns None on a miss (store missing, stale or incomplete)
+def load_from_store(targets, team=None, season=None, model_dir="backend/ML_training/models/production",
+                    new_table="current_data_table"):
+    state = read_store_state()
+    if not state or any(target not in state for target in targets):
+        store_stats["misses"] += 1
+        return None
+
+    try:
+        versions = get_model_versions(targets, model_dir)
+        watermark = get_data_watermark(new_table)
+        if any(state[target]["model_version"] != versions[target] or state[target]["data_watermark"] != watermark
+               for target in targets):
+            store_stats["misses"] += 1
+            return None
+
+        prediction_columns = [f"Predicted_{target}" for target in targets]
+        df = load_data_from_db(PREDICTION_TABLE, team=team, season=season, columns=IDENTITY_COLUMNS + prediction_columns)
+    except Exception as e:
+        logging.warning(f"Prediction store read failed, falling back to live predictions: {e}")
+        store_stats["misses"] += 1
+        return None
+
+    if any(col not in df.columns for col in prediction_columns):
+        # the table was rebuilt by another worker with new targets since its columns were read
+        forget_table_columns(PREDICTION_TABLE)
+        store_stats["misses"] += 1
+        return None
+
+    store_stats["hits"] += 1
+    return df
+
+if __name__ == "__main__":
+    with open("config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    rows = materialize_predictions(config.get("targets", []))
+    print(f"Materialized {rows} prediction rows into {PREDICTION_TABLE}")
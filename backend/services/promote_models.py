@@ -1,10 +1,23 @@
 # This script automates moving the latest models from staging to production.
-# run using python promote_models.py
+# run from the project root using python -m backend.services.promote_models
 
 import os
+import json
+import time
 import shutil
 import yaml
 import re
+from datetime import datetime
+from backend.ML_training.artifact_registry import (
+    resolve_model_dir, write_manifest, shared_bundle_name, shared_output, write_output_alias, RELEASES_DIR, OUTPUT_SUFFIX
+)
+from backend.services.prediction_store import refresh_prediction_store
+
+# releases kept on disk (including the current one), so a bad promotion can be rolled back by pointing manifest.json at an older one
+KEEP_RELEASES = int(os.getenv("KEEP_RELEASES", "3"))
+# build directories (releases/.<release>.tmp) of interrupted promotions are removed once they are this old,
+# younger ones may belong to a promotion still running
+STALE_BUILD_SECONDS = int(os.getenv("STALE_BUILD_SECONDS", "3600"))
 
 def get_latest_versioned_prefix(target, staging_dir):
     pattern = re.compile(rf"^{target}_v(\d+)_\d{{8}}_\d{{4}}_best_model\.pkl$")
@@ -22,38 +35,125 @@ def get_latest_versioned_prefix(target, staging_dir):
 
     return latest_prefix
 
-def promote_models():
+# files making up one target's production bundle, as (staging name, production name)
+def bundle_files(target, prefix):
+    files = [(f"{prefix}_{suffix}", f"{target}_{suffix}") for suffix in ["best_model.pkl", "scaler.pkl", "selector.pkl", "stats.json", "quantiles.pkl"]]
+    # the training metadata is saved as <prefix>.json and promoted as <target>.json,
+    # its version is what /predict puts into the ETag
+    files.append((f"{prefix}.json", f"{target}.json"))
+    return files
+
+# a bundle can only be published with its model, scaler and selector
+def bundle_complete(source_dir, files):
+    return all(os.path.exists(os.path.join(source_dir, source_name)) for source_name, _ in files[:3])
+
+# deletes all but the newest `keep` releases, never the current one
+def prune_releases(production_dir, current, keep=KEEP_RELEASES):
+    releases_dir = os.path.join(production_dir, RELEASES_DIR)
+    releases = sorted(name for name in os.listdir(releases_dir) if not name.startswith("."))
+    for name in releases[:-max(keep, 1)]:
+        if name != current:
+            shutil.rmtree(os.path.join(releases_dir, name), ignore_errors=True)
+            print(f"Removed old release: {name}")
+
+# deletes the build directories interrupted promotions left behind
+def remove_stale_builds(releases_dir, max_age=STALE_BUILD_SECONDS):
+    now = time.time()
+    for name in os.listdir(releases_dir):
+        path = os.path.join(releases_dir, name)
+        if name.startswith(".") and name.endswith(".tmp") and now - os.path.getmtime(path) > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"Removed interrupted release build: {name}")
+
+# targets a shared bundle predicts, in output order, from its training metadata
+def shared_targets(source_dir, meta_name):
+    with open(os.path.join(source_dir, meta_name), "r") as meta_file:
+        return json.load(meta_file)["targets"]
+
+# builds a complete release directory and then switches the manifest to it in one os.replace.
+# running API workers pick it up on their next request, requests already running finish on the old bundle.
+# with multi_output (default from config.yaml) the targets are promoted as one shared bundle plus a
+# <target>_output.json alias per target
+def promote_models(staging_dir="backend/ML_training/models/staging",
+                   production_dir="backend/ML_training/models/production", targets=None, multi_output=None):
     with open("config.yaml", "r") as f:
         config = yaml.safe_load(f)
 
-    targets = config.get("targets", [])
+    targets = targets or config.get("targets", [])
+    if multi_output is None:
+        multi_output = config.get("multi_output", False)
     base_dir = config.get("output_dir", "models")
-    staging_dir = "backend/ML_training/models/staging"
-    production_dir = "backend/ML_training/models/production"
-    os.makedirs(production_dir, exist_ok=True)
+    releases_dir = os.path.join(production_dir, RELEASES_DIR)
+    os.makedirs(releases_dir, exist_ok=True)
+    remove_stale_builds(releases_dir)
+
+    release = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    build_dir = os.path.join(releases_dir, f".{release}.tmp")
+    os.makedirs(build_dir)
+    # current bundle (previous release or the flat layout), targets without a new version are carried over from it
+    current_dir = resolve_model_dir(production_dir)
 
     print("\nPromoting latest versioned models from staging to production...\n")
 
-    for target in targets:
-        prefix = get_latest_versioned_prefix(target, staging_dir)
-        if not prefix:
-            print(f"No versions found for target '{target}' — skipped.")
-            continue
+    try:
+        published = []
+        names = [shared_bundle_name(targets)] if multi_output else targets
+        for target in names:
+            prefix = get_latest_versioned_prefix(target, staging_dir)
+            if prefix and not bundle_complete(staging_dir, bundle_files(target, prefix)):
+                print(f"Incomplete bundle for '{prefix}', not promoted.")
+                prefix = None
+            alias = None if multi_output else shared_output(target, current_dir)
+            if prefix:
+                source_dir, files = staging_dir, bundle_files(target, prefix)
+            elif os.path.exists(os.path.join(current_dir, f"{target}_best_model.pkl")):
+                print(f"No versions found for target '{target}' — keeping the current model.")
+                # production files are already named after the target
+                source_dir, files = current_dir, bundle_files(target, target)
+            elif alias is not None:
+                print(f"No versions found for target '{target}' — keeping the shared model {alias['bundle']}.")
+                alias_file = f"{target}_{OUTPUT_SUFFIX}"
+                source_dir, files = current_dir, bundle_files(alias["bundle"], alias["bundle"]) + [(alias_file, alias_file)]
+            else:
+                print(f"No versions found for target '{target}' — skipped.")
+                continue
 
-        for suffix in ["best_model.pkl", "scaler.pkl", "selector.pkl", "json"]:
-            versioned_filename = f"{prefix}_{suffix}"
-            cleaned_filename = f"{target}_{suffix}"
+            for source_name, production_name in files:
+                src = os.path.join(source_dir, source_name)
+                if os.path.exists(src):
+                    shutil.copy2(src, os.path.join(build_dir, production_name))
+                    if prefix:
+                        print(f"Promoted: {production_name}")
+                elif prefix:
+                    print(f"Missing file: {source_name} (skipped)")
+            if multi_output:
+                outputs = shared_targets(source_dir, files[-1][0])
+                for output, shared_target in enumerate(outputs):
+                    write_output_alias(build_dir, shared_target, target, output)
+                published.extend(outputs)
+            else:
+                published.append(target)
+    except BaseException:
+        # a failed promotion doesn't leave its half-built release behind
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
 
-            src = os.path.join(staging_dir, versioned_filename)
-            dst = os.path.join(production_dir, cleaned_filename)
+    if not published:
+        shutil.rmtree(build_dir)
+        print("\nNothing to promote.\n")
+        return
 
-            if os.path.exists(src):
-                shutil.copy2(src, dst)
-                print(f"Promoted: {cleaned_filename}")
-            else:
-                print(f"Missing file: {versioned_filename} (skipped)")
+    # the release only becomes visible once every file is in place
+    os.rename(build_dir, os.path.join(releases_dir, release))
+    write_manifest(production_dir, release, published)
+    prune_releases(production_dir, release)
+    print(f"\nPromotion complete, production now serves release {release}.\n")
 
-    print("\nPromotion complete.\n")
+    # recompute the materialized predictions with the promoted models
+    if refresh_prediction_store(targets, production_dir):
+        print("Prediction store refreshed.")
+    else:
+        print("Prediction store refresh failed, /predict will compute live until the next refresh.")
 
 if __name__ == "__main__":
     promote_models()
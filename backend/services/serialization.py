@@ -0,0 +1,133 @@
+import orjson
+
+# supported /predict representations
+JSON = "json"          # list of records (default)
+NDJSON = "ndjson"      # one record per line, streamed in chunks
+COLUMNAR = "columnar"  # {"column": [values, ...]}
+ARROW = "arrow"        # Arrow IPC stream, requires the optional pyarrow package
+
+MEDIA_TYPES = {
+    JSON: "application/json",
+    NDJSON: "application/x-ndjson",
+    COLUMNAR: "application/json",
+    ARROW: "application/vnd.apache.arrow.stream",
+}
+
+# picks the representation from ?format= first, then the Accept header
+def negotiate_format(format_param=None, accept=None):
+    if format_param:
+        if format_param not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported format '{format_param}', expected one of {sorted(MEDIA_TYPES)}")
+        return format_param
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type == MEDIA_TYPES[NDJSON]:
+            return NDJSON
+        if media_type == MEDIA_TYPES[ARROW]:
+            return ARROW
+    return JSON
+
+# column values as plain Python lists (NaN stays float nan, which orjson writes as null)
+def _column_lists(df):
+    return {str(col): df[col].tolist() for col in df.columns}
+
+# list of row dicts without going through DataFrame.to_dict
+def frame_to_records(df):
+    columns = _column_lists(df)
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+def encode_records(df):
+    return orjson.dumps(frame_to_records(df))
+
+def encode_columnar(df):
+    return orjson.dumps(_column_lists(df))
+
+def encode_ndjson(df):
+    return b"".join(orjson.dumps(record) + b"\n" for record in frame_to_records(df))
+
+# writes DataFrame chunks as one Arrow IPC stream, returning the bytes produced by each chunk
+class ArrowStreamEncoder:
+    def __init__(self):
+        import pyarrow
+        self._pa = pyarrow
+        self._buffer = []
+        self._writer = None
+        self._schema = None
+
+    # file-like sink for the IPC writer
+    def write(self, data):
+        self._buffer.append(bytes(data))
+        return len(data)
+
+    @property
+    def closed(self):
+        return False
+
+    def flush(self):
+        pass
+
+    def _drain(self):
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def encode(self, df):
+        if self._writer is None:
+            batch = self._pa.RecordBatch.from_pandas(df, preserve_index=False)
+            self._schema = batch.schema
+            self._writer = self._pa.ipc.new_stream(self, self._schema)
+        else:
+            # later chunks reuse the first chunk's schema so the stream stays consistent
+            batch = self._pa.RecordBatch.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_batch(batch)
+        return self._drain()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        return self._drain()
+
+# columnar JSON for a dict of NumPy arrays or lists, arrays are written directly by orjson
+def encode_column_arrays(columns):
+    return orjson.dumps(columns, option=orjson.OPT_SERIALIZE_NUMPY)
+
+# a dict of columns as one Arrow IPC stream
+def encode_arrow_columns(columns):
+    import pyarrow
+    table = pyarrow.table(columns)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+# parses a columnar JSON body {"column": [values, ...]}, returns (columns, row count)
+def decode_columnar(body):
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON body: {e}")
+    if not isinstance(data, dict) or not all(isinstance(values, list) for values in data.values()):
+        raise ValueError('Expected a columnar JSON object: {"column": [values, ...]}')
+    lengths = {len(values) for values in data.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same number of values")
+    return data, lengths.pop() if lengths else 0
+
+# parses an Arrow IPC stream body into NumPy columns, returns (columns, row count)
+def decode_arrow(body):
+    import pyarrow
+    try:
+        table = pyarrow.ipc.open_stream(body).read_all()
+    except pyarrow.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {e}")
+    columns = {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+    return columns, table.num_rows
+
+# True when the optional pyarrow dependency is installed
+def arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,117 @@
+# Startup warm-up for the API workers.
+# Loads every production bundle, opens the database pool and runs one dummy inference per target,
+# so the first real /predict after a deploy or worker restart doesn't pay for pickle loads,
+# the first connect and sklearn's lazy imports. /ready reports healthy once this has finished.
+
+import os
+import time
+import logging
+import threading
+from sqlalchemy import text
+from backend.db.engine import connect
+from backend.ML_training.artifact_registry import list_available_targets, get_target_bundle
+from backend.services.freshness import prediction_snapshot
+
+# set to false to skip warm-up (the app is then ready immediately)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+_lock = threading.Lock()
+warmup_state = {
+    "status": "pending",   # pending, running, done, failed
+    "models_ready": False,
+    "db_ready": False,
+    "targets": {},
+    "seconds": None,
+    "errors": [],
+}
+
+# opens (or reuses) a pooled connection, True when the database answers
+def ping_database():
+    try:
+        with connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        logging.warning(f"Database not reachable during warm-up: {e}")
+        return False
+
+# one all-median row through the compiled pipeline exercises the same code as a real request
+def warm_target(bundle, stats):
+    import pandas as pd
+
+    medians = stats["medians"] if stats else {}
+    row = pd.DataFrame([{col: medians.get(col, 0.0) for col in bundle.pipeline.feature_names}])
+    bundle.pipeline.predict(row, medians)
+
+# the ML stack is first imported here, in the background, rather than when api_server is imported.
+# an unexpected error ends warm-up as "failed" (never ready) instead of leaving it "running"
+def warm_up(model_dir="backend/ML_training/models/production", reference_table="historical_data_table"):
+    start = time.perf_counter()
+    with _lock:
+        warmup_state.update(status="running", errors=[], targets={})
+    try:
+        return run_warm_up(model_dir, reference_table, start)
+    except Exception as e:
+        logging.exception("Warm-up failed")
+        with _lock:
+            warmup_state["errors"].append(f"warm-up: {e}")
+            warmup_state.update(status="failed", models_ready=False, seconds=round(time.perf_counter() - start, 3))
+        return warmup_state
+
+def run_warm_up(model_dir, reference_table, start):
+    from backend.ML_training.predictions import load_reference_stats
+
+    db_ready = ping_database()
+    targets = sorted(list_available_targets(model_dir))
+    bundles = {}
+    for target in targets:
+        try:
+            bundles[target] = get_target_bundle(target, model_dir)
+        except Exception as e:
+            logging.error(f"Warm-up could not load the {target} model: {e}")
+            warmup_state["errors"].append(f"{target}: {e}")
+            warmup_state["targets"][target] = "failed"
+
+    # models trained before stats were saved need the reference medians, which come from the database.
+    # requests are computed for the sorted target list, so this fills the cache entry they use
+    reference_stats = None
+    if db_ready and any(bundle.stats is None for bundle in bundles.values()):
+        try:
+            reference_stats = load_reference_stats(reference_table, targets)
+        except Exception as e:
+            logging.warning(f"Warm-up could not load reference stats: {e}")
+            warmup_state["errors"].append(f"reference stats: {e}")
+
+    for target, bundle in bundles.items():
+        try:
+            warm_target(bundle, bundle.stats or reference_stats)
+            warmup_state["targets"][target] = "ready"
+        except Exception as e:
+            logging.error(f"Warm-up inference failed for {target}: {e}")
+            warmup_state["errors"].append(f"{target}: {e}")
+            warmup_state["targets"][target] = "failed"
+
+    # reads the model versions and data watermark so the first request's ETag is cached too
+    if db_ready:
+        prediction_snapshot(targets, model_dir)
+
+    with _lock:
+        warmup_state.update(
+            status="done",
+            models_ready=bool(targets) and all(state == "ready" for state in warmup_state["targets"].values()),
+            db_ready=db_ready,
+            seconds=round(time.perf_counter() - start, 3),
+        )
+    logging.info(f"Warm-up finished in {warmup_state['seconds']}s: {warmup_state['targets']}")
+    return warmup_state
+
+# True once warm-up has finished with every model loaded and the database reachable.
+# a database that was down during warm-up is pinged again so readiness can recover
+def is_ready():
+    if not WARMUP_ON_STARTUP:
+        return True
+    if warmup_state["status"] != "done" or not warmup_state["models_ready"]:
+        return False
+    if not warmup_state["db_ready"]:
+        warmup_state["db_ready"] = ping_database()
+    return warmup_state["db_ready"]
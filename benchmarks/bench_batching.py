@@ -0,0 +1,48 @@
+# throughput of concurrent team-sized prediction requests with and without micro-batching,
+# using the committed production models on historical rows.
+# run using python -m benchmarks.bench_batching
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from backend.ML_training.artifact_registry import get_target_bundle
+from backend.services.batching import MicroBatcher
+from benchmarks.bench_utils import load_historical_rows, print_table, PRODUCTION_DIR
+
+CONCURRENCY = [1, 8, 32, 128]
+ROWS_PER_REQUEST = 15  # about one team's roster
+ROUNDS = 5
+
+async def run_requests(predict, pipeline, matrices):
+    start = time.perf_counter()
+    await asyncio.gather(*[predict(pipeline, X) for X in matrices])
+    return time.perf_counter() - start
+
+def main():
+    df = load_historical_rows()
+    medians = df.median(numeric_only=True).to_dict()
+    pipeline = get_target_bundle("3P", PRODUCTION_DIR).pipeline
+    X = pipeline.transform(df, medians)
+    executor = ThreadPoolExecutor(max_workers=4)
+
+    async def unbatched(pipeline, X):
+        return await asyncio.get_running_loop().run_in_executor(executor, pipeline.predict_matrix, X)
+
+    rows = []
+    for concurrency in CONCURRENCY:
+        matrices = [X[i * ROWS_PER_REQUEST:(i + 1) * ROWS_PER_REQUEST] for i in range(concurrency)]
+        batcher = MicroBatcher(executor, window_ms=2)
+        plain_s = min(asyncio.run(run_requests(unbatched, pipeline, matrices)) for _ in range(ROUNDS))
+        batched_s = min(asyncio.run(run_requests(batcher.predict, pipeline, matrices)) for _ in range(ROUNDS))
+        stats = batcher.stats()
+        rows.append([
+            concurrency, f"{concurrency / plain_s:.0f}", f"{concurrency / batched_s:.0f}",
+            f"{plain_s / batched_s:.2f}x", f"{stats['avg_batch_requests']:.1f}"
+        ])
+
+    print_table(["concurrent", "unbatched_req_s", "batched_req_s", "speedup", "avg_batch"], rows)
+    executor.shutdown()
+
+if __name__ == "__main__":
+    main()
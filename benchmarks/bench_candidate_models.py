@@ -0,0 +1,53 @@
+# fit time, predict time and held-out R2/MAE of every candidate model on the historical rows, through
+# the same split, scaling and compiled inference pipeline as production. feature selection is left out
+# (all features kept) so only the estimators are compared.
+# run using python -m benchmarks.bench_candidate_models [target]
+
+import sys
+import time
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.feature_selection import SelectKBest, f_regression
+from sklearn.metrics import mean_absolute_error, r2_score
+from backend.ML_training.inference import CompiledPipeline
+from backend.ML_training.training_program import candidate_models, prepare_training_frame
+from benchmarks.bench_utils import load_historical_rows, time_ms, print_table
+
+TARGETS = ["3P", "3PA"]
+CANDIDATES = ["RandomForest", "GradientBoosting", "HistGradientBoosting"]
+ROWS_PER_REQUEST = 15  # about one team's roster
+
+def main():
+    target = sys.argv[1] if len(sys.argv) > 1 else "3P"
+    df = load_historical_rows()
+    # prepare_training_frame filters on the player name
+    df["Player"] = ""
+    df, medians = prepare_training_frame(df)
+    X = df.drop(columns=TARGETS)
+    X_train, X_test, y_train, y_test = train_test_split(X, df[target], test_size=0.2, random_state=42)
+    scaler = StandardScaler().fit(X_train)
+    X_train_scaled = pd.DataFrame(scaler.transform(X_train), columns=X.columns)
+    selector = SelectKBest(f_regression, k="all").fit(X_train_scaled, y_train)
+    team = X_test.iloc[:ROWS_PER_REQUEST]
+
+    rows = []
+    for name, model in candidate_models({"candidates": CANDIDATES}).items():
+        start = time.perf_counter()
+        # production models are fitted on the selector output, a plain array
+        model.fit(X_train_scaled.to_numpy(), y_train)
+        fit_seconds = time.perf_counter() - start
+        pipeline = CompiledPipeline(scaler, selector, model)
+        y_pred = pipeline.predict(X_test, medians)
+        team_ms = time_ms(lambda: pipeline.predict(team, medians))
+        test_ms = time_ms(lambda: pipeline.predict(X_test, medians), repeat=3)
+        trees = getattr(model, "n_iter_", None) or len(model.estimators_)
+        rows.append([
+            name, trees, f"{fit_seconds:.1f}", f"{team_ms:.2f}", f"{test_ms:.1f}",
+            f"{r2_score(y_test, y_pred):.4f}", f"{mean_absolute_error(y_test, y_pred):.4f}"
+        ])
+    print(f"{target}, {len(X_train)} training rows, {len(X_test)} test rows, {X.shape[1]} features")
+    print_table(["model", "trees", "fit_s", "team_ms", "test_set_ms", "r2", "mae"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# selection time, selected feature count and held-out R2/MAE of every feature_selection strategy for the
+# candidate models, on a sample of the historical rows (same split and scaling as train_and_save_models).
+# the selection cache is off so rfecv is timed from scratch.
+# run using python -m benchmarks.bench_feature_selection [rows] [target]
+
+import sys
+import time
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import mean_absolute_error, r2_score
+from backend.ML_training.feature_selection import STRATEGIES
+from backend.ML_training.training_program import candidate_models, prepare_training_frame, select_features
+from benchmarks.bench_utils import load_historical_rows, print_table
+
+TARGETS = ["3P", "3PA"]
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    target = sys.argv[2] if len(sys.argv) > 2 else "3P"
+    df = load_historical_rows()
+    df = df.sample(n=min(n_rows, len(df)), random_state=0)
+    # prepare_training_frame filters on the player name
+    df["Player"] = ""
+    df, _ = prepare_training_frame(df)
+    X = df.drop(columns=TARGETS)
+    X_train, X_test, y_train, y_test = train_test_split(X, df[target], test_size=0.2, random_state=42)
+    scaler = StandardScaler()
+    X_train = pd.DataFrame(scaler.fit_transform(X_train), columns=X.columns)
+    X_test = pd.DataFrame(scaler.transform(X_test), columns=X.columns)
+
+    rows = []
+    for name in candidate_models():
+        for strategy in STRATEGIES:
+            model = candidate_models()[name]
+            start = time.perf_counter()
+            selector, X_selected, _ = select_features(model, X_train, y_train, strategy=strategy)
+            selection_seconds = time.perf_counter() - start
+            model.fit(X_selected, y_train)
+            y_pred = model.predict(selector.transform(X_test))
+            rows.append([
+                name, strategy, f"{selection_seconds:.1f}", int(X_selected.shape[1]),
+                f"{r2_score(y_test, y_pred):.4f}", f"{mean_absolute_error(y_test, y_pred):.4f}"
+            ])
+            print(f"{name} {strategy} done in {selection_seconds:.1f}s")
+    print(f"{target}, {len(df)} rows, {X.shape[1]} features")
+    print_table(["model", "strategy", "selection_s", "features", "r2", "mae"], rows)
+
+if __name__ == "__main__":
+    main()
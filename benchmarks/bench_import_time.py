@@ -0,0 +1,68 @@
+# import-time report for the API entry point, in the style of python -X importtime.
+# importing api_server must stay free of the ML stack (it's loaded by warm-up or the first /predict),
+# so the script fails when a heavy package shows up or the import goes over budget.
+# run using python -m benchmarks.bench_import_time
+
+import os
+import re
+import subprocess
+import sys
+from benchmarks.bench_utils import print_table
+
+# packages the auth path never needs
+HEAVY_MODULES = ["pandas", "numpy", "sklearn", "scipy", "joblib", "yaml", "pyarrow"]
+# cumulative import time allowed for api_server, in milliseconds
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+RUNS = 5
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+# runs one fresh interpreter and returns [(module, self_us, cumulative_us, depth)] in importtime order
+def import_profile(statement):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": os.getcwd()}
+    )
+    profile = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            profile.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return profile
+
+# fastest cumulative time (ms) of the top-level module over several runs, plus the last profile
+def measure(module):
+    best, profile = float("inf"), None
+    for _ in range(RUNS):
+        profile = import_profile(f"import {module}")
+        best = min(best, next(cum for name, _, cum, _ in profile if name == module) / 1000)
+    return best, profile
+
+def main():
+    total_ms, profile = measure("api_server")
+    ml_ms, _ = measure("backend.ML_training.predictions")
+
+    # cumulative time per top-level package (its largest entry, which is the outermost import)
+    packages = {}
+    for module, _, cumulative_us, _ in profile:
+        package = module.split(".")[0]
+        packages[package] = max(packages.get(package, 0), cumulative_us)
+    rows = [[name, f"{us / 1000:.1f}"] for name, us in sorted(packages.items(), key=lambda item: -item[1])[:12]]
+    print_table(["package", "cumulative_ms"], rows)
+
+    loaded = sorted({module.split(".")[0] for module, _, _, _ in profile} & set(HEAVY_MODULES))
+    print(f"\nimport api_server: {total_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms, best of {RUNS})")
+    print(f"deferred ML stack (backend.ML_training.predictions): {ml_ms:.1f} ms")
+
+    failures = []
+    if loaded:
+        failures.append(f"heavy modules imported by api_server: {loaded}")
+    if total_ms > IMPORT_BUDGET_MS:
+        failures.append(f"import time {total_ms:.1f} ms is over the {IMPORT_BUDGET_MS:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# cost of ?intervals=true compared with point-only inference.
+# "intervals" is CompiledPipeline.predict_intervals_matrix, "separate" predicts the point and then each bound
+# with its own sklearn traversal. a forest reads its spread from the same flat walk as its prediction; a boosted
+# model predicts with its quantile companions through sklearn by default, or as one stacked flat walk with
+# FLAT_TREE_EVAL=always (shown as "stacked").
+# uses the production 3P GradientBoosting model with quantile companions fitted here on the historical rows,
+# and a RandomForest with the training settings (per-tree spread).
+# run using python -m benchmarks.bench_intervals
+
+import numpy as np
+from unittest.mock import patch
+from sklearn.ensemble import RandomForestRegressor
+from backend.ML_training.artifact_registry import load_target_artifacts
+from backend.ML_training.inference import CompiledPipeline, INTERVAL_QUANTILES
+from backend.ML_training.training_program import fit_quantile_models
+from benchmarks.bench_utils import load_historical_rows, time_ms, print_table, PRODUCTION_DIR
+
+BATCH_SIZES = [15, 550, 5000]
+
+def bench_model(name, pipeline, separate, X, rows, point=None):
+    point = point or pipeline.predict_matrix
+    for n in BATCH_SIZES:
+        batch = X[:n]
+        point_ms = time_ms(lambda: point(batch))
+        intervals_ms = time_ms(lambda: pipeline.predict_intervals_matrix(batch))
+        separate_ms = time_ms(lambda: separate(batch))
+        rows.append([
+            name, n, f"{point_ms:.3f}", f"{intervals_ms:.3f}", f"{separate_ms:.3f}",
+            f"{intervals_ms / point_ms:.2f}x", f"{separate_ms / intervals_ms:.2f}x"
+        ])
+
+def main():
+    df = load_historical_rows()
+    medians = df.median(numeric_only=True).to_dict()
+    y = df["3P"].to_numpy()
+    model, scaler, selector = load_target_artifacts("3P", PRODUCTION_DIR)
+    X = CompiledPipeline(scaler, selector, model).transform(df, medians)
+    rows = []
+
+    companions = fit_quantile_models(model, X, y)
+    boosted = CompiledPipeline(scaler, selector, model, companions)
+    lower_model, upper_model = companions[min(companions)], companions[max(companions)]
+    separate = lambda batch: (model.predict(batch), lower_model.predict(batch), upper_model.predict(batch))
+    bench_model("3P GradientBoosting + quantiles", boosted, separate, X, rows)
+    with patch("backend.ML_training.inference.FLAT_TREE_EVAL", "always"):
+        stacked = CompiledPipeline(scaler, selector, model, companions)
+    bench_model("3P GradientBoosting stacked", stacked, separate, X, rows, point=boosted.predict_matrix)
+
+    forest = RandomForestRegressor(n_estimators=200, max_depth=10, random_state=42).fit(X, y)
+    percentiles = [100 * q for q in INTERVAL_QUANTILES]
+    bench_model(
+        "3P RandomForest (tree spread)", CompiledPipeline(scaler, selector, forest),
+        lambda batch: (forest.predict(batch),
+                       np.percentile([tree.predict(batch) for tree in forest.estimators_], percentiles, axis=0)),
+        X, rows
+    )
+
+    print_table(["model", "rows", "point_ms", "intervals_ms", "separate_ms", "overhead_vs_point", "vs_separate"], rows)
+
+if __name__ == "__main__":
+    main()
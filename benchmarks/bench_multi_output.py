@@ -0,0 +1,64 @@
+# fit and predict cost of one shared multi-output RandomForest compared with one model per target,
+# for 2 to 10 targets on the historical rows. feature selection is left out (all features kept) so
+# only the estimator and inference costs are compared.
+# run using python -m benchmarks.bench_multi_output
+
+import time
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+from sklearn.feature_selection import SelectKBest, f_regression
+from sklearn.ensemble import RandomForestRegressor
+from backend.ML_training.inference import CompiledPipeline
+from benchmarks.bench_utils import load_historical_rows, time_ms, print_table
+
+CANDIDATE_TARGETS = ["3P", "3PA", "FG", "FGA", "FT", "FTA", "PTS", "AST", "TRB", "STL"]
+TARGET_COUNTS = [2, 5, 10]
+ROWS_PER_REQUEST = 15  # about one team's roster
+
+def fit_seconds(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def new_model():
+    return RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
+
+def main():
+    df = load_historical_rows()
+    df = df.fillna(df.median(numeric_only=True))
+    X_df = df.drop(columns=CANDIDATE_TARGETS)
+    medians = X_df.median().to_dict()
+    scaler = StandardScaler().fit(X_df)
+    selector = SelectKBest(f_regression, k="all").fit(scaler.transform(X_df), df["3P"])
+    X = scaler.transform(X_df)
+    team = X_df.iloc[:ROWS_PER_REQUEST]
+
+    rows = []
+    for count in TARGET_COUNTS:
+        targets = CANDIDATE_TARGETS[:count]
+        per_target_fit, models = 0.0, []
+        for target in targets:
+            seconds, model = fit_seconds(lambda: new_model().fit(X, df[target]))
+            per_target_fit += seconds
+            models.append(model)
+        shared_fit, shared = fit_seconds(lambda: new_model().fit(X, df[targets]))
+
+        per_target = [CompiledPipeline(scaler, selector, model) for model in models]
+        shared_pipeline = CompiledPipeline(scaler, selector, shared)
+        for label, batch in [("team", team), ("all", X_df)]:
+            per_target_ms = time_ms(lambda: [pipeline.predict(batch, medians) for pipeline in per_target], repeat=5)
+            shared_ms = time_ms(lambda: shared_pipeline.predict(batch, medians), repeat=5)
+            rows.append([
+                count, label, f"{per_target_fit:.1f}", f"{shared_fit:.1f}", f"{per_target_ms:.2f}", f"{shared_ms:.2f}",
+                f"{per_target_ms / shared_ms:.2f}x"
+            ])
+
+        # how far the shared model's accuracy is from the per-target models on the training rows
+        gap = max(abs(np.corrcoef(model.predict(X), df[target])[0, 1] - np.corrcoef(shared.predict(X)[:, i], df[target])[0, 1])
+                  for i, (target, model) in enumerate(zip(targets, models)))
+        print(f"{count} targets: largest in-sample correlation gap {gap:.4f}")
+
+    print_table(["targets", "rows", "per_target_fit_s", "shared_fit_s", "per_target_ms", "shared_ms", "predict_speedup"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# wall clock of train_and_save_models with the (target x candidate model) jobs run one after another
+# compared with the process pool, on a sample of the historical rows. artifacts go to a temporary directory.
+# run using python -m benchmarks.bench_parallel_training [rows]
+# with 1 core both modes run the jobs back to back, the speedup needs a multi-core machine
+
+import os
+import sys
+import tempfile
+from backend.ML_training.training_program import train_and_save_models
+from benchmarks.bench_utils import load_historical_rows, print_table
+
+TARGETS = ["3P", "3PA"]
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    df = load_historical_rows()
+    df = df.sample(n=min(n_rows, len(df)), random_state=0)
+    # prepare_training_frame filters on the player name
+    df["Player"] = ""
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, options in [("sequential", {"parallel_training": False}), ("process pool", {"parallel_training": True})]:
+            config = {"targets": TARGETS, "output_dir": os.path.join(tmp, label.replace(" ", "_")), **options}
+            summary = train_and_save_models(df, config)
+            rows.append([
+                label, summary["jobs"], f"{summary['workers']} x {summary['n_jobs_per_worker']}",
+                summary["wall_seconds"], summary["job_seconds"]
+            ])
+    print(f"{os.cpu_count()} cores, {len(df)} rows")
+    rows[1].append(f"{rows[0][3] / rows[1][3]:.2f}x")
+    rows[0].append("1.00x")
+    print_table(["mode", "jobs", "workers x n_jobs", "wall_s", "job_s", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# compares the flattened NumPy tree evaluator with sklearn's model.predict
+# on the committed production models and on a RandomForest with the training settings.
+# run using python -m benchmarks.bench_tree_eval
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from backend.ML_training.artifact_registry import load_target_artifacts
+from backend.ML_training.inference import CompiledPipeline
+from backend.ML_training.tree_eval import FlatEnsemble
+from benchmarks.bench_utils import load_historical_rows, time_ms, print_table, PRODUCTION_DIR
+
+BATCH_SIZES = [1, 30, 550, 5000]
+
+def bench_model(name, model, X, rows):
+    flat = FlatEnsemble.from_estimator(model)
+    # the evaluator must agree with sklearn bit for bit
+    assert np.array_equal(model.predict(X), flat.predict(X)), f"{name}: flat evaluator differs from sklearn"
+    for n in BATCH_SIZES:
+        batch = X[:n]
+        sklearn_ms = time_ms(lambda: model.predict(batch))
+        flat_ms = time_ms(lambda: flat.predict(batch))
+        rows.append([name, n, f"{sklearn_ms:.3f}", f"{flat_ms:.3f}", f"{sklearn_ms / flat_ms:.2f}x"])
+
+def main():
+    df = load_historical_rows()
+    medians = df.median(numeric_only=True).to_dict()
+    rows = []
+    for target in ["3P", "3PA"]:
+        model, scaler, selector = load_target_artifacts(target, PRODUCTION_DIR)
+        X = CompiledPipeline(scaler, selector, model).transform(df, medians)
+        bench_model(f"{target} {type(model).__name__}", model, X, rows)
+
+    # production models are currently GradientBoosting, so also fit the RandomForest candidate
+    model, scaler, selector = load_target_artifacts("3P", PRODUCTION_DIR)
+    X = CompiledPipeline(scaler, selector, model).transform(df, medians)
+    forest = RandomForestRegressor(n_estimators=200, max_depth=10, random_state=42).fit(X, df["3P"].to_numpy())
+    bench_model("3P RandomForestRegressor", forest, X, rows)
+
+    print_table(["model", "rows", "sklearn_ms", "flat_ms", "speedup"], rows)
+    print("\nAll flat predictions matched sklearn exactly.")
+
+if __name__ == "__main__":
+    main()
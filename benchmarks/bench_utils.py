@@ -0,0 +1,33 @@
+# shared helpers for the benchmark scripts.
+# run benchmarks from the project root, e.g. python -m benchmarks.bench_tree_eval
+import time
+import numpy as np
+import pandas as pd
+
+HISTORICAL_CSV = "Scraping/Historical_Stats/nba_player_stats_nba_api_1997_to_2023.csv"
+PRODUCTION_DIR = "backend/ML_training/models/production"
+
+# historical player rows shaped like the training table (numeric features only)
+def load_historical_rows(path=HISTORICAL_CSV):
+    df = pd.read_csv(path)
+    df = df[df["Player"] != "Team Totals"].copy()
+    df.drop(columns=["Awards", "Pos", "Age", "Rk", "Player", "TEAM"], inplace=True, errors="ignore")
+    # the database table carries a row id column the models were trained with
+    if "id" not in df.columns:
+        df.insert(0, "id", np.arange(1, len(df) + 1))
+    return df
+
+# best-of-N wall time of fn() in milliseconds
+def time_ms(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
@@ -1,24 +1,23 @@
 import pandas as pd
-from sqlalchemy import create_engine
 import os
-import urllib
 import logging
+from sqlalchemy import text
 from dotenv import load_dotenv
 load_dotenv()
+from backend.db.engine import connect
 
 
-def load_data_from_rds():
-    DB_USER = os.getenv("DB_USER")
-    DB_PASS = urllib.parse.quote_plus(os.getenv("DB_PASS"))
-    DB_HOST = os.getenv("DB_HOST")
-    DB_NAME = os.getenv("DB_NAME", "nba_analysis")
+# after_season loads only the seasons after it (incremental retraining)
+def load_data_from_rds(after_season=None):
     TABLE_NAME = os.getenv("DB_TABLE", "historical_data_table")
-    SSL_CERT = os.getenv("RDS_SSL_CERT", "/path/to/rds-combined-ca-bundle.pem")
+    query = f"SELECT * FROM {TABLE_NAME} WHERE Player != 'Team Totals'"
+    params = {}
+    if after_season is not None:
+        query += " AND YR > :after_season"
+        params["after_season"] = int(after_season)
 
-    DB_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}?ssl_ca={SSL_CERT}"
-    engine = create_engine(DB_URL)
-
-    with engine.connect() as conn:
-        df = pd.read_sql(f"SELECT * FROM {TABLE_NAME} WHERE Player != 'Team Totals'", conn)
+    # connection settings (including RDS_SSL_CERT) come from the shared engine
+    with connect() as conn:
+        df = pd.read_sql(text(query), conn, params=params)
     logging.info(f"Loaded {len(df)} rows from {TABLE_NAME}")
     return df
\ No newline at end of file
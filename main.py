@@ -1,11 +1,16 @@
 import logging
+import argparse
 from dotenv import load_dotenv
 import yaml
 from db_loader import load_data_from_rds
-from backend.ML_training.training_program import train_and_save_models
+from backend.ML_training.training_program import train_and_save_models, update_models, trained_through
 import os
 
 def main():
+    parser = argparse.ArgumentParser(description="Train the prediction models")
+    parser.add_argument("--full", action="store_true", help="retrain every model from the whole history")
+    args = parser.parse_args()
+
     load_dotenv()
     required_env_vars = ["DB_USER", "DB_PASS", "DB_HOST"]
     missing = [var for var in required_env_vars if not os.getenv(var)]
@@ -19,8 +24,18 @@ def main():
     with open("config.yaml", "r") as file:
         config = yaml.safe_load(file)
 
-    df = load_data_from_rds()
-    train_and_save_models(df, config)
+    # the production models are updated with the seasons added since they were trained, unless a full
+    # rebuild is asked for (--full) or they can't be (never trained incrementally, drifted data, ...)
+    targets = config.get("targets", [])
+    season = None if args.full or config.get("multi_output", False) else trained_through(targets)
+    if season is None:
+        train_and_save_models(load_data_from_rds(), config)
+    else:
+        logging.info(f"Incremental retraining with the seasons after {season}")
+        result = update_models(load_data_from_rds(after_season=season), config)
+        if result["rebuild"]:
+            logging.info(f"Rebuilding {result['rebuild']} from the full history")
+            train_and_save_models(load_data_from_rds(), config, train_targets=result["rebuild"])
 
     logging.info("Pipeline complete.")
 